@@ -0,0 +1,168 @@
+import copy
+import json
+import os
+import pickle
+import re
+from time import strftime
+import uuid
+
+import numpy
+
+"""
+Marco Link
+"""
+
+# the version of the artifact format, artifacts of other versions can't be loaded
+ARTIFACT_VERSION = 1
+
+_MANIFEST = 'manifest.json'
+_COMPONENTS = ('preprocessing_pipeline', 'vectorizer', 'reducer', 'clusterer')
+# the files of a component are named after the component and the id of the artifact
+_VERSIONED_FILE = re.compile('^(?:' + '|'.join(_COMPONENTS) + r')\.[0-9a-f]{32}\.')
+
+
+class Artifact:
+    """
+    The fitted preprocessing pipeline, vectorizer, dimensionality reduction and clusterer of a clustering process,
+    saved in a folder.
+    Every component is pickled, its numpy arrays and the ones of its nested estimators, like the idf weights and the
+    cluster centers, are saved as .npy files and memory mapped when the artifact is loaded. The manifest.json
+    describes the files and is replaced last. The files are named after the id of the artifact, so saving an artifact
+    never changes the files of the previous one, which stays complete until the manifest is replaced.
+    """
+
+    def __init__(self, preprocessing_pipeline, vectorizer, clusterer, reducer=None, manifest=None):
+        """
+        :param preprocessing_pipeline: the preprocessing pipeline
+        :param vectorizer: the fitted vectorizer
+        :param clusterer: the fitted clusterer
+        :param reducer: the fitted dimensionality reduction, None if the term document matrix isn't reduced
+        :param manifest: the manifest of a loaded artifact
+        """
+        self.preprocessing_pipeline = preprocessing_pipeline
+        self.vectorizer = vectorizer
+        self.reducer = reducer
+        self.clusterer = clusterer
+        self.manifest = manifest
+
+    def save(self, path):
+        """
+        Saves the artifact, an artifact saved in the folder before is replaced.
+        :param path: the path to the folder of the artifact
+        """
+        if not os.path.exists(path):
+            os.makedirs(path)
+        previous_files = _files(_read_manifest(path)) if os.path.exists(os.path.join(path, _MANIFEST)) else set()
+        artifact_id = uuid.uuid4().hex
+        manifest = {'version': ARTIFACT_VERSION, 'id': artifact_id, 'created': strftime('%Y-%m-%d %H:%M:%S'),
+                    'numpy_version': numpy.__version__, 'components': {}}
+        for name in _COMPONENTS:
+            component = getattr(self, name)
+            arrays = {}
+            file_prefix = name + '.' + artifact_id
+            if component is not None:
+                component = _extract_arrays(component, path, file_prefix, '', arrays)
+            with open(os.path.join(path, file_prefix + '.pickle'), 'wb') as component_file:
+                pickle.dump(component, component_file, protocol=pickle.HIGHEST_PROTOCOL)
+            manifest['components'][name] = {'class': _class_name(component), 'pickle': file_prefix + '.pickle',
+                                            'arrays': arrays}
+
+        temporary_path = os.path.join(path, _MANIFEST + '.tmp')
+        with open(temporary_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(temporary_path, os.path.join(path, _MANIFEST))
+        self.manifest = manifest
+
+        # the files of the previous artifact and of interrupted saves are removed after the manifest is replaced
+        saved_files = set(file_name for file_name in os.listdir(path) if _VERSIONED_FILE.match(file_name))
+        for file_name in (previous_files | saved_files) - _files(manifest):
+            try:
+                os.remove(os.path.join(path, file_name))
+            except OSError:
+                # a memory mapped file can't be removed on windows, it is left behind
+                pass
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: the path to the folder of the artifact
+        :return: the loaded artifact, the numpy arrays of the components are memory mapped read only
+        """
+        if not os.path.exists(os.path.join(path, _MANIFEST)):
+            raise FileNotFoundError('No artifact found in ' + str(path))
+        manifest = _read_manifest(path)
+        if manifest['version'] != ARTIFACT_VERSION:
+            raise ValueError('Unsupported artifact version %s, expected %s' % (manifest['version'], ARTIFACT_VERSION))
+
+        components = {}
+        for name in _COMPONENTS:
+            description = manifest['components'].get(name)
+            if description is None:
+                # artifacts saved before the dimensionality reduction was added have no reducer
+                components[name] = None
+                continue
+            with open(os.path.join(path, description['pickle']), 'rb') as component_file:
+                component = pickle.load(component_file)
+            for attribute_path, file_name in description['arrays'].items():
+                # the arrays of nested estimators have dotted paths, e.g. '_tfidf.idf_'
+                owner = component
+                *owner_attributes, attribute = attribute_path.split('.')
+                for owner_attribute in owner_attributes:
+                    owner = getattr(owner, owner_attribute)
+                setattr(owner, attribute, numpy.load(os.path.join(path, file_name), mmap_mode='r'))
+            components[name] = component
+        return cls(manifest=manifest, **components)
+
+
+def _read_manifest(path):
+    """
+    :param path: the path to the folder of the artifact
+    :return: the manifest of the artifact
+    """
+    with open(os.path.join(path, _MANIFEST), encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def _files(manifest):
+    """
+    :param manifest: the manifest of an artifact
+    :return: set with the names of the files of the artifact
+    """
+    files = set()
+    for description in manifest.get('components', {}).values():
+        files.add(description['pickle'])
+        files.update(description['arrays'].values())
+    return files
+
+
+def _extract_arrays(component, path, name, prefix, arrays):
+    """
+    Saves the numpy arrays of a component and of its nested estimators, like the idf weights in the TfidfTransformer
+    of the TfidfVectorizer, in .npy files.
+    :param component: the component or a nested estimator
+    :param path: the path to the folder of the artifact
+    :param name: the prefix of the file names of the component
+    :param prefix: the dotted path of the nested estimator in the component followed by a dot, '' for the component
+    :param arrays: dictionary to which the dotted paths of the arrays and their file names are added
+    :return: a shallow copy of the component without the saved arrays
+    """
+    # the arrays are saved separately, so they are removed from a shallow copy and the component isn't changed
+    state = copy.copy(component)
+    for attribute, value in vars(component).items():
+        if isinstance(value, numpy.ndarray) and value.dtype != object:
+            arrays[prefix + attribute] = name + '.' + prefix + attribute + '.npy'
+            numpy.save(os.path.join(path, arrays[prefix + attribute]), value)
+            setattr(state, attribute, None)
+        elif hasattr(value, 'get_params') and hasattr(value, '__dict__') and not isinstance(value, type):
+            setattr(state, attribute, _extract_arrays(value, path, name, prefix + attribute + '.', arrays))
+    return state
+
+
+def _class_name(component):
+    """
+    :param component: a component of the artifact
+    :return: the module and name of its class
+    """
+    if component is None:
+        return None
+    return type(component).__module__ + '.' + type(component).__qualname__
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+from time import perf_counter
+
+import numpy
+from sklearn.cluster import KMeans
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import normalize
+
+from clustering.spherical_kmeans import SphericalKMeans
+
+"""
+Marco Link
+"""
+
+def create_corpus(n_documents, n_topics, document_length, vocabulary_size, seed):
+    """
+    Creates documents of random topics, every topic prefers its own part of the vocabulary.
+    :param n_documents: the amount of documents
+    :param n_topics: the amount of topics
+    :param document_length: the amount of tokens of every document
+    :param vocabulary_size: the amount of words
+    :param seed: the seed of the random generator
+    :return: the tf-idf term document matrix and the topics of the documents
+    """
+    generator = random.Random(seed)
+    vocabulary = ['word' + str(i) for i in range(vocabulary_size)]
+    topic_words = [generator.sample(vocabulary, vocabulary_size // 20) for _ in range(n_topics)]
+    documents = []
+    topics = []
+    for _ in range(n_documents):
+        topic = generator.randrange(n_topics)
+        # a third of the tokens is noise from the whole vocabulary
+        tokens = [generator.choice(topic_words[topic]) if generator.random() < 2 / 3 else generator.choice(vocabulary)
+                  for _ in range(document_length)]
+        documents.append(' '.join(tokens))
+        topics.append(topic)
+    return TfidfVectorizer().fit_transform(documents), numpy.array(topics)
+
+
+def read_corpus(config, path_spec):
+    """
+    Reads, preprocesses and vectorizes the input of a config file.
+    :param config: the path to the config file
+    :param path_spec: the path to the config specification
+    :return: the term document matrix of the config file
+    """
+    from input.config_reader import ConfigReader
+    clustering_process = ConfigReader('out').read_config(config, path_spec)
+    complete_dataset, text_fields = clustering_process.read()
+    return clustering_process.vectorize(clustering_process.preprocess_text_fields(text_fields))
+
+
+def mean_similarity(term_document_matrix, labels):
+    """
+    :param term_document_matrix: the term document matrix
+    :param labels: the clusters of the documents
+    :return: the mean cosine similarity of the documents to the normalized mean of their cluster
+    """
+    documents = normalize(term_document_matrix)
+    similarity = 0.0
+    for label in numpy.unique(labels):
+        members = documents[labels == label]
+        center = normalize(numpy.asarray(members.sum(axis=0)))
+        similarity += float((members @ center.T).sum())
+    return similarity / term_document_matrix.shape[0]
+
+
+def main(config=None, n_clusters=20, n_init=3, top_ns=(None, 1000, 200), n_documents=20000, document_length=60,
+         vocabulary_size=20000, seed=0):
+    """
+    Compares KMeans with SphericalKMeans with dense and pruned centers on the same corpus.
+    The quality is the mean cosine similarity of the documents to their cluster, and for the generated corpus the
+    adjusted rand index of the clusters and the topics.
+    Run from the 'src' folder with: python -m benchmarks.clustering_benchmark [config file]
+    :param config: the path to a config file whose input is clustered, a generated corpus is clustered if None
+    """
+    topics = None
+    if config is None:
+        term_document_matrix, topics = create_corpus(n_documents, n_clusters, document_length, vocabulary_size,
+                                                     seed)
+    else:
+        path_spec = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))),
+                                 'configSpecification')
+        term_document_matrix = read_corpus(config, path_spec)
+
+    print('documents: ' + str(term_document_matrix.shape[0]) + ', terms: ' + str(term_document_matrix.shape[1]) +
+          ', clusters: ' + str(n_clusters) + ', inits: ' + str(n_init))
+    clusterers = [('KMeans', KMeans(n_clusters=n_clusters, n_init=n_init, random_state=seed))]
+    for top_n in top_ns:
+        name = 'SphericalKMeans' + ('' if top_n is None else ', top ' + str(top_n) + ' weights')
+        clusterers.append((name, SphericalKMeans(n_clusters=n_clusters, n_init=n_init, top_n=top_n,
+                                                 random_state=seed)))
+
+    for name, clusterer in clusterers:
+        start = perf_counter()
+        clusterer.fit(term_document_matrix)
+        fit_time = perf_counter() - start
+        result = name + ': ' + str(round(fit_time, 3)) + 's, mean similarity ' + \
+            str(round(mean_similarity(term_document_matrix, clusterer.labels_), 4))
+        if topics is not None:
+            result += ', adjusted rand index ' + str(round(adjusted_rand_score(topics, clusterer.labels_), 4))
+        print(result)
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
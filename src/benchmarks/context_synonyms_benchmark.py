@@ -0,0 +1,112 @@
+from time import perf_counter
+import random
+
+from preprocessing.synonyms import ContextSynonyms, ContextSynonymsEngine
+
+"""
+Marco Link
+"""
+
+def create_rules(amount, vocabulary):
+    """
+    Creates random context synonym rules.
+    :param amount: the amount of rules
+    :param vocabulary: the words to choose the main words and context words from
+    :return: list with tuples of the main words, the context words, before, after and the substitution
+    """
+    rules = []
+    for i in range(amount):
+        rules.append((random.sample(vocabulary, 2), random.sample(vocabulary, 3), 3, 3, 'SYNONYM_' + str(i)))
+    return rules
+
+
+def create_documents(amount, length, vocabulary):
+    """
+    :param amount: the amount of documents
+    :param length: the amount of tokens of every document
+    :param vocabulary: the words to choose the tokens from
+    :return: list with the documents as lists of tokens
+    """
+    return [[random.choice(vocabulary) for _ in range(length)] for _ in range(amount)]
+
+
+def create_chained_rules(amount, vocabulary):
+    """
+    Creates random context synonym rules with different surroundings, whose substitutions can be main words or context
+    words of later rules or consist of multiple words.
+    :param amount: the amount of rules
+    :param vocabulary: the words to choose the main words, the context words and some substitutions from
+    :return: list with tuples of the main words, the context words, before, after and the substitution
+    """
+    rules = []
+    for i in range(amount):
+        substitution = random.choice([random.choice(vocabulary), 'SYNONYM_' + str(i), 'SYNONYM ' + str(i)])
+        rules.append((random.sample(vocabulary, 2), random.sample(vocabulary, 3), random.randint(0, 4),
+                      random.randint(0, 4), substitution))
+    return rules
+
+
+def check_equal_results(steps, engine, documents):
+    """
+    Checks that the ContextSynonyms steps and the ContextSynonymsEngine give the same result for tokens and strings.
+    :param steps: one ContextSynonyms step per rule
+    :param engine: the ContextSynonymsEngine with the same rules
+    :param documents: list with the documents as lists of tokens
+    :raises AssertionError: if a result differs
+    """
+    for document in documents:
+        # ContextSynonyms changes the given tokens
+        expected_tokens = list(document)
+        expected_string = ' '.join(document)
+        for step in steps:
+            expected_tokens = step.transform_tokens(expected_tokens)
+            expected_string = step.transform_string(expected_string)
+        actual_tokens = engine.transform_tokens(document)
+        actual_string = engine.transform_string(' '.join(document))
+        assert actual_tokens == expected_tokens, 'Different results for %s: %s != %s' % (document, actual_tokens,
+                                                                                        expected_tokens)
+        assert actual_string == expected_string, 'Different results for %s: %s != %s' % (document, actual_string,
+                                                                                        expected_string)
+
+
+def main(n_rules=50, n_documents=2000, document_length=120, vocabulary_size=2000, seed=0):
+    """
+    Compares one ContextSynonyms step per rule with one ContextSynonymsEngine for all rules and checks that both give
+    the same result on random documents.
+    Run from the 'src' folder with: python -m benchmarks.context_synonyms_benchmark
+    """
+    random.seed(seed)
+    vocabulary = ['word' + str(i) for i in range(vocabulary_size)]
+    rules = create_rules(n_rules, vocabulary)
+    documents = create_documents(n_documents, document_length, vocabulary)
+
+    steps = [ContextSynonyms(*rule) for rule in rules]
+    start = perf_counter()
+    for document in documents:
+        # ContextSynonyms changes the given tokens
+        tokens = list(document)
+        for step in steps:
+            tokens = step.transform_tokens(tokens)
+    per_rule_time = perf_counter() - start
+
+    engine = ContextSynonymsEngine(rules)
+    start = perf_counter()
+    for document in documents:
+        engine.transform_tokens(document)
+    engine_time = perf_counter() - start
+
+    check_equal_results(steps, engine, documents)
+    # a small vocabulary, so the documents contain many main words, context words and chained substitutions
+    parity_vocabulary = vocabulary[:30]
+    parity_rules = create_chained_rules(n_rules, parity_vocabulary)
+    check_equal_results([ContextSynonyms(*rule) for rule in parity_rules], ContextSynonymsEngine(parity_rules),
+                        create_documents(n_documents, document_length // 4, parity_vocabulary))
+    print('ContextSynonyms and ContextSynonymsEngine give equal results on the random documents')
+    print('documents: ' + str(n_documents) + ', tokens per document: ' + str(document_length) + ', rules: ' +
+          str(n_rules))
+    print('ContextSynonyms, one step per rule: ' + str(round(per_rule_time, 3)) + 's')
+    print('ContextSynonymsEngine, all rules:   ' + str(round(engine_time, 3)) + 's')
+
+
+if __name__ == '__main__':
+    main()
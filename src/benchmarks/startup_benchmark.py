@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+
+"""
+Marco Link
+"""
+
+# modules which take long to import or are optional dependencies
+HEAVY_MODULES = ['textacy', 'textblob', 'nltk', 'matplotlib', 'pyodbc', 'pyarrow', 'sklearn']
+
+# runs in a fresh interpreter, so modules imported by other benchmarks don't distort the result
+_MEASUREMENT = '''
+import json
+import sys
+from time import perf_counter
+
+t0 = perf_counter()
+from input.config_reader import ConfigReader
+import_time = perf_counter() - t0
+
+config_time = None
+if {config!r} is not None:
+    t0 = perf_counter()
+    ConfigReader({path_out!r}).read_config({config!r}, {path_spec!r})
+    config_time = perf_counter() - t0
+
+loaded = [module for module in {heavy_modules!r} if module in sys.modules]
+print(json.dumps({{'import_time': import_time, 'config_time': config_time, 'loaded': loaded}}))
+'''
+
+
+def measure(config=None, path_spec=None, path_out='out'):
+    """
+    Measures the startup of the prototype in a new python process.
+    :param config: the path to a config file which is read after the import, None if only the import is measured
+    :param path_spec: the path to the config specification
+    :param path_out: the output path for the clustering process
+    :return: dictionary with the import time, the time for reading the config file and the loaded heavy modules
+    :raises RuntimeError: if the new python process fails
+    """
+    src_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    code = _MEASUREMENT.format(config=config, path_spec=path_spec, path_out=path_out, heavy_modules=HEAVY_MODULES)
+    process = subprocess.run([sys.executable, '-c', code], cwd=src_path, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        # e.g. an optional dependency which the config file needs isn't installed
+        # the exception is the last line of the traceback which isn't indented
+        lines = [line for line in process.stderr.decode('utf-8').splitlines() if line.strip('* ') == line]
+        raise RuntimeError(lines[-1] if lines else 'exit code ' + str(process.returncode))
+    # the last line contains the measurement, the lines before are printed while reading the config file
+    return json.loads(process.stdout.decode('utf-8').strip().splitlines()[-1])
+
+
+def main(configs=None, repeats=3):
+    """
+    Measures how long importing the config reader and reading config files takes and which heavy modules are
+    imported for it.
+    Run from the 'src' folder with: python -m benchmarks.startup_benchmark [config files]
+    :param configs: list with the paths to the config files, the config folder is used if None
+    :param repeats: how often every measurement is repeated, the fastest run is reported
+    """
+    path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    path_spec = os.path.join(path, 'configSpecification')
+    if configs is None:
+        path_configs = os.path.join(path, 'config')
+        configs = [os.path.join(path_configs, config) for config in sorted(os.listdir(path_configs))
+                   if config.endswith('.conf')]
+
+    for config in [None] + [os.path.realpath(config) for config in configs]:
+        try:
+            measurements = [measure(config, path_spec) for _ in range(repeats)]
+        except RuntimeError as error:
+            print("Failed to read %s: %s" % (os.path.basename(config), error))
+            continue
+        best = min(measurements, key=lambda measurement: measurement['import_time'] +
+                   (measurement['config_time'] or 0))
+        if config is None:
+            print("Import of the config reader: %fs" % best['import_time'])
+        else:
+            print("Import and reading of %s: %fs + %fs" % (os.path.basename(config), best['import_time'],
+                                                           best['config_time']))
+        print("Loaded heavy modules: " + (', '.join(best['loaded']) if best['loaded'] else 'none'))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or None)
@@ -0,0 +1,200 @@
+import numpy
+import scipy.sparse
+from sklearn.base import BaseEstimator, ClusterMixin
+from sklearn.cluster import MiniBatchKMeans, kmeans_plusplus
+from sklearn.metrics import pairwise_distances_argmin_min
+from sklearn.utils import check_random_state
+
+"""
+Marco Link
+"""
+
+class StreamingMiniBatchKMeans(ClusterMixin, BaseEstimator):
+    """
+    Mini batch k-means which streams the term document matrix in chunks of rows through the partial_fit of sklearn's
+    MiniBatchKMeans, so only one chunk is converted and held at once. The matrix is passed at most max_iter times and
+    the fitting stops early like in MiniBatchKMeans, if the smoothed inertia of the batches doesn't improve or the
+    centers barely move. Afterwards the documents are assigned to the clusters in a final pass over the chunks.
+    """
+
+    def __init__(self, n_clusters=8, init='k-means++', n_init=3, max_iter=100, batch_size=1024, chunk_size=10000,
+                 reassignment_ratio=0.01, max_no_improvement=10, tol=0.0, init_size=None, random_state=None):
+        """
+        :param n_clusters: the amount of clusters
+        :param init: 'k-means++' or 'random', the method to choose the initial centers
+        :param n_init: the amount of initializations, the one with the lowest inertia on the init sample is used
+        :param max_iter: the maximum amount of passes over the term document matrix
+        :param batch_size: the amount of documents of a mini batch
+        :param chunk_size: the amount of documents which are streamed at once, the mini batches are drawn from a chunk
+        :param reassignment_ratio: controls how often centers with few documents are reassigned
+        :param max_no_improvement: the amount of mini batches without improvement of the smoothed inertia after
+                                   which the fitting stops, None to disable it
+        :param tol: the fitting stops if the squared movement of the centers in a mini batch is smaller than tol
+                    times the mean variance of the terms, 0 to disable it
+        :param init_size: the amount of documents of the first chunk used for the initialization,
+                          3 * batch_size if None
+        :param random_state: the seed for the initialization and the order of the mini batches
+        """
+        self.n_clusters = n_clusters
+        self.init = init
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.reassignment_ratio = reassignment_ratio
+        self.max_no_improvement = max_no_improvement
+        self.tol = tol
+        self.init_size = init_size
+        self.random_state = random_state
+
+    def fit(self, term_document_matrix, y=None):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :param y: ignored
+        :return: self
+        :raises ValueError: if the term document matrix has less documents than clusters
+        """
+        n_samples = term_document_matrix.shape[0]
+        if n_samples < self.n_clusters:
+            raise ValueError('n_clusters = %d exceeds the amount of documents %d' % (self.n_clusters, n_samples))
+        random_state = check_random_state(self.random_state)
+        tolerance = self._tolerance(term_document_matrix)
+        # the smoothing of the inertia like in MiniBatchKMeans
+        alpha = min(self.batch_size * 2.0 / (n_samples + 1), 1)
+
+        minibatch_kmeans = None
+        ewa_inertia = None
+        ewa_inertia_min = None
+        no_improvement = 0
+        n_steps = 0
+        converged = False
+        for iteration in range(self.max_iter):
+            for chunk in self._chunks(term_document_matrix):
+                if minibatch_kmeans is None:
+                    minibatch_kmeans = MiniBatchKMeans(
+                        n_clusters=self.n_clusters, init=self._initial_centers(chunk, random_state), n_init=1,
+                        batch_size=self.batch_size, reassignment_ratio=self.reassignment_ratio,
+                        random_state=random_state)
+                permutation = random_state.permutation(chunk.shape[0])
+                for start in range(0, chunk.shape[0], self.batch_size):
+                    batch = chunk[permutation[start:start + self.batch_size]]
+                    previous_centers = None
+                    if tolerance > 0 and n_steps > 0:
+                        previous_centers = minibatch_kmeans.cluster_centers_.copy()
+                    minibatch_kmeans.partial_fit(batch)
+                    n_steps += 1
+                    # the first mini batch only shows the inertia of the initialization
+                    if n_steps == 1:
+                        continue
+
+                    if previous_centers is not None and \
+                            ((minibatch_kmeans.cluster_centers_ - previous_centers) ** 2).sum() <= tolerance:
+                        converged = True
+                        break
+                    batch_inertia = minibatch_kmeans.inertia_ / batch.shape[0]
+                    if ewa_inertia is None:
+                        ewa_inertia = batch_inertia
+                    else:
+                        ewa_inertia = ewa_inertia * (1 - alpha) + batch_inertia * alpha
+                    if ewa_inertia_min is None or ewa_inertia < ewa_inertia_min:
+                        no_improvement = 0
+                        ewa_inertia_min = ewa_inertia
+                    else:
+                        no_improvement += 1
+                    if self.max_no_improvement is not None and no_improvement >= self.max_no_improvement:
+                        converged = True
+                        break
+                if converged:
+                    break
+            if converged:
+                break
+
+        self.cluster_centers_ = minibatch_kmeans.cluster_centers_
+        self.n_iter_ = iteration + 1
+        self.n_steps_ = n_steps
+        self.labels_, self.inertia_ = self._assign(term_document_matrix)
+        return self
+
+    def fit_predict(self, term_document_matrix, y=None):
+        return self.fit(term_document_matrix).labels_
+
+    def predict(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: the indexes of the nearest clusters of the documents
+        """
+        return self._assign(term_document_matrix)[0]
+
+    def _assign(self, term_document_matrix):
+        """
+        Assigns the documents to the nearest clusters chunk by chunk.
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: the indexes of the nearest clusters and the inertia
+        """
+        labels = []
+        inertia = 0.0
+        centers = self.cluster_centers_.astype(term_document_matrix.dtype, copy=False)
+        for chunk in self._chunks(term_document_matrix):
+            chunk_labels, distances = pairwise_distances_argmin_min(chunk, centers)
+            labels.append(chunk_labels.astype(numpy.int32))
+            inertia += float((distances.astype(numpy.float64) ** 2).sum())
+        if len(labels) == 0:
+            return numpy.zeros(0, dtype=numpy.int32), inertia
+        return numpy.concatenate(labels), inertia
+
+    def _chunks(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: generator of the chunks of rows with at most chunk_size documents
+        """
+        if scipy.sparse.issparse(term_document_matrix):
+            term_document_matrix = term_document_matrix.tocsr()
+        for start in range(0, term_document_matrix.shape[0], self.chunk_size):
+            yield term_document_matrix[start:start + self.chunk_size]
+
+    def _initial_centers(self, chunk, random_state):
+        """
+        Chooses the initial centers n_init times from a sample of the chunk and keeps the ones with the lowest inertia
+        on the sample.
+        :param chunk: the first chunk of the term document matrix
+        :param random_state: the random state
+        :return: the dense initial centers
+        """
+        init_size = self.init_size if self.init_size is not None else 3 * self.batch_size
+        init_size = min(max(init_size, self.n_clusters), chunk.shape[0])
+        sample = chunk[random_state.choice(chunk.shape[0], init_size, replace=False)]
+
+        best_centers = None
+        best_inertia = None
+        for _ in range(self.n_init):
+            if self.init == 'k-means++':
+                centers, _ = kmeans_plusplus(sample, self.n_clusters, random_state=random_state)
+            else:
+                centers = sample[random_state.choice(init_size, self.n_clusters, replace=False)]
+            if scipy.sparse.issparse(centers):
+                centers = centers.toarray()
+            inertia = (pairwise_distances_argmin_min(sample, centers)[1] ** 2).sum()
+            if best_inertia is None or inertia < best_inertia:
+                best_centers = centers
+                best_inertia = inertia
+        return best_centers
+
+    def _tolerance(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: tol times the mean variance of the terms, computed chunk by chunk
+        """
+        if self.tol == 0:
+            return 0
+        n_samples = term_document_matrix.shape[0]
+        sums = numpy.zeros(term_document_matrix.shape[1])
+        squared_sums = numpy.zeros(term_document_matrix.shape[1])
+        for chunk in self._chunks(term_document_matrix):
+            if scipy.sparse.issparse(chunk):
+                sums += numpy.asarray(chunk.sum(axis=0), dtype=numpy.float64).ravel()
+                squared_sums += numpy.asarray(chunk.multiply(chunk).sum(axis=0), dtype=numpy.float64).ravel()
+            else:
+                sums += chunk.sum(axis=0, dtype=numpy.float64)
+                squared_sums += (chunk.astype(numpy.float64) ** 2).sum(axis=0)
+        variances = squared_sums / n_samples - (sums / n_samples) ** 2
+        return numpy.mean(variances) * self.tol
@@ -0,0 +1,159 @@
+from multiprocessing import Pool
+import re
+
+import numpy
+from sklearn.base import clone
+from sklearn.metrics import silhouette_score
+
+from clustering.spherical_kmeans import SphericalKMeans
+
+"""
+Marco Link
+"""
+
+_AUTO_PATTERN = re.compile(r'^\s*auto\s*\(\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)\s*$')
+
+
+def parse_n_clusters(value):
+    """
+    Parses the n_clusters entry of a config file.
+    :param value: an amount of clusters like '8' or the candidates 'auto(min, max, step)', the step is 1 if omitted
+    :return: the amount of clusters and None, or None and the list with the candidate amounts of clusters
+    :raises ValueError: if the value is neither an amount of clusters nor valid candidates
+    """
+    match = _AUTO_PATTERN.match(value)
+    if match is None:
+        n_clusters = int(value)
+        if n_clusters < 1:
+            raise ValueError('n_clusters must be at least 1: ' + value)
+        return n_clusters, None
+    minimum, maximum = int(match.group(1)), int(match.group(2))
+    step = int(match.group(3)) if match.group(3) is not None else 1
+    if minimum < 2 or maximum < minimum or step < 1:
+        raise ValueError('auto(min, max, step) needs 2 <= min <= max and step >= 1: ' + value)
+    return None, list(range(minimum, maximum + 1, step))
+
+
+class NClustersSelection:
+    """
+    Chooses the amount of clusters by fitting the clusterer for every candidate amount on the same matrix and scoring
+    the results, with the silhouette score of a sample of the documents or the elbow of the inertia.
+    The candidates are fitted in parallel worker processes which receive the matrix once when they are started, with
+    the fork start method they share it read only with the main process. The fitted clusterer of the best amount is
+    returned, so it isn't fitted again. A clusterer without random state gets the one of the selection, so the
+    selection is reproducible.
+    """
+
+    def __init__(self, candidates, criterion='silhouette', sample_size=10000, n_jobs=1, random_state=42):
+        """
+        :param candidates: list with the candidate amounts of clusters
+        :param criterion: 'silhouette' for the highest silhouette score or 'elbow' for the elbow of the inertia
+        :param sample_size: the amount of documents for the silhouette score
+        :param n_jobs: the amount of worker processes
+        :param random_state: the seed for the sample of the silhouette score and for clusterers without random state
+        """
+        self.candidates = candidates
+        self.criterion = criterion
+        self.sample_size = sample_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def select(self, clusterer, term_document_matrix):
+        """
+        :param clusterer: the unfitted clusterer with a n_clusters parameter, it isn't changed
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: the fitted clusterer with the best amount of clusters and a dictionary with the scores of the
+                 candidates
+        """
+        candidates = [n_clusters for n_clusters in self.candidates if n_clusters <= term_document_matrix.shape[0]]
+        if len(candidates) == 0:
+            raise ValueError('All candidate amounts of clusters exceed the amount of documents')
+        clusterer = clone(clusterer)
+        if 'random_state' in clusterer.get_params() and clusterer.get_params()['random_state'] is None:
+            clusterer.set_params(random_state=self.random_state)
+        sample = None
+        if self.criterion == 'silhouette':
+            # the same sample is used for every candidate, so the scores are comparable
+            random_state = numpy.random.RandomState(self.random_state)
+            n_documents = term_document_matrix.shape[0]
+            sample = numpy.sort(random_state.choice(n_documents, min(self.sample_size, n_documents), replace=False))
+
+        if self.n_jobs > 1 and len(candidates) > 1:
+            with Pool(min(self.n_jobs, len(candidates)), initializer=_initialize_worker,
+                      initargs=(clusterer, term_document_matrix, sample)) as pool:
+                results = pool.map(_score, candidates, chunksize=1)
+        else:
+            _initialize_worker(clusterer, term_document_matrix, sample)
+            try:
+                results = [_score(n_clusters) for n_clusters in candidates]
+            finally:
+                _initialize_worker(None, None, None)
+
+        fitted_clusterers = {n_clusters: fitted_clusterer for n_clusters, fitted_clusterer, silhouette in results}
+        if self.criterion == 'silhouette':
+            scores = {n_clusters: silhouette for n_clusters, fitted_clusterer, silhouette in results}
+            best = max(scores, key=lambda n_clusters: (scores[n_clusters], -n_clusters))
+        else:
+            scores = {n_clusters: float(getattr(fitted_clusterer, 'inertia_', numpy.nan))
+                      for n_clusters, fitted_clusterer, silhouette in results}
+            best = _elbow(scores)
+        return fitted_clusterers[best], scores
+
+
+def _elbow(inertias):
+    """
+    Finds the elbow of the inertia curve, the candidate with the largest distance below the line between the first and
+    the last candidate after both axes are scaled to [0, 1].
+    :param inertias: dictionary with the inertia of every candidate amount of clusters
+    :return: the amount of clusters at the elbow
+    """
+    n_clusters = numpy.array(sorted(inertias), dtype=numpy.float64)
+    inertia = numpy.array([inertias[k] for k in sorted(inertias)], dtype=numpy.float64)
+    if len(n_clusters) < 3:
+        # an elbow needs a point between the first and the last candidate
+        return int(n_clusters[0])
+    x = (n_clusters - n_clusters[0]) / (n_clusters[-1] - n_clusters[0])
+    inertia_range = inertia.max() - inertia.min()
+    y = (inertia - inertia.min()) / inertia_range if inertia_range > 0 else numpy.zeros_like(inertia)
+    # the line from (0, y[0]) to (1, y[-1])
+    line = y[0] + (y[-1] - y[0]) * x
+    return int(n_clusters[numpy.argmax(line - y)])
+
+
+_worker_clusterer = None
+_worker_matrix = None
+_worker_sample = None
+
+
+def _initialize_worker(clusterer, term_document_matrix, sample):
+    """
+    Receives the clusterer, the matrix and the sample of the silhouette score once when a worker process is started.
+    :param clusterer: the unfitted clusterer
+    :param term_document_matrix: the term document matrix or the reduced matrix
+    :param sample: the indexes of the documents of the silhouette score, None for the elbow criterion
+    """
+    global _worker_clusterer, _worker_matrix, _worker_sample
+    _worker_clusterer = clusterer
+    _worker_matrix = term_document_matrix
+    _worker_sample = sample
+
+
+def _score(n_clusters):
+    """
+    Fits a copy of the clusterer with a candidate amount of clusters in a worker process.
+    The silhouette score uses the cosine distance for the spherical k-means, which clusters by cosine similarity.
+    :param n_clusters: the candidate amount of clusters
+    :return: tuple with the amount of clusters, the fitted clusterer and the silhouette score of the sample or None
+    """
+    clusterer = clone(_worker_clusterer).set_params(n_clusters=n_clusters)
+    labels = clusterer.fit_predict(_worker_matrix)
+    silhouette = None
+    if _worker_sample is not None:
+        sample_labels = labels[_worker_sample]
+        # the silhouette score needs at least two clusters and less clusters than documents in the sample
+        if 1 < len(numpy.unique(sample_labels)) < len(sample_labels):
+            metric = 'cosine' if isinstance(clusterer, SphericalKMeans) else 'euclidean'
+            silhouette = float(silhouette_score(_worker_matrix[_worker_sample], sample_labels, metric=metric))
+        else:
+            silhouette = -1.0
+    return n_clusters, clusterer, silhouette
@@ -0,0 +1,181 @@
+import numpy
+import scipy.sparse
+from sklearn.base import BaseEstimator, ClusterMixin
+from sklearn.preprocessing import normalize
+from sklearn.utils import check_random_state
+
+"""
+Marco Link
+"""
+
+class SphericalKMeans(ClusterMixin, BaseEstimator):
+    """
+    K-means with the cosine similarity for sparse text vectors like TF-IDF. The documents are normalized to unit length
+    and assigned to the center with the largest dot product, the centers are the normalized sums of their documents.
+    The assignment is one product of the sparse documents with the dense centers. With top_n only the largest weights of
+    every center are kept, which limits the centers to the characteristic terms of their clusters.
+    """
+
+    def __init__(self, n_clusters=8, init='k-means++', n_init=10, max_iter=300, tol=1e-4, top_n=None,
+                 random_state=None):
+        """
+        :param n_clusters: the amount of clusters
+        :param init: 'k-means++' or 'random', the method to choose the initial centers
+        :param n_init: the amount of runs with different initial centers, the run with the highest similarity is kept
+        :param max_iter: the maximum amount of iterations of a run
+        :param tol: a run stops if the sum of the similarities improves relatively less than tol
+        :param top_n: the amount of the largest weights which are kept in every center, all weights if None
+        :param random_state: the seed for the initialization
+        """
+        self.n_clusters = n_clusters
+        self.init = init
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.top_n = top_n
+        self.random_state = random_state
+
+    def fit(self, term_document_matrix, y=None):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :param y: ignored
+        :return: self
+        """
+        random_state = check_random_state(self.random_state)
+        documents = self._normalize(term_document_matrix)
+        best = None
+        for _ in range(self.n_init):
+            result = self._run(documents, random_state)
+            if best is None or result[2] > best[2]:
+                best = result
+        centers, labels, similarity, n_iter = best
+
+        self.cluster_centers_ = centers
+        self.labels_ = labels
+        # the inertia is the sum of the squared euclidean distances between the unit vectors
+        self.inertia_ = float(2 * (documents.shape[0] - similarity))
+        self.n_iter_ = n_iter
+        return self
+
+    def fit_predict(self, term_document_matrix, y=None):
+        return self.fit(term_document_matrix).labels_
+
+    def predict(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: the indexes of the most similar clusters of the documents
+        """
+        documents = self._normalize(term_document_matrix)
+        return self._assign(documents, self.cluster_centers_.astype(documents.dtype, copy=False))[0]
+
+    def _run(self, documents, random_state):
+        """
+        :param documents: the normalized documents
+        :param random_state: the random state
+        :return: the centers, the labels, the sum of the similarities and the amount of iterations of one run
+        """
+        centers = self._initial_centers(documents, random_state)
+        labels, similarities = self._assign(documents, centers)
+        similarity = similarities.sum(dtype=numpy.float64)
+        for n_iter in range(1, self.max_iter + 1):
+            centers = self._centers(documents, labels, similarities)
+            labels, similarities = self._assign(documents, centers)
+            previous_similarity = similarity
+            similarity = similarities.sum(dtype=numpy.float64)
+            if similarity - previous_similarity <= self.tol * abs(previous_similarity):
+                break
+        return centers, labels, similarity, n_iter
+
+    def _assign(self, documents, centers):
+        """
+        :param documents: the normalized documents
+        :param centers: the normalized dense centers
+        :return: the indexes of the most similar centers and the similarities to them
+        """
+        similarities = numpy.asarray(documents @ centers.T)
+        labels = similarities.argmax(axis=1).astype(numpy.int32)
+        return labels, similarities[numpy.arange(len(labels)), labels]
+
+    def _centers(self, documents, labels, similarities):
+        """
+        Computes the normalized sums of the documents of the clusters. An empty cluster gets the document which is the
+        least similar to its center.
+        :param documents: the normalized documents
+        :param labels: the indexes of the clusters of the documents
+        :param similarities: the similarities of the documents to their centers
+        :return: the normalized dense centers
+        """
+        labels = labels.copy()
+        empty_clusters = numpy.setdiff1d(numpy.arange(self.n_clusters), labels)
+        if len(empty_clusters) > 0:
+            labels[numpy.argsort(similarities)[:len(empty_clusters)]] = empty_clusters
+
+        membership = scipy.sparse.csr_matrix(
+            (numpy.ones(len(labels), dtype=documents.dtype), (labels, numpy.arange(len(labels)))),
+            shape=(self.n_clusters, len(labels)))
+        return self._prune(_dense(membership @ documents))
+
+    def _prune(self, centers):
+        """
+        :param centers: the dense centers
+        :return: the normalized centers with only the top_n largest weights in every row if top_n is set
+        """
+        if self.top_n is not None and self.top_n < centers.shape[1]:
+            smallest = numpy.argpartition(centers, centers.shape[1] - self.top_n, axis=1)
+            numpy.put_along_axis(centers, smallest[:, :centers.shape[1] - self.top_n], 0, axis=1)
+        return normalize(centers, copy=False)
+
+    def _initial_centers(self, documents, random_state):
+        """
+        Chooses the initial centers like k-means++ with the cosine distance: every center is the best of a few
+        documents which are sampled with probabilities proportional to their distance to the chosen centers.
+        :param documents: the normalized documents
+        :param random_state: the random state
+        :return: the normalized dense initial centers
+        """
+        n_documents = documents.shape[0]
+        if self.init != 'k-means++':
+            return self._prune(_dense(documents[random_state.choice(n_documents, self.n_clusters, replace=False)]))
+
+        n_local_trials = 2 + int(numpy.log(self.n_clusters))
+        indexes = [random_state.randint(n_documents)]
+        distances = self._distances(documents, [indexes[0]])[:, 0]
+        for _ in range(1, self.n_clusters):
+            cumulative_distances = numpy.cumsum(distances, dtype=numpy.float64)
+            candidates = numpy.searchsorted(cumulative_distances,
+                                            random_state.uniform(size=n_local_trials) * cumulative_distances[-1])
+            candidates = numpy.minimum(candidates, n_documents - 1)
+            candidate_distances = numpy.minimum(distances[:, numpy.newaxis], self._distances(documents, candidates))
+            best = candidate_distances.sum(axis=0).argmin()
+            distances = candidate_distances[:, best]
+            indexes.append(candidates[best])
+        return self._prune(_dense(documents[indexes]))
+
+    def _distances(self, documents, indexes):
+        """
+        :param documents: the normalized documents
+        :param indexes: the indexes of some documents
+        :return: the cosine distances of all documents to the indexed documents
+        """
+        return numpy.maximum(1 - numpy.asarray(documents @ _dense(documents[indexes]).T), 0)
+
+    def _normalize(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        :return: the documents normalized to unit length as csr matrix or numpy array in their dtype
+        """
+        if scipy.sparse.issparse(term_document_matrix):
+            term_document_matrix = term_document_matrix.tocsr()
+        elif term_document_matrix.dtype not in (numpy.float32, numpy.float64):
+            term_document_matrix = term_document_matrix.astype(numpy.float64)
+        return normalize(term_document_matrix)
+
+
+def _dense(matrix):
+    """
+    :param matrix: a sparse or dense matrix
+    :return: the matrix as dense numpy array
+    """
+    if scipy.sparse.issparse(matrix):
+        return matrix.toarray()
+    return numpy.asarray(matrix)
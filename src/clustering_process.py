@@ -1,5 +1,12 @@
+from contextlib import nullcontext
+import os
 from time import time
 import numpy
+import scipy.sparse
+
+from artifact import Artifact
+from fingerprint import fingerprint
+from preprocessing.token_corpus import TokenCorpus
 
 """
 Marco Link
@@ -20,62 +27,333 @@ class ClusteringProcess:
 
     preprocessing_pipeline = None
     vectorizer = None
+    # reduces the dimensions of the term document matrix before clustering if set
+    reducer = None
     clusterer = None
+    # if set, the amount of clusters of the clusterer is chosen from candidates before fitting
+    n_clusters_selection = None
 
     distance_metrics = None
 
+    # if set, the input is streamed in chunks of this size through the preprocessing pipeline
+    chunk_size = None
+
+    # if set, the fitted preprocessing pipeline, vectorizer, reducer and clusterer are saved in this folder
+    artifact_path = None
+    # whether the preprocessing pipeline, vectorizer, reducer and clusterer are loaded from the artifact and are only
+    # applied
+    transform_only = False
+    # in transform only mode the cluster stage key of the clustering process which saves the artifact before, None if
+    # the artifact was saved before the run
+    artifact_source = None
+
     def start(self):
         """
         Starts the clustering process.
         """
+        self.load_artifact()
+        self.create_categories()
+        if self.streams_vectorizing():
+            self.complete_dataset, term_document_matrix = self.read_preprocess_and_vectorize_chunks()
+        else:
+            if self.chunk_size is None:
+                self.complete_dataset, self.text_fields = self.read()
+                preprocessed_freeformed_texts = self.preprocess_text_fields(self.text_fields)
+            else:
+                self.complete_dataset, preprocessed_freeformed_texts = self.read_and_preprocess_chunks()
+            term_document_matrix = self.vectorize(preprocessed_freeformed_texts)
+        reduced_matrix = self.reduce(term_document_matrix)
+        self.cluster(reduced_matrix)
+        self.save_results(term_document_matrix, reduced_matrix)
+        self.save_artifact()
+
+    def streams_vectorizing(self):
+        """
+        :return: whether the chunks of the input are vectorized right after preprocessing, which needs a chunk size
+                 and a vectorizer which can be fitted chunk by chunk
+        """
+        return self.chunk_size is not None and not self.transform_only and \
+            hasattr(self.vectorizer, 'fit_transform_chunks')
+
+    def stage_keys(self):
+        """
+        Computes the keys of the stages of the clustering process. Stages of different clustering processes with equal
+        keys compute equal results.
+        :return: dictionary with the keys of the stages 'categories' (None without category creator), 'read',
+                 'preprocess', 'vectorize', 'reduce' (None without reducer, unless in transform only mode) and
+                 'cluster'
+        """
+        preprocessing_pipeline = self.preprocessing_pipeline
+        vectorizer = self.vectorizer
+        reducer = self.reducer
+        clusterer = self.clusterer
+        if self.transform_only:
+            # the components aren't loaded yet, they are identified by the artifact and the clustering process which
+            # saves it
+            artifact = (os.path.abspath(self.artifact_path), self.artifact_source)
+            preprocessing_pipeline = ('preprocess', artifact)
+            vectorizer = ('transform', artifact)
+            reducer = ('reduce', artifact)
+            clusterer = ('predict', artifact)
 
-        # create categories if specified
+        categories_key = None
+        if self.category_creator is not None:
+            categories_key = fingerprint('categories', self.category_creator)
+        if self.streams_vectorizing():
+            # the input is read, preprocessed and vectorized at once
+            read_key = fingerprint('read, preprocess and vectorize', categories_key, self.reader, self.chunk_size,
+                                   preprocessing_pipeline, vectorizer)
+            preprocess_key = read_key
+            vectorize_key = read_key
+        else:
+            if self.chunk_size is None:
+                read_key = fingerprint('read', categories_key, self.reader)
+                preprocess_key = fingerprint('preprocess', read_key, preprocessing_pipeline)
+            else:
+                # the input is read and preprocessed at once
+                read_key = fingerprint('read and preprocess', categories_key, self.reader, self.chunk_size,
+                                       preprocessing_pipeline)
+                preprocess_key = read_key
+            vectorize_key = fingerprint('vectorize', preprocess_key, vectorizer)
+        reduce_key = None
+        if self.reducer is not None or self.transform_only:
+            reduce_key = fingerprint('reduce', vectorize_key, reducer)
+        cluster_key = fingerprint('cluster', vectorize_key if reduce_key is None else reduce_key, clusterer,
+                                  None if self.transform_only else self.n_clusters_selection)
+        return {'categories': categories_key, 'read': read_key, 'preprocess': preprocess_key,
+                'vectorize': vectorize_key, 'reduce': reduce_key, 'cluster': cluster_key}
+
+    def load_artifact(self):
+        """Loads the fitted preprocessing pipeline, vectorizer, reducer and clusterer in transform only mode."""
+        if self.transform_only:
+            t0 = time()
+            artifact = Artifact.load(self.artifact_path)
+            self.preprocessing_pipeline = artifact.preprocessing_pipeline
+            self.vectorizer = artifact.vectorizer
+            self.reducer = artifact.reducer
+            self.clusterer = artifact.clusterer
+            print("Finished artifact loading in %fs" % (time() - t0))
+
+    def create_categories(self):
+        """Creates the categories if specified."""
         if self.category_creator is not None:
             t0 = time()
             self.category_creator.create_categories()
             print("Finished category creation in %fs" % (time() - t0))
 
-        # read the dataset
+    def read(self):
+        """
+        Reads the dataset.
+        :return: the complete dataset and the text fields
+        """
         t0 = time()
-        self.complete_dataset, self.text_fields = self.reader.read()
+        complete_dataset, text_fields = self.reader.read()
         print("Finished input reading in %fs" % (time() - t0))
+        return complete_dataset, text_fields
 
-        # transform the text fields with the preprocessing pipeline
-        preprocessed_freeformed_texts = self.text_fields
-        if self.preprocessing_pipeline is not None:
-            if not self.preprocessing_pipeline.is_empty():
-                t0 = time()
-                preprocessed_freeformed_texts = self.preprocessing_pipeline.transform(preprocessed_freeformed_texts)
-
-        # if the pipeline has a tokenizer, the tokens will be joined with tabspace character
-        # it is needed for the vectorizer for not destroying the created tokens
-        if self.preprocessing_pipeline.has_tokenizer():
-            joined_tokens_text_fields = []
-            for document in preprocessed_freeformed_texts:
-                joined_tokens = "\t".join(token for token in document)
-                joined_tokens_text_fields.append(joined_tokens)
-            preprocessed_freeformed_texts = numpy.array(joined_tokens_text_fields)
+    def preprocess_text_fields(self, text_fields):
+        """
+        Transforms the text fields with the preprocessing pipeline.
+        :param text_fields: the text fields to transform
+        :return: the preprocessed text fields
+        """
+        t0 = time()
+        preprocessed_freeformed_texts = self.preprocess(text_fields)
         print("Finished preprocessing pipeline in %fs" % (time() - t0))
+        return preprocessed_freeformed_texts
+
+    def read_and_preprocess_chunks(self):
+        """
+        Reads the dataset chunk by chunk and preprocesses every chunk right away,
+        so the raw text fields are never held in memory at once.
+        :return: the complete dataset and the preprocessed text fields
+        """
+        t0 = time()
+        complete_dataset_chunks = []
+        preprocessed_chunks = []
+        with self._preprocessing_workers():
+            for complete_dataset_chunk, text_fields_chunk in self.reader.read_chunks(self.chunk_size):
+                complete_dataset_chunks.append(complete_dataset_chunk)
+                preprocessed_chunks.append(self.preprocess(text_fields_chunk))
+        complete_dataset = self._create_complete_dataset(complete_dataset_chunks)
+
+        if len(preprocessed_chunks) > 0 and isinstance(preprocessed_chunks[0], TokenCorpus):
+            preprocessed_freeformed_texts = TokenCorpus.concatenate(preprocessed_chunks)
+        else:
+            preprocessed_freeformed_texts = []
+            for preprocessed_chunk in preprocessed_chunks:
+                preprocessed_freeformed_texts.extend(preprocessed_chunk)
+            preprocessed_freeformed_texts = numpy.array(preprocessed_freeformed_texts)
+        print("Finished input reading and preprocessing pipeline in %fs" % (time() - t0))
+        return complete_dataset, preprocessed_freeformed_texts
+
+    def read_preprocess_and_vectorize_chunks(self):
+        """
+        Reads the dataset chunk by chunk, preprocesses every chunk and vectorizes it right away,
+        so neither the raw nor the preprocessed text fields are held in memory at once.
+        :return: the complete dataset and the term document matrix
+        """
+        t0 = time()
+        complete_dataset_chunks = []
+
+        def preprocessed_chunks():
+            for complete_dataset_chunk, text_fields_chunk in self.reader.read_chunks(self.chunk_size):
+                complete_dataset_chunks.append(complete_dataset_chunk)
+                yield self.preprocess(text_fields_chunk)
+
+        with self._preprocessing_workers():
+            term_document_matrix = self.vectorizer.fit_transform_chunks(preprocessed_chunks())
+        complete_dataset = self._create_complete_dataset(complete_dataset_chunks)
+        print("Finished input reading, preprocessing pipeline and vectorizing in %fs" % (time() - t0))
+        return complete_dataset, term_document_matrix
 
-        # vectorizing the preprocessed text fields
+    def _preprocessing_workers(self):
+        """
+        :return: context manager which keeps the worker processes of the preprocessing pipeline running for all chunks
+        """
+        if self.preprocessing_pipeline is None:
+            return nullcontext()
+        return self.preprocessing_pipeline.worker_processes()
+
+    def _create_complete_dataset(self, complete_dataset_chunks):
+        """
+        :param complete_dataset_chunks: list with the chunks of the complete dataset
+        :return: the complete dataset of all chunks
+        """
+        if len(complete_dataset_chunks) > 0:
+            return self.reader.create_complete_dataset(numpy.concatenate(complete_dataset_chunks))
+        return self.reader.create_complete_dataset(numpy.array([]))
+
+    def vectorize(self, preprocessed_freeformed_texts):
+        """
+        Fits the vectorizer and vectorizes the preprocessed text fields, in transform only mode the fitted vectorizer
+        is only applied.
+        :param preprocessed_freeformed_texts: the preprocessed text fields
+        :return: the term document matrix
+        """
         t0 = time()
-        term_document_matrix = self.vectorizer.fit_transform(preprocessed_freeformed_texts)
+        if self.transform_only:
+            term_document_matrix = self.vectorizer.transform(preprocessed_freeformed_texts)
+        else:
+            term_document_matrix = self.vectorizer.fit_transform(preprocessed_freeformed_texts)
         print("Finished vectorizing in %fs" % (time() - t0))
+        return term_document_matrix
 
-        # clustering
+    def reduce(self, term_document_matrix):
+        """
+        Fits the reducer and reduces the dimensions of the term document matrix, in transform only mode the fitted
+        reducer is only applied.
+        :param term_document_matrix: the term document matrix
+        :return: the reduced matrix, the term document matrix itself without reducer
+        """
+        if self.reducer is None:
+            return term_document_matrix
+        t0 = time()
+        if self.transform_only:
+            reduced_matrix = self.reducer.transform(term_document_matrix)
+        else:
+            reduced_matrix = self.reducer.fit_transform(term_document_matrix)
+        print("Finished dimensionality reduction in %fs" % (time() - t0))
+        return reduced_matrix
+
+    def cluster(self, term_document_matrix):
+        """
+        Fits the clusterer, in transform only mode the documents are assigned to the clusters of the fitted clusterer.
+        If the amount of clusters is selected automatically, the clusterer fitted for the best amount is used.
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        """
+        if self.n_clusters_selection is not None and not self.transform_only:
+            self.select_n_clusters(term_document_matrix)
+            return
         t0 = time()
-        self.clusterer.fit(term_document_matrix)
+        if self.transform_only:
+            self.clusterer.labels_ = self.clusterer.predict(term_document_matrix)
+        else:
+            self.clusterer.fit(term_document_matrix)
         print("Finished clustering in %fs" % (time() - t0))
 
-        # saving the clustering results
+    def select_n_clusters(self, term_document_matrix):
+        """
+        Fits the clusterer for every candidate amount of clusters and keeps the fitted clusterer of the best amount.
+        :param term_document_matrix: the term document matrix or the reduced matrix
+        """
         t0 = time()
+        self.clusterer, scores = self.n_clusters_selection.select(self.clusterer, term_document_matrix)
+        n_clusters = self.clusterer.n_clusters
+        score_name = 'silhouette score' if self.n_clusters_selection.criterion == 'silhouette' else 'inertia'
+        for candidate, score in sorted(scores.items()):
+            print("n_clusters = %d: %s %f" % (candidate, score_name, score))
+        print("Finished selection and clustering with n_clusters = %d in %fs" % (n_clusters, time() - t0))
+
+    def save_results(self, term_document_matrix, reduced_matrix=None):
+        """
+        Saves the clustering results and creates the diagrams.
+        The distances and the diagrams are computed in the space of the clustering, the terms of the clusters are
+        taken from the term document matrix.
+        :param term_document_matrix: the term document matrix
+        :param reduced_matrix: the reduced matrix if the term document matrix was reduced before clustering
+        """
+        t0 = time()
+        cluster_term_weights = None
+        clustered_matrix = term_document_matrix
+        if reduced_matrix is not None and reduced_matrix is not term_document_matrix:
+            cluster_term_weights = self._cluster_term_weights(term_document_matrix)
+            clustered_matrix = reduced_matrix
+
         for writer in self.writers:
-            writer.save(term_document_matrix=term_document_matrix, vectorizer=self.vectorizer,
-                        clusterer=self.clusterer, complete_dataset=self.complete_dataset)
+            writer.save(term_document_matrix=clustered_matrix, vectorizer=self.vectorizer,
+                        clusterer=self.clusterer, complete_dataset=self.complete_dataset,
+                        cluster_term_weights=cluster_term_weights)
 
         # create the diagrams
         if self.viusalizers is not None:
             if len(self.viusalizers) > 0:
                 for visualization in self.viusalizers:
-                    visualization.save(self.clusterer, term_document_matrix)
+                    visualization.save(self.clusterer, clustered_matrix)
         print("Finished results saving in %fs" % (time() - t0))
+
+    def _cluster_term_weights(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix
+        :return: dense matrix with the mean term weights of the documents of every cluster, the cluster centers in
+                 the space of the terms
+        """
+        labels = self.clusterer.labels_
+        n_clusters = self.clusterer.n_clusters
+        membership = scipy.sparse.csr_matrix(
+            (numpy.ones(len(labels), dtype=term_document_matrix.dtype), (labels, numpy.arange(len(labels)))),
+            shape=(n_clusters, len(labels)))
+        sums = (membership @ term_document_matrix).toarray()
+        sizes = numpy.maximum(numpy.bincount(labels, minlength=n_clusters), 1)
+        return sums / sizes[:, numpy.newaxis].astype(sums.dtype)
+
+    def save_artifact(self):
+        """Saves the fitted preprocessing pipeline, vectorizer, reducer and clusterer if an artifact path is set."""
+        if self.artifact_path is not None and not self.transform_only:
+            t0 = time()
+            Artifact(self.preprocessing_pipeline, self.vectorizer, self.clusterer,
+                     self.reducer).save(self.artifact_path)
+            print("Finished artifact saving in %fs" % (time() - t0))
+
+    def preprocess(self, text_fields):
+        """
+        Transforms text fields with the preprocessing pipeline.
+        :param text_fields: the text fields to transform
+        :return: the preprocessed text fields
+        """
+        preprocessed_freeformed_texts = text_fields
+        if self.preprocessing_pipeline is not None:
+            if not self.preprocessing_pipeline.is_empty():
+                preprocessed_freeformed_texts = self.preprocessing_pipeline.transform(preprocessed_freeformed_texts)
+
+            # if the pipeline has a tokenizer, the tokens will be joined with tabspace character
+            # it is needed for the vectorizer for not destroying the created tokens
+            # a token corpus is passed to the vectorizer as it is
+            if self.preprocessing_pipeline.has_tokenizer() and \
+                    not isinstance(preprocessed_freeformed_texts, TokenCorpus):
+                joined_tokens_text_fields = []
+                for document in preprocessed_freeformed_texts:
+                    joined_tokens = "\t".join(token for token in document)
+                    joined_tokens_text_fields.append(joined_tokens)
+                preprocessed_freeformed_texts = numpy.array(joined_tokens_text_fields)
+        return preprocessed_freeformed_texts
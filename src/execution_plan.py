@@ -0,0 +1,174 @@
+import os
+from time import time
+import traceback
+
+"""
+Marco Link
+"""
+
+class ExecutionPlan:
+    """
+    Executes multiple clustering processes and computes stages which are equal for multiple clustering processes only
+    once. The stages category creation, reading, preprocessing, vectorizing, dimensionality reduction and clustering
+    form a chain for every clustering process, the keys of the stages identify equal stages of different clustering
+    processes. The result of a stage is kept until the last clustering process which uses it is finished.
+    Clustering processes in transform only mode are executed after the ones which fit their components, so they load
+    the artifacts saved in the same run.
+    """
+
+    def __init__(self):
+        self._clustering_processes = []
+        # the clustering processes in the order of execution with their stage keys, None until they are planned
+        self._planned_processes = None
+        # the results of the stages by their keys and how many clustering processes still use them
+        self._results = {}
+        self._uses = {}
+
+    def add(self, name, clustering_process):
+        """
+        Adds a clustering process to the plan.
+        :param name: the name of the clustering process
+        :param clustering_process: the clustering process
+        """
+        self._clustering_processes.append((name, clustering_process))
+        self._planned_processes = None
+
+    def shared_stages(self):
+        """:return: the amount of stages which are used by more than one clustering process"""
+        self._plan()
+        return sum(1 for uses in self._uses.values() if uses > 1)
+
+    def _plan(self):
+        """
+        Orders the clustering processes, the ones in transform only mode after the ones which fit their components,
+        and computes their stage keys. The stages of a clustering process in transform only mode are identified by its
+        artifact and the clustering process which saves the artifact before.
+        """
+        if self._planned_processes is not None:
+            return
+        fitting_processes = [(name, clustering_process) for name, clustering_process in self._clustering_processes
+                             if not clustering_process.transform_only]
+        transform_only_processes = [(name, clustering_process)
+                                    for name, clustering_process in self._clustering_processes
+                                    if clustering_process.transform_only]
+        # the cluster stage keys of the clustering processes which save the artifacts, the last one saves it last
+        artifact_sources = {}
+        for name, clustering_process in fitting_processes:
+            if clustering_process.artifact_path is not None:
+                artifact_sources[os.path.abspath(clustering_process.artifact_path)] = \
+                    clustering_process.stage_keys()['cluster']
+
+        self._planned_processes = []
+        self._uses = {}
+        for name, clustering_process in fitting_processes + transform_only_processes:
+            if clustering_process.transform_only:
+                clustering_process.artifact_source = artifact_sources.get(
+                    os.path.abspath(clustering_process.artifact_path))
+            stage_keys = clustering_process.stage_keys()
+            for key in set(stage_keys.values()):
+                if key is not None:
+                    self._uses[key] = self._uses.get(key, 0) + 1
+            self._planned_processes.append((name, clustering_process, stage_keys))
+
+    def execute(self):
+        """Executes the clustering processes in the order they were added, the ones in transform only mode last."""
+        self._plan()
+        for name, clustering_process, stage_keys in self._planned_processes:
+            try:
+                t0 = time()
+                print("Start clustering process: " + str(name))
+                self._execute_clustering_process(clustering_process, stage_keys)
+                print("Finished clustering process in %fs" % (time() - t0))
+                print('_________________________________________')
+            except Exception as exception:
+                # http://stackoverflow.com/questions/3702675/how-to-print-the-full-traceback-without-halting-the-program
+                traceback.print_tb(exception.__traceback__)
+                print("Failed clustering process: " + str(name))
+                print('_________________________________________')
+            finally:
+                self._release(stage_keys)
+
+    def _execute_clustering_process(self, clustering_process, stage_keys):
+        """
+        Executes a clustering process with the results of the stages computed before.
+        :param clustering_process: the clustering process
+        :param stage_keys: the keys of the stages of the clustering process
+        """
+        clustering_process.load_artifact()
+        if stage_keys['categories'] is not None:
+            self._result(stage_keys['categories'], 'category creation', clustering_process.create_categories)
+
+        if clustering_process.streams_vectorizing():
+            # the input is read, preprocessed and vectorized at once
+            def read_preprocess_and_vectorize():
+                complete_dataset, term_document_matrix = clustering_process.read_preprocess_and_vectorize_chunks()
+                return complete_dataset, clustering_process.vectorizer, term_document_matrix
+
+            clustering_process.complete_dataset, clustering_process.vectorizer, term_document_matrix = self._result(
+                stage_keys['read'], 'input reading, preprocessing and vectorizing', read_preprocess_and_vectorize)
+        else:
+            if clustering_process.chunk_size is None:
+                clustering_process.complete_dataset, clustering_process.text_fields = self._result(
+                    stage_keys['read'], 'input reading', clustering_process.read)
+
+                def preprocess():
+                    return self._result(
+                        stage_keys['preprocess'], 'preprocessing',
+                        lambda: clustering_process.preprocess_text_fields(clustering_process.text_fields))
+            else:
+                # the input is read and preprocessed at once
+                clustering_process.complete_dataset, preprocessed_freeformed_texts = self._result(
+                    stage_keys['read'], 'input reading and preprocessing',
+                    clustering_process.read_and_preprocess_chunks)
+
+                def preprocess():
+                    return preprocessed_freeformed_texts
+
+            def vectorize():
+                return clustering_process.vectorizer, clustering_process.vectorize(preprocess())
+
+            # the fitted vectorizer and clusterer are shared, the clustering processes only read from them
+            clustering_process.vectorizer, term_document_matrix = self._result(stage_keys['vectorize'], 'vectorizing',
+                                                                               vectorize)
+
+        def reduce():
+            return clustering_process.reducer, clustering_process.reduce(term_document_matrix)
+
+        clustering_process.reducer, reduced_matrix = self._result(stage_keys['reduce'], 'dimensionality reduction',
+                                                                  reduce)
+
+        def cluster():
+            clustering_process.cluster(reduced_matrix)
+            return clustering_process.clusterer
+
+        clustering_process.clusterer = self._result(stage_keys['cluster'], 'clustering', cluster)
+        clustering_process.save_results(term_document_matrix, reduced_matrix)
+        clustering_process.save_artifact()
+
+    def _result(self, key, stage_name, compute):
+        """
+        :param key: the key of the stage
+        :param stage_name: the name of the stage for the output
+        :param compute: function which computes the result of the stage
+        :return: the result of the stage, computed only if it wasn't computed for another clustering process before
+        """
+        if key in self._results:
+            print("Reusing the result of the " + stage_name)
+            return self._results[key]
+        result = compute()
+        if self._uses.get(key, 0) > 1:
+            self._results[key] = result
+        return result
+
+    def _release(self, stage_keys):
+        """
+        Releases the results of the stages which aren't used by any further clustering process.
+        :param stage_keys: the keys of the stages of the finished clustering process
+        """
+        for key in set(stage_keys.values()):
+            if key is None:
+                continue
+            self._uses[key] -= 1
+            if self._uses[key] == 0:
+                del self._uses[key]
+                self._results.pop(key, None)
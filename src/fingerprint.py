@@ -0,0 +1,110 @@
+import hashlib
+import re
+
+import numpy
+
+"""
+Marco Link
+"""
+
+def fingerprint(*values):
+    """
+    Computes a fingerprint which is equal for equal values, also in different runs of the prototype.
+    Objects are fingerprinted with their class and their state. An object can define a method fingerprint_state() which
+    returns the values to fingerprint instead of its whole state, for example if its state is derived from a file.
+    :param values: the values to fingerprint
+    :return: the fingerprint as hexadecimal string
+    """
+    hasher = hashlib.sha256()
+    for value in values:
+        _update(hasher, value, set())
+    return hasher.hexdigest()
+
+
+def fingerprint_documents(documents):
+    """
+    Computes the fingerprint of the content of documents.
+    :param documents: iterable of documents, strings or collections of tokens
+    :return: the fingerprint as hexadecimal string
+    """
+    hasher = hashlib.sha256()
+    for document in documents:
+        if not isinstance(document, str):
+            document = '\t'.join(str(token) for token in document) + '\x00tokens'
+        encoded_document = document.encode('utf-8', 'surrogatepass')
+        # the length separates the documents unambiguously
+        hasher.update(str(len(encoded_document)).encode('ascii') + b':')
+        hasher.update(encoded_document)
+    return hasher.hexdigest()
+
+
+def _fingerprint(value, seen):
+    """
+    :param value: the value
+    :param seen: the ids of the objects which are currently fingerprinted
+    :return: the fingerprint of the value as hexadecimal string
+    """
+    hasher = hashlib.sha256()
+    _update(hasher, value, seen)
+    return hasher.hexdigest()
+
+
+def _update(hasher, value, seen):
+    """
+    Updates the hasher with a canonical representation of the value.
+    :param hasher: the hashlib hasher
+    :param value: the value
+    :param seen: the ids of the objects which are currently fingerprinted, to stop at reference cycles
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        hasher.update((type(value).__name__ + ':' + repr(value) + ';').encode('utf-8', 'surrogatepass'))
+        return
+
+    if id(value) in seen:
+        hasher.update(b'cycle;')
+        return
+    seen.add(id(value))
+
+    if isinstance(value, (list, tuple)):
+        hasher.update((type(value).__name__ + '[').encode('utf-8'))
+        for element in value:
+            _update(hasher, element, seen)
+        hasher.update(b']')
+    elif isinstance(value, dict):
+        # the items are sorted by their own fingerprints, the order of insertion doesn't matter
+        hasher.update(b'dict{')
+        for item in sorted(_fingerprint(key, seen) + _fingerprint(element, seen) for key, element in value.items()):
+            hasher.update(item.encode('ascii'))
+        hasher.update(b'}')
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(b'set{')
+        for element in sorted(_fingerprint(element, seen) for element in value):
+            hasher.update(element.encode('ascii'))
+        hasher.update(b'}')
+    elif isinstance(value, numpy.ndarray):
+        hasher.update(('ndarray:' + str(value.dtype) + ':' + str(value.shape) + ';').encode('utf-8'))
+        if value.dtype == object:
+            _update(hasher, value.tolist(), seen)
+        else:
+            hasher.update(numpy.ascontiguousarray(value).tobytes())
+    elif isinstance(value, numpy.generic):
+        _update(hasher, value.item(), seen)
+    elif isinstance(value, type(re.compile(''))):
+        _update(hasher, ('pattern', value.pattern, value.flags), seen)
+    elif hasattr(value, '__qualname__') and hasattr(value, '__module__'):
+        # functions and classes
+        _update(hasher, ('qualname', value.__module__, value.__qualname__), seen)
+    elif hasattr(value, 'func') and hasattr(value, 'args') and hasattr(value, 'keywords'):
+        # functools.partial
+        _update(hasher, ('partial', value.func, value.args, value.keywords), seen)
+    else:
+        hasher.update((type(value).__module__ + '.' + type(value).__qualname__ + '(').encode('utf-8'))
+        if hasattr(value, 'fingerprint_state'):
+            _update(hasher, value.fingerprint_state(), seen)
+        elif hasattr(value, '__dict__'):
+            _update(hasher, vars(value), seen)
+        else:
+            hasher.update(repr(value).encode('utf-8', 'surrogatepass'))
+        hasher.update(b')')
+
+    seen.discard(id(value))
@@ -0,0 +1,168 @@
+import numpy
+import pyarrow.compute
+import pyarrow.dataset
+import pyarrow.fs
+
+from .reader import Reader
+from .row_store import ColumnarRowStore
+
+"""
+Marco Link
+"""
+
+class ColumnarReader(Reader):
+    """
+    A reader for columnar Parquet or Arrow/Feather files.
+    The files are memory mapped, the category filter is pushed down into the file scan and only the needed columns
+    are read. The freeform text fields are joined inside of Arrow without creating python strings for every column.
+    https://arrow.apache.org/docs/python/dataset.html
+    """
+
+    def __init__(self, path, category_column, categories, text_field_columns, file_format='parquet',
+                 primary_key_column=None, read_complete_dataset=True, batch_size=65536,
+                 lazy_complete_dataset=False, category_creator=None):
+        """
+        :param path: the path to the input file
+        :param category_column: the name of the column which contains the categories
+        :param categories: the actual categories
+        :param text_field_columns: the names of the columns which contains the freeform texts
+        :param file_format: the format of the file, 'parquet' or 'feather', default 'parquet'
+        :param primary_key_column: the name of the column which contains the primary key, default None
+        :param read_complete_dataset: whether all columns of an entry should be read, default True
+        :param batch_size: the maximum amount of entries scanned at once if the file is read completely
+        :param lazy_complete_dataset: whether only the primary keys of the entries should be kept, default False
+        :param category_creator: derives the categories from the entries instead of the category column, default None
+        """
+        super().__init__(path, category_column, categories, text_field_columns, primary_key_column,
+                         read_complete_dataset, lazy_complete_dataset, category_creator)
+        self._file_format = file_format
+        self._batch_size = batch_size
+
+    def read(self):
+        """
+        Reads in the columnar file.
+        :return: Numpy array with the complete dataset and a numpy array with only the freeform text fields.
+        """
+        complete_dataset = []
+        text_fields = []
+        for complete_dataset_chunk, text_fields_chunk in self.read_chunks(self._batch_size):
+            complete_dataset.append(complete_dataset_chunk)
+            text_fields.append(text_fields_chunk)
+        if len(text_fields) == 0:
+            return self.create_complete_dataset(numpy.array([])), numpy.array([])
+        return self.create_complete_dataset(numpy.concatenate(complete_dataset)), numpy.concatenate(text_fields)
+
+    def read_chunks(self, chunk_size):
+        """
+        Streams the record batches of the columnar file.
+        :param chunk_size: the maximum amount of entries per chunk
+        :return: generator of tuples with a numpy array of the entries and a numpy array of their freeform text fields
+        """
+        dataset = self._dataset()
+        text_field_columns = self._text_field_column_list()
+        if self._category_creator is not None:
+            # a virtual category column is derived from the whole rows, so neither the columns nor the entries can be
+            # filtered while scanning the file
+            for batch in dataset.to_batches(batch_size=chunk_size):
+                chunk = self._virtual_category_chunk(batch, text_field_columns)
+                if len(chunk[1]) > 0:
+                    yield chunk
+            return
+
+        entry_columns = self._entry_columns(dataset.schema.names)
+        columns = list(text_field_columns)
+        columns.extend(column for column in entry_columns if column not in columns)
+
+        for batch in dataset.to_batches(columns=columns, filter=self._filter(), batch_size=chunk_size):
+            if batch.num_rows == 0:
+                continue
+            yield self._entries(batch, entry_columns), self._text_fields(batch, text_field_columns)
+
+    def _virtual_category_chunk(self, batch, text_field_columns):
+        """
+        Derives the categories of the entries of a record batch and keeps the entries of the specified categories.
+        :param batch: the record batch with all columns
+        :param text_field_columns: the names of the freeform text columns
+        :return: tuple with a numpy array of the entries and a numpy array of their freeform text fields
+        """
+        categories = self._category_set()
+        complete_entries = [list(row) for row in zip(*(column.to_pylist() for column in batch.columns))]
+        entry_names = batch.schema.names
+        derived_categories = [self._category_creator.derive_category(row, entry_names) for row in complete_entries]
+        mask = numpy.array([categories is None or category in categories for category in derived_categories],
+                           dtype=bool)
+        text_fields = self._text_fields(batch, text_field_columns)[mask]
+
+        if self._lazy_complete_dataset:
+            return self._entries(batch, None)[mask], text_fields
+
+        # the first entry column is the category column which is replaced with the derived category
+        column_names = batch.schema.names
+        projected_cols = [column_names.index(column) for column in self._entry_columns(column_names)[1:]]
+        entries = []
+        for row, category, keep in zip(complete_entries, derived_categories, mask):
+            if not keep:
+                continue
+            if self._read_complete_dataset:
+                row.append(category)
+                entries.append(row)
+            else:
+                entries.append([category] + [row[i] for i in projected_cols])
+        return numpy.array(entries, dtype=object), text_fields
+
+    def _dataset(self):
+        """:return: the memory mapped pyarrow dataset of the file"""
+        return pyarrow.dataset.dataset(self._path, format=self._file_format,
+                                       filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True))
+
+    def _row_store(self, references):
+        return ColumnarRowStore(references, self._dataset(), self._primary_key_column, self._category_creator)
+
+    def _entry_columns(self, column_names):
+        """
+        :param column_names: all column names of the file
+        :return: the names of the columns which are kept from every entry
+        """
+        if self._lazy_complete_dataset:
+            return [self._primary_key_column]
+        if self._read_complete_dataset:
+            return list(column_names)
+        entry_columns = [self._category_column]
+        entry_columns.extend(column for column in self._text_field_column_list() if column not in entry_columns)
+        if self._primary_key_column in column_names and self._primary_key_column not in entry_columns:
+            entry_columns.append(self._primary_key_column)
+        return entry_columns
+
+    def _filter(self):
+        """:return: the filter expression for the specified categories or None if all entries should be read"""
+        categories = self._category_set()
+        if categories is None:
+            return None
+        return pyarrow.dataset.field(self._category_column).isin(list(categories))
+
+    def _text_fields(self, batch, text_field_columns):
+        """
+        Joins the freeform text columns of a record batch, missing texts are treated as empty strings.
+        :param batch: the record batch
+        :param text_field_columns: the names of the freeform text columns
+        :return: numpy array with the joined freeform text fields
+        """
+        texts = [pyarrow.compute.fill_null(pyarrow.compute.cast(batch.column(batch.schema.get_field_index(column)),
+                                                                pyarrow.string()), '')
+                 for column in text_field_columns]
+        if len(texts) > 1:
+            joined_texts = pyarrow.compute.binary_join_element_wise(*texts, ' ')
+        else:
+            joined_texts = texts[0]
+        return joined_texts.to_numpy(zero_copy_only=False)
+
+    def _entries(self, batch, entry_columns):
+        """
+        :param batch: the record batch
+        :param entry_columns: the names of the columns which are kept from every entry
+        :return: numpy array with one row per entry or with the primary keys if the complete dataset is read lazily
+        """
+        if self._lazy_complete_dataset:
+            return batch.column(batch.schema.get_field_index(self._primary_key_column)).to_numpy(zero_copy_only=False)
+        return numpy.column_stack([batch.column(batch.schema.get_field_index(column)).to_numpy(zero_copy_only=False)
+                                   for column in entry_columns])
@@ -1,16 +1,15 @@
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.cluster import KMeans
+import os
 
 from configobj import ConfigObj, flatten_errors
+import numpy
 from validate import Validator
 
-from input.database_reader import MSAccessDatabaseReader
-from input.reader import CSVReader
-from output.writer import ClusterInformationWriter, ClusterCSVWriter
-from output.category_creation import NHTSADatabaseCategoryCreation
-from preprocessing import *
 from clustering_process import ClusteringProcess
-from output.visualization import ClusterPlot, SilhouettePlot
+from preprocessing.cache import PreprocessingCache
+from preprocessing.preprocessing_pipeline import PreprocessingPipeline
+from registry import PREPROCESSING_STEPS, READERS, CATEGORY_CREATORS, WRITERS, VISUALIZERS, VECTORIZERS, \
+    REDUCERS, CLUSTERERS
+from vectorizing.analyzer import split_tabs
 
 """
 Marco Link
@@ -36,21 +35,40 @@ class ConfigReader:
         validation_result = config.validate(validator, preserve_errors=True)
         self.print_errors(config, validation_result)
 
-        preprocessing_pipeline, tokenizer_added = self.handle_preprocessing(config['PREPROCESSING'])
         category_creator, reader = self.handle_input(config['INPUT'])
         writers, visualizations = self.handle_output(config['OUTPUT'])
-        vectorizer = self.handle_vectorizing(config['VECTORIZING'], tokenizer_added)
-        clusterer = self.handle_clustering(config['CLUSTERING'])
+        artifact_path = self.handle_artifact(config['OUTPUT'])
+        transform_only = config['CLUSTERING']['mode'] == 'transform-only'
+        preprocessing_pipeline = None
+        vectorizer = None
+        reducer = None
+        clusterer = None
+        n_clusters_selection = None
+        # in transform only mode the fitted preprocessing pipeline, vectorizer, reducer and clusterer are loaded from
+        # the artifact when the clustering process starts, an earlier clustering process can still save it
+        if not transform_only:
+            preprocessing_pipeline, tokenizer_added = self.handle_preprocessing(config['PREPROCESSING'])
+            vectorizer = self.handle_vectorizing(config['VECTORIZING'], tokenizer_added)
+            reducer = self.handle_reduction(config['REDUCTION'])
+            clusterer = self.handle_clustering(config['CLUSTERING'])
+            n_clusters_selection = self.handle_n_clusters_selection(config['CLUSTERING'])
+            if not config['OUTPUT']['save_artifact']:
+                artifact_path = None
 
         # creates the clustering process
         clustering_process = ClusteringProcess()
-        ClusteringProcess.clusterer = clusterer
-        ClusteringProcess.preprocessing_pipeline = preprocessing_pipeline
+        clustering_process.clusterer = clusterer
+        clustering_process.preprocessing_pipeline = preprocessing_pipeline
         clustering_process.vectorizer = vectorizer
+        clustering_process.reducer = reducer
+        clustering_process.n_clusters_selection = n_clusters_selection
         clustering_process.reader = reader
         clustering_process.category_creator = category_creator
         clustering_process.writers = writers
         clustering_process.viusalizers = visualizations
+        clustering_process.chunk_size = config['INPUT']['chunk_size']
+        clustering_process.artifact_path = artifact_path
+        clustering_process.transform_only = transform_only
 
         return clustering_process
 
@@ -82,90 +100,106 @@ class ConfigReader:
         # whether a tokenizer was added to the pipeline
         tokenizer_added = False
 
-        pipeline = preprocessing_pipeline.PreprocessingPipeline()
+        preprocessing_cache = None
+        if preprocessing_dict['cache_path'] is not None:
+            preprocessing_cache = PreprocessingCache(preprocessing_dict['cache_path'],
+                                                     preprocessing_dict['cache_size_limit'])
+
+        pipeline = PreprocessingPipeline(
+            n_jobs=preprocessing_dict['n_jobs'], chunk_size=preprocessing_dict['chunk_size'],
+            fused=preprocessing_dict['fused'], vocabulary_execution=preprocessing_dict['vocabulary_execution'],
+            fuse_regex=preprocessing_dict['fuse_regex'], cache=preprocessing_cache,
+            token_corpus=preprocessing_dict['token_corpus'])
 
         # iterates over all preprocessing steps in the preprocessing entry in the config file and all sub steps
         # the order remains preserved
-        for entry in preprocessing_dict:
+        for entry in preprocessing_dict.sections:
             preprocessingStep = preprocessing_dict[entry]
             for entry in preprocessingStep:
                 # tokenizer
                 if entry == 'tokenizer':
                     preprocessing_tokenizer = preprocessingStep[entry]
                     if preprocessing_tokenizer is not None:
-                        if preprocessing_tokenizer == 'PTBTokenizer':
-                            pipeline.add_preprocessig_step(tokenizer.PennTreebankWordTokenizer())
-                            tokenizer_added = True
-                        elif preprocessing_tokenizer == 'WhitespaceTokenizer':
-                            pipeline.add_preprocessig_step(tokenizer.Whitespace_Tokenizer())
+                        if preprocessing_tokenizer in PREPROCESSING_STEPS:
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(preprocessing_tokenizer))
                             tokenizer_added = True
 
                 # lowercase
                 elif entry == 'lowercase':
                     has_lowercase = preprocessingStep[entry]
                     if has_lowercase:
-                        pipeline.add_preprocessig_step(preprocess.ToLowercase())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 # textacy
                 elif entry == 'remove_punctuation':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.RemovePunct())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'unpack_contractions':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.UnpackContractions())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'normalize_whitespace':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.NormalizeWhitespace())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_urls':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.ReplaceUrls())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_emails':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.ReplaceEMails())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_phone_numbers':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.ReplacePhoneNumbers())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_numbers':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.ReplaceNumbers())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_currency_symbols':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.ReplaceCurrencySymbols())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'remove_accents':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.RemoveAccents())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 elif entry == 'fix_bad_unicode':
                     if preprocessingStep[entry]:
-                        pipeline.add_preprocessig_step(preprocessing_with_textacy.FixBadUnicode())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
                 # ----------------
 
-                # spelling correction
+                # spelling correction, with a spelling dictionary the symmetric delete correction replaces TextBlob, so
+                # only one spelling correction is added
                 elif entry == 'correct_english_spelling_errors':
                     is_spelling_correction = preprocessingStep[entry]
                     if is_spelling_correction:
-                        pipeline.add_preprocessig_step(spelling_correction.CorrectEnglishSpelling())
+                        spelling_dictionary = preprocessingStep['spelling_dictionary']
+                        if spelling_dictionary is not None:
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(
+                                'spelling_dictionary', spelling_dictionary, preprocessingStep['max_edit_distance']))
+                        else:
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
+
+                elif entry == 'spelling_dictionary':
+                    spelling_dictionary = preprocessingStep[entry]
+                    if spelling_dictionary is not None and not preprocessingStep['correct_english_spelling_errors']:
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(
+                            entry, spelling_dictionary, preprocessingStep['max_edit_distance']))
 
                 elif entry == 'stemmer':
                     stem = preprocessingStep[entry]
-                    if stem == 'PorterStemmer':
-                        pipeline.add_preprocessig_step(stemmer.PorterStemmer())
-                    elif stem == 'GermanStemmer':
-                        pipeline.add_preprocessig_step(stemmer.GermanStemmer())
+                    if stem in PREPROCESSING_STEPS:
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(stem))
 
                 # englisch stopwords
                 elif entry == 'remove_english_stopwords':
                     english_stopwords = preprocessingStep[entry]
                     if english_stopwords:
-                        pipeline.add_preprocessig_step(remove_stopwords.EnglishStopwords())
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry))
 
                 # custom stopwords
                 elif entry == 'CUSTOMSTOPWORDS':
@@ -173,31 +207,34 @@ class ConfigReader:
                     for stop in custom_stopwords:
                         path = custom_stopwords[stop]
                         if path is not None:
-                            pipeline.add_preprocessig_step(remove_stopwords.CustomStopwords(path))
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry, path))
 
                 # synonyms
                 elif entry == 'SYNONYMS':
                     for path in preprocessingStep[entry]:
                         synonyms_path = preprocessingStep[entry][path]
                         if synonyms_path is not None:
-                            pipeline.add_preprocessig_step(synonyms.SimpleSynonyms(synonyms_path))
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry, synonyms_path))
 
                 # collocations
                 elif entry == 'COLLOCATIONS':
                     for path in preprocessingStep[entry]:
                         collocation_path = preprocessingStep[entry][path]
                         if collocation_path is not None:
-                            pipeline.add_preprocessig_step(tokenizer.MultiWordTokenizer(collocation_path))
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry, collocation_path))
 
-                # ngram synonyms
+                # ngram synonyms, all rules are applied with one pass over the documents
                 elif entry == 'CONTEXT-SYNONYMS':
+                    rules = []
                     for context_synonym in preprocessingStep[entry]:
                         context_synonym = preprocessingStep[entry][context_synonym]
-                        pipeline.add_preprocessig_step(synonyms.ContextSynonyms(context_synonym['main_words'],
-                                                                                context_synonym['context_words'],
-                                                                                context_synonym['before'],
-                                                                                context_synonym['after'],
-                                                                                context_synonym['substitution']))
+                        if (context_synonym['main_words'] is not None) and \
+                                (context_synonym['context_words'] is not None):
+                            rules.append((context_synonym['main_words'], context_synonym['context_words'],
+                                          context_synonym['before'], context_synonym['after'],
+                                          context_synonym['substitution']))
+                    if len(rules) > 0:
+                        pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry, rules))
 
                 # regex subs
                 elif entry == 'REGEX-SUBSTITUTIONS':
@@ -206,8 +243,8 @@ class ConfigReader:
                         if (regex['regex_pattern'] is not None) and (regex['substitution'] is not None):
                             regex_pattern = regex['regex_pattern'].replace('\\\\', '\\')
                             substitution = regex['substitution'].replace('\\\\', '\\')
-                            pipeline.add_preprocessig_step(regex_substitution.RegexSubstitution(regex_pattern,
-                                                                                                substitution))
+                            pipeline.add_preprocessig_step(PREPROCESSING_STEPS.create(entry, regex_pattern,
+                                                                                      substitution))
 
         pipeline._has_tokenizer = tokenizer_added
         return pipeline, tokenizer_added
@@ -217,6 +254,8 @@ class ConfigReader:
         Creates the category creator and the input reader on the basis of the config file
         :param input_dict: the input entry of the config file
         :return: the category creator if specified and the created input reader.
+        :raises ValueError: if the lazy complete dataset is used without the column with the primary key for an input
+                            other than CSV
         """
         category_creator = None
         reader = None
@@ -225,22 +264,52 @@ class ConfigReader:
         category_field = input_dict['CATEGORY']['column_with_category']
         categories = input_dict['CATEGORY']['categories_to_choose']
         text_fields = input_dict['CATEGORY']['columns_with_text_fields']
+        primary_key = input_dict['CATEGORY']['column_with_primary_key']
+        read_complete_dataset = input_dict['read_complete_dataset']
+        lazy_complete_dataset = input_dict['lazy_complete_dataset']
+        if lazy_complete_dataset and input_type != 'CSV' and not primary_key:
+            # only the csv reader references its entries by byte offsets, the other readers by their primary keys
+            raise ValueError('lazy_complete_dataset = True needs column_with_primary_key for ' + input_type + ' input')
+
+        # the categories are either written into the database before reading
+        # or derived as virtual column while reading
+        virtual_category_creator = None
+        create_categories = input_dict['CATEGORY']['create_categories']
+        if create_categories in CATEGORY_CREATORS:
+            nhtsa_category_creator = CATEGORY_CREATORS.create(create_categories, input_path, input_dict['table_name'],
+                                                              input_dict['username'], input_dict['password'],
+                                                              input_dict['CATEGORY']['column_with_primary_key'])
+            if input_dict['CATEGORY']['virtual_categories']:
+                virtual_category_creator = nhtsa_category_creator
+            elif input_type == 'MSACCESS':
+                category_creator = nhtsa_category_creator
 
         if input_type == 'CSV':
             # remove escaping because of parsing with ConfigObj
             # http://stackoverflow.com/questions/5186839/python-replace-with
             delimiter = bytes(input_dict['delimiter'], 'utf-8').decode("unicode_escape")
-            reader = CSVReader(input_path, category_field, categories, text_fields, input_dict['encoding'],
-                               delimiter, input_dict['has_header'])
+            reader = READERS.create(input_type, input_path, category_field, categories, text_fields,
+                                    input_dict['encoding'], delimiter, input_dict['has_header'], primary_key,
+                                    read_complete_dataset, input_dict['n_jobs'], lazy_complete_dataset,
+                                    virtual_category_creator)
 
         elif input_type == 'MSACCESS':
-            reader = MSAccessDatabaseReader(input_path, category_field, categories, text_fields,
-                                            input_dict['table_name'], input_dict['username'], input_dict['password'])
-
-            if input_dict['CATEGORY']['create_categories'] == 'NHTSA':
-                category_creator = NHTSADatabaseCategoryCreation(input_path, input_dict['table_name'],
-                                                                 input_dict['username'], input_dict['password'],
-                                                                 input_dict['CATEGORY']['column_with_primary_key'])
+            reader = READERS.create(input_type, input_path, category_field, categories, text_fields,
+                                    input_dict['table_name'], input_dict['username'], input_dict['password'],
+                                    primary_key, read_complete_dataset, input_dict['batch_size'],
+                                    lazy_complete_dataset, virtual_category_creator)
+
+        elif input_type in ('PARQUET', 'FEATHER'):
+            # pyarrow is an optional dependency, the registry imports it only for columnar files
+            reader = READERS.create(input_type, input_path, category_field, categories, text_fields,
+                                    input_type.lower(), primary_key, read_complete_dataset,
+                                    lazy_complete_dataset=lazy_complete_dataset,
+                                    category_creator=virtual_category_creator)
+
+        elif input_type == 'SQLITE':
+            reader = READERS.create(input_type, input_path, category_field, categories, text_fields,
+                                    input_dict['table_name'], primary_key, read_complete_dataset,
+                                    input_dict['batch_size'], lazy_complete_dataset, virtual_category_creator)
 
         return category_creator, reader
 
@@ -255,14 +324,28 @@ class ConfigReader:
             path = self._path_out
         visualizations = []
         output_writers = []
-        if output_dict['save_plot']:
-            visualizations.append(ClusterPlot(path))
-        if output_dict['save_silhouette_score_plot']:
-            visualizations.append(SilhouettePlot(path))
-        output_writers.append(ClusterCSVWriter(path))
-        output_writers.append(ClusterInformationWriter(path))
+        # matplotlib is only imported if a diagram is saved
+        for entry in ('save_plot', 'save_silhouette_score_plot'):
+            if output_dict[entry]:
+                visualizations.append(VISUALIZERS.create(entry, path))
+        output_writers.append(WRITERS.create('csv', path))
+        output_writers.append(WRITERS.create('information', path))
         return output_writers, visualizations
 
+    def handle_artifact(self, output_dict):
+        """
+        :param output_dict: the output entry of the config file
+        :return: the path to the folder of the artifact with the fitted preprocessing pipeline, vectorizer and
+                 clusterer, the folder 'artifact' in the output path by default
+        """
+        path = output_dict['artifact_path']
+        if path is None:
+            path = output_dict['output_path']
+            if path is None:
+                path = self._path_out
+            path = os.path.join(path, 'artifact')
+        return path
+
     def handle_vectorizing(self, vectorizing_dict, tokenizer_added=False):
         """
         Creates the vectorizer on the basis of the config file
@@ -273,8 +356,7 @@ class ConfigReader:
         # In case of a tokenizer was added to the preprocessing pipeline, the default behaviour of using
         # whitespaces to split a document into tokens has to be changed.
         if tokenizer_added:
-            # https://github.com/scikit-learn/scikit-learn/issues/5482
-            analyzer = lambda x: x.split('\t')
+            analyzer = split_tabs
         else:
             analyzer = 'word'
 
@@ -296,31 +378,96 @@ class ConfigReader:
         use_idf = vectorizing_dict['use_idf']
         smooth_idf = vectorizing_dict['smooth_idf']
         sublinear_tf = vectorizing_dict['sublinear_tf']
+        # float32 halves the memory of the term document matrix and of the cluster centers fitted on it
+        dtype = getattr(numpy, vectorizing_dict['dtype'])
 
         if vectorizing_dict['vectorizer'] == 'CountVectorizer':
-            print(analyzer)
-            vectorizer = CountVectorizer(lowercase=False, max_df=max_df, min_df=min_df,
-                                         max_features=max_features, binary=binary, analyzer=analyzer)
+            vectorizer = VECTORIZERS.create('CountVectorizer', lowercase=False, max_df=max_df, min_df=min_df,
+                                            max_features=max_features, binary=binary, analyzer=analyzer,
+                                            dtype=dtype)
         elif vectorizing_dict['vectorizer'] == 'TF-IDF':
-            vectorizer = TfidfVectorizer(lowercase=False, max_df=max_df, min_df=min_df, max_features=max_features,
-                                         binary=binary, use_idf=use_idf, smooth_idf=smooth_idf,
-                                         sublinear_tf=sublinear_tf, analyzer=analyzer)
+            vectorizer = VECTORIZERS.create('TF-IDF', lowercase=False, max_df=max_df, min_df=min_df,
+                                            max_features=max_features, binary=binary, use_idf=use_idf,
+                                            smooth_idf=smooth_idf, sublinear_tf=sublinear_tf, analyzer=analyzer,
+                                            dtype=dtype)
+        elif vectorizing_dict['vectorizer'] == 'Hashing':
+            # there is no vocabulary, so min_df, max_df and max_features aren't used
+            vectorizer = VECTORIZERS.create('Hashing', n_features=vectorizing_dict['n_features'],
+                                            chunk_size=vectorizing_dict['chunk_size'], binary=binary,
+                                            use_idf=use_idf, smooth_idf=smooth_idf, sublinear_tf=sublinear_tf,
+                                            analyzer=analyzer, dtype=dtype)
+
+        if vectorizing_dict['vectorizer'] in ('CountVectorizer', 'TF-IDF'):
+            # the tokens of documents which aren't a token corpus are counted by multiple processes
+            vectorizer.n_jobs = vectorizing_dict['n_jobs']
 
         return vectorizer
 
+    def handle_reduction(self, reduction_dict):
+        """
+        Creates the dimensionality reduction on the basis of the config file
+        :param reduction_dict: the reduction entry of the config file
+        :return: the dimensionality reduction, None if the term document matrix isn't reduced
+        """
+        method = reduction_dict['method']
+        if method is None:
+            return None
+
+        n_components = reduction_dict['n_components']
+        if method in ('lsa', 'random_projection'):
+            # a fixed random state, so equal configs reduce equally
+            reducer = REDUCERS.create(method, n_components=n_components, random_state=42)
+        else:
+            reducer = REDUCERS.create(method, n_components=n_components)
+
+        # scikit-learn is only imported if the term document matrix is reduced
+        from reduction.reducer import Reduction
+        return Reduction(reducer, reduction_dict['normalize'])
+
     def handle_clustering(self, clustering_dict):
         """
         Creates the clusterer on the basis of the config file
         :param clustering_dict: the clustering entry of the config file
         :return: Returns the clusterer.
         """
+        from clustering.n_clusters_selection import parse_n_clusters
         clusterer = None
-        n_clusters = clustering_dict['n_clusters']
+        n_clusters, candidates = parse_n_clusters(','.join(clustering_dict['n_clusters']))
+        if n_clusters is None:
+            # the clusterer is created with the smallest candidate, the best amount of clusters is set before fitting
+            n_clusters = candidates[0]
         max_iter = clustering_dict['max_iter']
         init = clustering_dict['init']
         n_init = clustering_dict['n_init']
 
         if clustering_dict['algorithm'] == 'kmeans':
-            clusterer = KMeans(n_clusters=n_clusters, n_init=n_init, max_iter=max_iter, init=init)
+            clusterer = CLUSTERERS.create('kmeans', n_clusters=n_clusters, n_init=n_init, max_iter=max_iter,
+                                          init=init)
+        elif clustering_dict['algorithm'] == 'minibatch_kmeans':
+            # the term document matrix is streamed in chunks through partial_fit
+            clusterer = CLUSTERERS.create('minibatch_kmeans', n_clusters=n_clusters, n_init=n_init, max_iter=max_iter,
+                                          init=init, batch_size=clustering_dict['batch_size'],
+                                          chunk_size=clustering_dict['chunk_size'],
+                                          reassignment_ratio=clustering_dict['reassignment_ratio'],
+                                          max_no_improvement=clustering_dict['max_no_improvement'],
+                                          tol=clustering_dict['tol'])
+        elif clustering_dict['algorithm'] == 'spherical_kmeans':
+            # the cosine similarity of the normalized documents, top_n keeps only the largest weights of the centers
+            clusterer = CLUSTERERS.create('spherical_kmeans', n_clusters=n_clusters, n_init=n_init, max_iter=max_iter,
+                                          init=init, tol=clustering_dict['tol'], top_n=clustering_dict['top_n'])
 
         return clusterer
+
+    def handle_n_clusters_selection(self, clustering_dict):
+        """
+        Creates the selection of the amount of clusters on the basis of the config file.
+        :param clustering_dict: the clustering entry of the config file
+        :return: the selection of the amount of clusters if n_clusters is 'auto(min, max, step)', otherwise None
+        """
+        from clustering.n_clusters_selection import NClustersSelection, parse_n_clusters
+        n_clusters, candidates = parse_n_clusters(','.join(clustering_dict['n_clusters']))
+        if candidates is None:
+            return None
+        return NClustersSelection(candidates, criterion=clustering_dict['n_clusters_criterion'],
+                                  sample_size=clustering_dict['silhouette_sample_size'],
+                                  n_jobs=clustering_dict['n_jobs'])
@@ -1,34 +1,47 @@
-import pyodbc
-import numpy
+import abc
+import sqlite3
 
 from .reader import Reader
+from .row_store import DatabaseRowStore
 
 """
 Marco Link
 """
 
-class MSAccessDatabaseReader(Reader):
-    """Class for reading database in MSAccess .mdb or .accdb format"""
+class DatabaseReader(Reader):
+    """
+    Base class for reading a table from databases which implement the python DB-API 2.0 with the qmark parameter
+    style.
+    The freeform text fields and the entries are fetched with one query and streamed in batches.
+    """
 
-    def __init__(self, path, category_column, categories, text_field_columns, table_name, username='admin',
-                 password=''):
+    def __init__(self, path, category_column, categories, text_field_columns, table_name, primary_key_column=None,
+                 read_complete_dataset=True, batch_size=1000, lazy_complete_dataset=False, category_creator=None):
         """
-        :param path: the path to the input file
+        :param path: the path to the database
         :param category_column: the column which contains the categories
         :param categories: the actual categories
         :param text_field_columns: the column which contains the freeform texts
         :param table_name: the table name to look for
-        :param username: the username for the database default admin
-        :param password: the password for the database default ''
+        :param primary_key_column: the column which contains the primary key, default None
+        :param read_complete_dataset: whether all columns of an entry should be read, default True
+        :param batch_size: the amount of entries fetched from the database at once, default 1000
+        :param lazy_complete_dataset: whether only the primary keys of the entries should be kept, default False
+        :param category_creator: derives the categories from the entries instead of the category column, default None
         """
-        super().__init__(path, category_column, categories, text_field_columns)
+        super().__init__(path, category_column, categories, text_field_columns, primary_key_column,
+                         read_complete_dataset, lazy_complete_dataset, category_creator)
         self._table_name = table_name
-        self._username = username
-        self._password = password
+        self._batch_size = batch_size
+
+    @abc.abstractmethod
+    def connect(self):
+        """:return: a new DB-API connection to the database"""
+        pass
 
     def read(self):
         """
-        Reads in the ms access database.
+        Reads in the database table.
         :return: Numpy array with the complete dataset and a numpy array with only the freeform text fields.
         """
         if self._text_fields_columns is None:
@@ -37,66 +50,193 @@ class MSAccessDatabaseReader(Reader):
         if self._table_name is None:
             return None
 
+        return self._collect(self._iter_entries())
+
+    def read_chunks(self, chunk_size):
+        """
+        Streams the database table, only one chunk of matching entries is held in memory at once.
+        :param chunk_size: the maximum amount of entries per chunk
+        :return: generator of tuples with a numpy array of the entries and a numpy array of their freeform text fields
+        """
+        return self._chunks(self._iter_entries(), chunk_size)
+
+    def _select_statement(self):
+        """
+        Creates the SQL statement which returns the freeform text fields followed by the entry in every row.
+        :return: the SQL statement and its parameters
+        """
+        text_field_columns = self._text_field_column_list()
+
+        # the entry is either the primary key, the whole row or only the projected columns
+        # a virtual category column is derived from the whole row
+        if self._category_creator is not None:
+            entry_columns = [self._table_name + '.*']
+        elif self._lazy_complete_dataset:
+            entry_columns = [self._primary_key_column]
+        elif self._read_complete_dataset:
+            entry_columns = [self._table_name + '.*']
+        else:
+            entry_columns = [self._category_column]
+            entry_columns.extend(column for column in text_field_columns if column not in entry_columns)
+            if self._primary_key_column is not None and self._primary_key_column not in entry_columns:
+                entry_columns.append(self._primary_key_column)
+
+        statement = 'SELECT ' + ', '.join(text_field_columns + entry_columns) + ' FROM ' + self._table_name
+
+        # only getting the entries from the database according to the specified categories
+        # virtual categories can't be filtered by the database
+        # an empty list of categories doesn't filter, 'IN ()' isn't valid sql
+        parameters = []
+        categories = self._category_set()
+        if categories is not None and self._category_creator is None:
+            statement += ' WHERE ' + self._category_column + ' IN (' + ', '.join('?' for _ in categories) + ')'
+            parameters.extend(sorted(categories))
+
+        return statement, parameters
+
+    def _iter_entries(self):
+        """
+        Iterates over the entries of the database table which match the specified categories.
+        :return: generator of tuples with the entry and its joined freeform text fields
+        """
+        statement, parameters = self._select_statement()
+        amount_text_fields = len(self._text_field_column_list())
+        if self._category_creator is not None:
+            yield from self._iter_virtual_category_entries(statement, parameters, amount_text_fields)
+            return
+
+        for row in self._iter_rows(statement, parameters):
+            freeform_text = self._join_text_fields(row[:amount_text_fields])
+            if self._lazy_complete_dataset:
+                yield row[amount_text_fields], freeform_text
+            else:
+                yield list(row[amount_text_fields:]), freeform_text
+
+    def _iter_virtual_category_entries(self, statement, parameters, amount_text_fields):
+        """
+        Iterates over the entries of the database table and derives their categories while reading.
+        :param statement: the SQL statement which returns the freeform text fields followed by the whole row
+        :param parameters: the parameters of the SQL statement
+        :param amount_text_fields: the amount of freeform text fields in front of the whole row
+        :return: generator of tuples with the entry and its joined freeform text fields
+        """
+        categories = self._category_set()
+        column_names = []
+        entry_names = None
+        for row in self._iter_rows(statement, parameters, column_names):
+            if entry_names is None:
+                # the column names are known after the statement was executed
+                entry_names = column_names[amount_text_fields:]
+                projected_cols = self._projected_columns(entry_names)
+
+            complete_entry = list(row[amount_text_fields:])
+            category = self._category_creator.derive_category(complete_entry, entry_names)
+            if categories is not None and category not in categories:
+                continue
+
+            freeform_text = self._join_text_fields(row[:amount_text_fields])
+            if self._lazy_complete_dataset:
+                yield complete_entry[entry_names.index(self._primary_key_column)], freeform_text
+            elif self._read_complete_dataset:
+                complete_entry.append(category)
+                yield complete_entry, freeform_text
+            else:
+                yield [category] + [complete_entry[i] for i in projected_cols], freeform_text
+
+    def _projected_columns(self, column_names):
+        """
+        :param column_names: the column names of the whole row
+        :return: the indexes of the freeform text and primary key columns which are kept besides the category
+        """
+        projected_names = [column for column in self._text_field_column_list() if column != self._category_column]
+        if self._primary_key_column in column_names:
+            projected_names.append(self._primary_key_column)
+        projected_cols = []
+        for column in projected_names:
+            if column_names.index(column) not in projected_cols:
+                projected_cols.append(column_names.index(column))
+        return projected_cols
+
+    def _iter_rows(self, statement, parameters, column_names=None):
+        """
+        Executes a SQL statement and streams its result in batches.
+        :param statement: the SQL statement
+        :param parameters: the parameters of the SQL statement
+        :param column_names: if given, the list is filled with the column names of the result
+        :return: generator over the rows of the result
+        """
+        conn = self.connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement, parameters)
+            if column_names is not None:
+                column_names.extend(description[0] for description in cursor.description)
+            rows = cursor.fetchmany(self._batch_size)
+            while len(rows) > 0:
+                yield from rows
+                rows = cursor.fetchmany(self._batch_size)
+        finally:
+            # close database connection
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _join_text_fields(documents):
+        """
+        :param documents: the freeform text fields of an entry
+        :return: the joined freeform text fields, missing texts are treated as empty strings
+        """
+        text_fields = []
+        for document in documents:
+            if isinstance(document, str):
+                text_fields.append(document)
+            else:
+                text_fields.append("")
+        return " ".join(text_fields)
+
+    def _row_store(self, references):
+        return DatabaseRowStore(references, self, self._table_name, self._primary_key_column, self._category_creator)
+
+
+class MSAccessDatabaseReader(DatabaseReader):
+    """Class for reading database in MSAccess .mdb or .accdb format"""
+
+    def __init__(self, path, category_column, categories, text_field_columns, table_name, username='admin',
+                 password='', primary_key_column=None, read_complete_dataset=True, batch_size=1000,
+                 lazy_complete_dataset=False, category_creator=None):
+        """
+        :param path: the path to the input file
+        :param category_column: the column which contains the categories
+        :param categories: the actual categories
+        :param text_field_columns: the column which contains the freeform texts
+        :param table_name: the table name to look for
+        :param username: the username for the database default admin
+        :param password: the password for the database default ''
+        :param primary_key_column: the column which contains the primary key, default None
+        :param read_complete_dataset: whether all columns of an entry should be read, default True
+        :param batch_size: the amount of entries fetched from the database at once, default 1000
+        :param lazy_complete_dataset: whether only the primary keys of the entries should be kept, default False
+        :param category_creator: derives the categories from the entries instead of the category column, default None
+        """
+        super().__init__(path, category_column, categories, text_field_columns, table_name, primary_key_column,
+                         read_complete_dataset, batch_size, lazy_complete_dataset, category_creator)
+        self._username = username
+        self._password = password
+
+    def connect(self):
+        # imported here, so the other database readers can be used without an installed ODBC driver
+        import pyodbc
+
         # Connection string for the database
         # http://stackoverflow.com/questions/1047580/ms-access-library-for-python
         odbc_conn_str = 'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=%s;UID=%s;PWD=%s' % \
                         (self._path, self._username, self._password)
+        return pyodbc.connect(odbc_conn_str)
 
-        # Establish connection to the database
-        conn = pyodbc.connect(odbc_conn_str)
-
-        # cursor which handles the sql statements
-        cursor = conn.cursor()
 
-        # whether more than one textfield was specified - crate a part of the SQL statement for getting the textfields
-        if isinstance(self._text_fields_columns, list):
-            text_fields_only = ', '.join(value for value in self._text_fields_columns)
-        else:
-            text_fields_only = self._text_fields_columns
-
-        # Create the SQL statements for reading the database
-        # One for the whole dataset and one for getting only the specified textfields
-        only_text_fields_statement = "select " + text_fields_only + " from " + self._table_name
-        complete_dataset_statement = "select * from " + self._table_name
-
-        # nly getting the entries from the database according to the specified categories
-        # whether there are multiple categories specified
-        if isinstance(self._categories, list):
-            only_text_fields_statement += " WHERE " + self._category_column + " IN (" \
-                                          + ','.join("'" + category + "'" for category in self._categories) + ")"
-            complete_dataset_statement += " WHERE " + self._category_column + " IN (" \
-                                          + ','.join("'" + category + "'" for category in self._categories) + ")"
-        # or only one category specified
-        elif isinstance(self._categories, str):
-            only_text_fields_statement += " WHERE " + self._category_column + " = '" + self._categories + "'"
-            complete_dataset_statement += " WHERE " + self._category_column + " = '" + self._categories + "'"
-
-        complete_dataset = []
-        text_fields = []
+class SQLiteDatabaseReader(DatabaseReader):
+    """Class for reading a table from a SQLite database."""
 
-        # fetch all text fields
-        cursor.execute(only_text_fields_statement)
-        row = cursor.fetchone()
-        while row is not None:
-            documents = []
-            for document in row:
-                if isinstance(document, str):
-                    documents.append(document)
-                else:
-                    documents.append("")
-            text_fields.append(" ".join(documents))
-
-            row = cursor.fetchone()
-
-        # fetch complete dataset
-        cursor.execute(complete_dataset_statement)
-        row = cursor.fetchone()
-        while row is not None:
-            complete_dataset.append(row)
-            row = cursor.fetchone()
-
-        # close database connection
-        cursor.close()
-        conn.close()
-
-        return numpy.array(complete_dataset), numpy.array(text_fields)
+    def connect(self):
+        # https://docs.python.org/3/library/sqlite3.html
+        return sqlite3.connect(self._path)
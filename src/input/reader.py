@@ -1,8 +1,15 @@
 import abc
 from abc import ABCMeta
 import csv
+from functools import partial
+import io
+from multiprocessing import Pool
+from operator import itemgetter
+import os
 import numpy
 
+from .row_store import CSVRowStore
+
 """
 Marco Link
 """
@@ -10,28 +17,130 @@ Marco Link
 class Reader(metaclass=ABCMeta):
     """Base Class for all reader objects."""
 
-    def __init__(self, path, category_column, categories, text_field_columns):
+    def __init__(self, path, category_column, categories, text_field_columns, primary_key_column=None,
+                 read_complete_dataset=True, lazy_complete_dataset=False, category_creator=None):
         """
         :param path: the path to the input file
         :param category_column: the column which contains the categories
         :param categories: the actual categories
         :param text_field_columns: the column which contains the freeform texts
+        :param primary_key_column: the column which contains the primary key, default None
+        :param read_complete_dataset: whether all columns of an entry should be read, if False only the category,
+        the freeform text and the primary key columns will be read, default True
+        :param lazy_complete_dataset: whether only references to the entries should be read and the complete dataset
+        is a row store which fetches the entries on demand, default False
+        :param category_creator: if given, the categories are derived with it from the complete entries while reading
+        instead of being read from the category column, the derived category is appended to every entry as virtual
+        column, default None
         """
         self._path = path
         self._category_column = category_column
         self._categories = categories
         self._text_fields_columns = text_field_columns
+        self._primary_key_column = primary_key_column
+        self._read_complete_dataset = read_complete_dataset
+        self._lazy_complete_dataset = lazy_complete_dataset
+        self._category_creator = category_creator
 
     @abc.abstractmethod
     def read(self):
         """Reads the specified file."""
         pass
 
+    def read_chunks(self, chunk_size):
+        """
+        Reads the specified file in chunks.
+        Readers which are able to stream their input should override it, by default the whole file will be read
+        and split afterwards.
+        :param chunk_size: the maximum amount of entries per chunk
+        :return: generator of tuples with a numpy array of the entries and a numpy array of their freeform text fields,
+        the entries are references if the complete dataset is read lazily
+        """
+        complete_dataset, text_fields = self.read()
+        for start in range(0, len(text_fields), chunk_size):
+            yield complete_dataset[start:start + chunk_size], text_fields[start:start + chunk_size]
+
+    def create_complete_dataset(self, entries):
+        """
+        :param entries: numpy array with all read entries
+        :return: the complete dataset, the entries themselves or a row store which fetches them on demand
+        """
+        if self._lazy_complete_dataset:
+            return self._row_store(entries)
+        return entries
+
+    def _row_store(self, references):
+        """
+        :param references: numpy array with the references of all read entries
+        :return: the row store for the references
+        """
+        raise NotImplementedError(self.__class__.__name__ + ' does not support a lazy complete dataset')
+
+    def _collect(self, entries):
+        """
+        Collects all entries.
+        :param entries: iterable of tuples with an entry and its joined freeform text fields
+        :return: the complete dataset and a numpy array with only the freeform text fields.
+        """
+        complete_dataset = []
+        freeform_text_fields = []
+        for row, freeform_text in entries:
+            complete_dataset.append(row)
+            freeform_text_fields.append(freeform_text)
+        return self.create_complete_dataset(numpy.array(complete_dataset)), numpy.array(freeform_text_fields)
+
+    @staticmethod
+    def _chunks(entries, chunk_size):
+        """
+        Groups entries into chunks.
+        :param entries: iterable of tuples with an entry and its joined freeform text fields
+        :param chunk_size: the maximum amount of entries per chunk
+        :return: generator of tuples with a numpy array of the entries and a numpy array of their freeform text fields
+        """
+        complete_dataset = []
+        freeform_text_fields = []
+        for row, freeform_text in entries:
+            complete_dataset.append(row)
+            freeform_text_fields.append(freeform_text)
+            if len(freeform_text_fields) == chunk_size:
+                yield numpy.array(complete_dataset), numpy.array(freeform_text_fields)
+                complete_dataset = []
+                freeform_text_fields = []
+        if len(freeform_text_fields) > 0:
+            yield numpy.array(complete_dataset), numpy.array(freeform_text_fields)
+
+    def _category_set(self):
+        """
+        :return: the specified categories as set for fast membership tests or None if no category was specified, an
+                 empty list of categories is the same as no category
+        """
+        if self._categories is None:
+            return None
+        if isinstance(self._categories, str):
+            return {self._categories}
+        return set(self._categories) or None
+
+    def _text_field_column_list(self):
+        """:return: the freeform text columns as list"""
+        if isinstance(self._text_fields_columns, list):
+            return self._text_fields_columns
+        return [self._text_fields_columns]
+
 
 class CSVReader(Reader):
-    """A reader which can handle csv files."""
+    """
+    A reader which can handle csv files.
+    With more than one job the file is split into byte ranges which are read in parallel processes. This requires
+    that every entry is stored in one line and that the encoding never uses the newline byte inside of a character
+    (true for utf-8 and single byte encodings).
+    """
+
+    # the file is split into this many byte ranges per job, so the work is balanced between the processes
+    _ranges_per_job = 4
+
     def __init__(self, path, category_column, categories, text_field_columns, encoding='utf-8', delimiter='\t',
-                 has_header=False):
+                 has_header=False, primary_key_column=None, read_complete_dataset=True, n_jobs=1,
+                 lazy_complete_dataset=False, category_creator=None):
         """
         :param path: the path to the input file
         :param category_column: the index of the column which contains the categories starting at 0
@@ -40,32 +149,202 @@ class CSVReader(Reader):
         :param encoding: the encoding from the csv file, default 'utf-8'
         :param delimiter: the delimiter of the csv file default tab character '\t'
         :param has_header: whether the csv file has a header with column names, default False
+        :param primary_key_column: the index of the column which contains the primary key starting at 0, default None
+        :param read_complete_dataset: whether all columns of an entry should be read, default True
+        :param n_jobs: the amount of processes reading the file, default 1
+        :param lazy_complete_dataset: whether only the byte offsets of the entries should be kept, default False
+        :param category_creator: derives the categories from the entries instead of the category column, default None
         """
-        super().__init__(path, category_column, categories, text_field_columns)
+        super().__init__(path, category_column, categories, text_field_columns, primary_key_column,
+                         read_complete_dataset, lazy_complete_dataset, category_creator)
         self._encoding = encoding
         self._delimiter = delimiter
         self._has_header = has_header
+        self._n_jobs = n_jobs
 
     def read(self):
         """
         Reads in the csv file.
         :return: Numpy array with the complete dataset and a numpy array with only the freeform text fields.
         """
-        complete_dataset = []
-        freeform_text_fields = []
-        with open(self._path, encoding=self._encoding) as csv_file:
-            j = 0
-            csv_reader = csv.reader(csv_file, delimiter=self._delimiter)
-            included_cols = [int(int(column)) for column in self._text_fields_columns]
-            for row in csv_reader:
+        return self._collect(self._iter_entries())
+
+    def read_chunks(self, chunk_size):
+        """
+        Streams the csv file, only one chunk of matching entries is held in memory at once.
+        :param chunk_size: the maximum amount of entries per chunk
+        :return: generator of tuples with a numpy array of the entries and a numpy array of their freeform text fields
+        """
+        return self._chunks(self._iter_entries(), chunk_size)
+
+    def _iter_entries(self):
+        """
+        Iterates over the entries of the csv file which match the specified categories.
+        :return: generator of tuples with the entry, only its projected columns if the complete dataset isn't needed,
+        and its joined freeform text fields
+        """
+        categories = self._category_set()
+        included_cols = [int(column) for column in self._text_field_column_list()]
+        if self._category_creator is None:
+            category_column = int(self._category_column)
+            category_of = itemgetter(category_column)
+        else:
+            # virtual category column
+            category_column = None
+            category_of = partial(self._category_creator.derive_category, column_names=self._header())
+        projected_cols = self._projected_columns(category_column, included_cols)
+        filter_arguments = (category_of, categories, included_cols, projected_cols, self._category_creator is not None)
+
+        if self._n_jobs > 1:
+            tasks = [(self._path, start, end, self._encoding, self._delimiter, filter_arguments,
+                      self._lazy_complete_dataset)
+                     for start, end in self._byte_ranges(self._n_jobs * self._ranges_per_job)]
+            # imap returns the results of the byte ranges in the original order
+            with Pool(self._n_jobs) as pool:
+                for entries in pool.imap(_read_byte_range, tasks):
+                    yield from entries
+            return
+
+        if self._lazy_complete_dataset:
+            # the file is read binary for knowing the byte offsets of the entries
+            with open(self._path, 'rb') as csv_file:
+                positions = [0]
+                lines = _decoded_lines(csv_file, self._encoding, positions)
                 # if a header is specified - just ignore it
                 if self._has_header:
-                    if j == 0:
-                        j += 1
-                        continue
-                # check whether the category from the entry matches with the specified categories
-                if row[int(self._category_column)] in self._categories:
-                    complete_dataset.append(row)
-                    freeform_text_fields.append(" ".join(row[i] for i in included_cols))
-                j += 1
-        return numpy.array(complete_dataset), numpy.array(freeform_text_fields)
+                    next(csv.reader(lines, delimiter=self._delimiter), None)
+                yield from _filter_entries(lines, self._delimiter, *filter_arguments, positions=positions)
+            return
+
+        with open(self._path, encoding=self._encoding) as csv_file:
+            # if a header is specified - just ignore it
+            if self._has_header:
+                next(csv.reader(csv_file, delimiter=self._delimiter), None)
+            yield from _filter_entries(csv_file, self._delimiter, *filter_arguments)
+
+    def _row_store(self, references):
+        return CSVRowStore(references, self._path, self._encoding, self._delimiter, self._category_creator,
+                           self._header())
+
+    def _header(self):
+        """
+        :return: list with the column names of the header, None if the csv file has no header
+        """
+        if not self._has_header:
+            return None
+        with open(self._path, encoding=self._encoding) as csv_file:
+            return next(csv.reader(csv_file, delimiter=self._delimiter), None)
+
+    def _byte_ranges(self, amount):
+        """
+        Splits the csv file into byte ranges of nearly the same size, every range starts at the beginning of a line.
+        :param amount: the amount of byte ranges
+        :return: list of tuples with the start and the end offset of the byte ranges, the header is excluded
+        """
+        size = os.path.getsize(self._path)
+        with open(self._path, 'rb') as csv_file:
+            start = 0
+            if self._has_header:
+                csv_file.readline()
+                start = csv_file.tell()
+            boundaries = [start]
+            for i in range(1, amount):
+                offset = start + (size - start) * i // amount
+                if offset <= boundaries[-1]:
+                    continue
+                # move to the beginning of the next line, stay if the offset already is one
+                csv_file.seek(offset - 1)
+                csv_file.readline()
+                boundaries.append(csv_file.tell())
+            boundaries.append(size)
+        return [(begin, end) for begin, end in zip(boundaries, boundaries[1:]) if end > begin]
+
+    def _projected_columns(self, category_column, text_field_columns):
+        """
+        :param category_column: the index of the category column or None for a virtual category column
+        :param text_field_columns: the indexes of the freeform text columns
+        :return: the indexes of the columns to keep from every entry besides the category or None if the complete
+        entry should be kept
+        """
+        if self._read_complete_dataset:
+            return None
+        projected_cols = []
+        for column in text_field_columns:
+            if column != category_column and column not in projected_cols:
+                projected_cols.append(column)
+        # the primary key can only be projected if it is given as column index
+        try:
+            primary_key_column = int(self._primary_key_column)
+            if primary_key_column != category_column and primary_key_column not in projected_cols:
+                projected_cols.append(primary_key_column)
+        except (TypeError, ValueError):
+            pass
+        return projected_cols
+
+
+def _decoded_lines(csv_file, encoding, positions):
+    """
+    Decodes the lines of a binary file and keeps track of the read bytes.
+    :param csv_file: the csv file opened in binary mode
+    :param encoding: the encoding from the csv file
+    :param positions: list whose only element is the byte offset after the last returned line, updated in place
+    :return: generator over the decoded lines
+    """
+    for line in csv_file:
+        positions[0] += len(line)
+        yield line.decode(encoding)
+
+
+def _filter_entries(csv_file, delimiter, category_of, categories, included_cols, projected_cols,
+                    virtual_category=False, positions=None):
+    """
+    Parses csv lines and keeps the entries which match the specified categories.
+    :param csv_file: the opened csv file or another iterable of lines
+    :param delimiter: the delimiter of the csv file
+    :param category_of: function which returns the category of a parsed entry
+    :param categories: set of the categories to keep or None for keeping all entries
+    :param included_cols: the indexes of the freeform text columns
+    :param projected_cols: the indexes of the columns to keep from every entry besides the category or None for
+    keeping all columns
+    :param virtual_category: whether the category is derived and has to be appended to the complete entries
+    :param positions: the byte offset tracking of _decoded_lines, if given the byte offsets of the entries will be
+    returned instead of the entries
+    :return: generator of tuples with the entry and its joined freeform text fields
+    """
+    # the csv reader only requests the lines of the current entry, so the byte offset after the previous entry is
+    # the beginning of the current entry
+    offset = None if positions is None else positions[0]
+    for row in csv.reader(csv_file, delimiter=delimiter):
+        # check whether the category from the entry matches with the specified categories
+        category = category_of(row)
+        if categories is None or category in categories:
+            freeform_text = " ".join(row[i] for i in included_cols)
+            if positions is not None:
+                row = offset
+            elif projected_cols is not None:
+                row = [category] + [row[i] for i in projected_cols]
+            elif virtual_category:
+                row.append(category)
+            yield row, freeform_text
+        if positions is not None:
+            offset = positions[0]
+
+
+def _read_byte_range(task):
+    """
+    Reads the entries of one byte range of a csv file, executed in a worker process.
+    :param task: tuple with the path, the start and end offset, the encoding, the delimiter, the arguments for
+    _filter_entries and whether byte offsets should be returned instead of the entries
+    :return: list of tuples with the entry and its joined freeform text fields
+    """
+    path, start, end, encoding, delimiter, filter_arguments, lazy = task
+    with open(path, 'rb') as csv_file:
+        csv_file.seek(start)
+        data = csv_file.read(end - start)
+    if lazy:
+        positions = [start]
+        lines = _decoded_lines(io.BytesIO(data), encoding, positions)
+        return list(_filter_entries(lines, delimiter, *filter_arguments, positions=positions))
+    # decoded the same way as a csv file opened in text mode
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+    return list(_filter_entries(lines, delimiter, *filter_arguments))
@@ -0,0 +1,179 @@
+from abc import ABCMeta, abstractmethod
+import csv
+
+"""
+Marco Link
+"""
+
+class RowStore(metaclass=ABCMeta):
+    """
+    Base class for row stores.
+    A row store replaces the complete dataset in memory, it only holds a reference for every entry and fetches the
+    complete entries on demand.
+    """
+
+    # the amount of entries fetched at once while iterating
+    _batch_size = 1000
+
+    def __init__(self, references, category_creator=None):
+        """
+        :param references: numpy array with the references of the entries in the order of reading
+        :param category_creator: if given, the derived category is appended to every fetched entry, default None
+        """
+        self._references = references
+        self._category_creator = category_creator
+        # the names of the columns of the fetched entries, None if they are unknown
+        self._column_names = None
+
+    def __len__(self):
+        return len(self._references)
+
+    def __getitem__(self, index):
+        """
+        :param index: the index of the entry
+        :return: the complete entry as list
+        """
+        return self._complete(self._fetch([self._references[index]])[0])
+
+    def __iter__(self):
+        """:return: generator over all complete entries as lists in the order of reading"""
+        for start in range(0, len(self._references), self._batch_size):
+            for row in self._fetch(self._references[start:start + self._batch_size]):
+                yield self._complete(row)
+
+    def _complete(self, row):
+        """
+        :param row: a fetched entry
+        :return: the entry with the virtual category column if a category creator is given
+        """
+        if self._category_creator is not None:
+            row.append(self._category_creator.derive_category(row, self._column_names))
+        return row
+
+    @abstractmethod
+    def _fetch(self, references):
+        """
+        Fetches complete entries.
+        :param references: the references of the entries to fetch
+        :return: list with the complete entries as lists in the order of the references
+        """
+        pass
+
+
+class CSVRowStore(RowStore):
+    """Fetches the entries of a csv file by the byte offsets where they begin."""
+
+    def __init__(self, references, path, encoding='utf-8', delimiter='\t', category_creator=None, column_names=None):
+        """
+        :param references: numpy array with the byte offsets of the entries
+        :param path: the path to the csv file
+        :param encoding: the encoding from the csv file, default 'utf-8'
+        :param delimiter: the delimiter of the csv file default tab character '\t'
+        :param category_creator: if given, the derived category is appended to every fetched entry, default None
+        :param column_names: the names of the columns from the header, default None
+        """
+        super().__init__(references, category_creator)
+        self._column_names = column_names
+        self._path = path
+        self._encoding = encoding
+        self._delimiter = delimiter
+
+    def _fetch(self, references):
+        rows = []
+        with open(self._path, 'rb') as csv_file:
+            # the csv reader requests further lines itself if an entry is spread over multiple lines
+            lines = iter(lambda: csv_file.readline().decode(self._encoding), '')
+            for offset in references:
+                csv_file.seek(int(offset))
+                rows.append(next(csv.reader(lines, delimiter=self._delimiter)))
+        return rows
+
+
+class DatabaseRowStore(RowStore):
+    """Fetches the entries of a database table by their primary keys."""
+
+    # the amount of keys in one IN (?, ...) clause
+    _batch_size = 250
+
+    def __init__(self, references, reader, table_name, primary_key_column, category_creator=None):
+        """
+        :param references: numpy array with the primary keys of the entries
+        :param reader: the database reader which provides the connections with connect()
+        :param table_name: the table name to look for
+        :param primary_key_column: the column which contains the primary key
+        :param category_creator: if given, the derived category is appended to every fetched entry, default None
+        """
+        super().__init__(references, category_creator)
+        self._reader = reader
+        self._table_name = table_name
+        self._primary_key_column = primary_key_column
+
+    def __iter__(self):
+        """:return: generator over all complete entries as lists in the order of reading, all batches are fetched
+        over one connection"""
+        conn = self._reader.connect()
+        try:
+            for start in range(0, len(self._references), self._batch_size):
+                for row in self._fetch_with(conn, self._references[start:start + self._batch_size]):
+                    yield self._complete(row)
+        finally:
+            conn.close()
+
+    def _fetch(self, references):
+        conn = self._reader.connect()
+        try:
+            return self._fetch_with(conn, references)
+        finally:
+            conn.close()
+
+    def _fetch_with(self, conn, references):
+        """
+        Fetches complete entries over an open connection.
+        :param conn: the open DB-API connection to the database
+        :param references: the primary keys of the entries to fetch
+        :return: list with the complete entries as lists in the order of the references
+        """
+        keys = [key.item() if hasattr(key, 'item') else key for key in references]
+        statement = 'SELECT ' + self._primary_key_column + ', ' + self._table_name + '.* FROM ' + self._table_name \
+                    + ' WHERE ' + self._primary_key_column + ' IN (' + ', '.join('?' for _ in keys) + ')'
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement, keys)
+            if self._column_names is None:
+                self._column_names = [description[0] for description in cursor.description[1:]]
+            rows = {row[0]: list(row[1:]) for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+        return [rows[key] for key in keys]
+
+
+class ColumnarRowStore(RowStore):
+    """Fetches the entries of a columnar file by their primary keys."""
+
+    # the amount of keys looked up with one scan of the file
+    _batch_size = 65536
+
+    def __init__(self, references, dataset, primary_key_column, category_creator=None):
+        """
+        :param references: numpy array with the primary keys of the entries
+        :param dataset: the pyarrow dataset of the columnar file
+        :param primary_key_column: the name of the column which contains the primary key
+        :param category_creator: if given, the derived category is appended to every fetched entry, default None
+        """
+        super().__init__(references, category_creator)
+        self._dataset = dataset
+        self._primary_key_column = primary_key_column
+
+    def _fetch(self, references):
+        # imported here like the dataset itself, pyarrow is an optional dependency
+        import pyarrow.dataset
+
+        keys = [key.item() if hasattr(key, 'item') else key for key in references]
+        table = self._dataset.to_table(filter=pyarrow.dataset.field(self._primary_key_column).isin(keys))
+        key_index = table.schema.get_field_index(self._primary_key_column)
+        if self._column_names is None:
+            self._column_names = table.schema.names
+        rows = {}
+        for row in zip(*(column.to_pylist() for column in table.columns)):
+            rows[row[key_index]] = list(row)
+        return [rows[key] for key in keys]
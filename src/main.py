@@ -1,8 +1,8 @@
-from time import time
 import inspect
 import os
 import traceback
 
+from execution_plan import ExecutionPlan
 from input.config_reader import ConfigReader
 
 """
@@ -11,7 +11,8 @@ Marco Link
 
 def main():
     """
-    Processes one config file and its resulting clustering process after another.
+    Reads all config files into one execution plan first and then executes it, the stages which are equal for
+    multiple clustering processes are executed only once and their results are shared.
     """
 
     # get the actual path of the prototyp
@@ -24,33 +25,25 @@ def main():
     path_configs = os.path.join(path, 'config')
     path_out = os.path.join(path, 'out')
 
-    # iterate over all configuration file in the config folder and execute it
+    # read in all configuration files in the config folder first, so the stages which are equal for multiple
+    # clustering processes are executed only once
     # http://stackoverflow.com/questions/3964681/find-all-files-in-directory-with-extension-txt-in-python
+    execution_plan = ExecutionPlan()
     for config in os.listdir(path_configs):
         if config.endswith('.conf'):
             # http://stackoverflow.com/questions/678236/how-to-get-the-filename-without-the-extension-from-a-path-in-python
             clustering_process_path_out = os.path.join(path_out, os.path.splitext(config)[0])
-            clustering_process = None
             try:
                 # create clustering process on the basis of the config file
                 clustering_process = ConfigReader(clustering_process_path_out).read_config(
                     os.path.join(path_configs, config), path_spec)
+                execution_plan.add(config, clustering_process)
             except Exception as exception:
                 # http://stackoverflow.com/questions/3702675/how-to-print-the-full-traceback-without-halting-the-program
                 traceback.print_tb(exception.__traceback__)
-            try:
-                if clustering_process is not None:
-                    t0 = time()
-                    print("Start clustering process: " + str(config))
-                    # start the clustering process
-                    clustering_process.start()
-                    print("Finished clustering process in %fs" % (time() - t0))
-                    print('_________________________________________')
-            except Exception as exception:
-                # http://stackoverflow.com/questions/3702675/how-to-print-the-full-traceback-without-halting-the-program
-                traceback.print_tb(exception.__traceback__)
-                print("Failed clustering process: " + str(config))
-                print('_________________________________________')
+
+    print("Stages shared between clustering processes: " + str(execution_plan.shared_stages()))
+    execution_plan.execute()
 
 # https://docs.python.org/2/library/__main__.html
 if __name__ == "__main__":
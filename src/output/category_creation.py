@@ -1,5 +1,4 @@
 from abc import ABCMeta, abstractmethod
-import pyodbc
 
 """
 Marco Link
@@ -14,11 +13,75 @@ class CategoryCreator(metaclass=ABCMeta):
     def create_categories(self):
         pass
 
+    @abstractmethod
+    def derive_category(self, row, column_names=None):
+        """
+        Derives the category of an entry while it is read, without storing it in the dataset.
+        :param row: the complete entry
+        :param column_names: the names of the columns of the entry, None if they are unknown
+        :return: the category of the entry
+        """
+        pass
+
 
 class NHTSADatabaseCategoryCreation(CategoryCreator):
-    """Class for creating categories for the nhtsa consumer complaint's database from its component description."""
+    """
+    Class for creating categories for the nhtsa consumer complaint's database from its component description.
+    The entries are grouped by their category and updated with a few set based statements inside of one transaction.
+    Entries which already have their category are skipped, so the category creation can be repeated.
+    """
+
+    # the categories from the nhtsa dataset which are merged, all other categories are kept
+    _merged_categories = {
+        'CHILD SEAT': 'SEATS',
+        'SEAT BELTS': 'SEATS',
+
+        'FUEL/PROPULSION SYSTEM': 'PROPULSION SYSTEM',
+        'HYBRID PROPULSION SYSTEM': 'PROPULSION SYSTEM',
+        'FUEL SYSTEM, GASOLINE': 'PROPULSION SYSTEM',
+        'FI': 'PROPULSION SYSTEM',
+        'FUEL SYSTEM, DIESEL': 'PROPULSION SYSTEM',
+        'FUEL SYSTEM, OTHER': 'PROPULSION SYSTEM',
+
+        'OTHER': 'UNKNOWN OR OTHER',
+        '': 'UNKNOWN OR OTHER',
+
+        'SERVICE BRAKES, HYDRAULIC': 'BRAKES',
+        'SERVICE BRAKES, ELECTRIC': 'BRAKES',
+        'SERVICE BRAKES, AIR': 'BRAKES',
+        'PARKING BRAKE': 'BRAKES',
+        'SERVICE BRAKES': 'BRAKES',
+
+        'EQUIPMENT ADAPTIVE': 'EQUIPMENT',
+
+        'ENGINE': 'ENGINE AND ENGINE COOLING',
+
+        'WHEELS': 'TIRES',
+
+        'AIR BAG': 'AIR BAGS',
+
+        'TRAILER HITCHES': 'TRAILER HARDWARE',
+
+        'BACK OVER PREVENTION': 'ELECTRICAL SYSTEM',
+        'FORWARD COLLISION AVOIDANCE': 'ELECTRICAL SYSTEM',
+        'TRACTION CONTROL SYSTEM': 'ELECTRICAL SYSTEM',
+        'LANE DEPARTURE': 'ELECTRICAL SYSTEM',
+
+        'EXTERIOR LIGHTING': 'LIGHTING',
+        'INTERIOR LIGHTING': 'LIGHTING',
+
+        'LATCHES/LOCKS/LINKAGES': 'STRUCTURE',
+
+        'VISIBILITY/WIPER': 'VISIBILITY',
+    }
+
+    # the column with the component description
+    _component_description_column = 'COMPDESC'
+    # the index of the component description in the complaint table, used if the column names are unknown
+    _component_description_index = 11
+
     def __init__(self, path, table_name='FLAT_CMPL', username='admin', password='', primary_key_column='Feld1',
-                 category_column='Category'):
+                 category_column='Category', batch_size=250):
         """
         :param path: the path to the database
         :param table_name: the table name to look for
@@ -26,6 +89,7 @@ class NHTSADatabaseCategoryCreation(CategoryCreator):
         :param password: the password for the database default ''
         :param category_column: the name of the new field
         :param primary_key_column: the field which contains the primary key
+        :param batch_size: the amount of entries updated with one statement and fetched at once, default 250
         """
         super().__init__(path)
         self._table_name = table_name
@@ -33,46 +97,76 @@ class NHTSADatabaseCategoryCreation(CategoryCreator):
         self._password = password
         self._category_column = category_column
         self._primary_key_column = primary_key_column
+        self._batch_size = batch_size
+        # the index of the component description for the last column names, they are the same for all entries of a
+        # reader
+        self._indexed_column_names = None
+        self._component_description_position = None
 
     def create_categories(self):
-        """Creates new field in the database and gives every entry from the dataset a category."""
-
-        # http://stackoverflow.com/questions/1047580/ms-access-library-for-python
-        odbc_conn_str = 'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=%s;UID=%s;PWD=%s' % \
-                        (self._path, self._username, self._password)
+        """Creates new field in the database if it doesn't exist and gives every entry from the dataset a category."""
 
-        conn = pyodbc.connect(odbc_conn_str)
+        conn = self._connect()
         cursor = conn.cursor()
 
-        # https://msdn.microsoft.com/en-us/library/office/bb177883(v=office.12).aspx
-        cursor.execute(' '.join(['alter table', self._table_name, 'add column', self._category_column, 'varchar(128)']))
-        conn.commit()
-
-        cursor.execute(' '.join(['select * from', self._table_name]))
+        # only the column names are needed
+        cursor.execute('SELECT * FROM ' + self._table_name + ' WHERE 1 = 0')
+        column_names = [description[0] for description in cursor.description]
 
-        # create update statements for the database
-        updatestmnts = []
-        while 1:
-            row = cursor.fetchone()
-            if not row:
-                break
-            key = row[0]
-            compdesc = row[11]
-            category = self.get_category(compdesc)
-            if category is None:
-                continue
-            updatestmnt = 'UPDATE ' + self._table_name + ' SET ' + self._category_column + ' = ' \
-                          + "'" + category + "'" + ' WHERE ' + self._primary_key_column + ' = ' + str(key)
-            updatestmnts.append(updatestmnt)
-
-        # update the database
-        for updatestmnt in updatestmnts:
-            cursor.execute(updatestmnt)
+        if self._category_column not in column_names:
+            # https://msdn.microsoft.com/en-us/library/office/bb177883(v=office.12).aspx
+            cursor.execute(' '.join(['alter table', self._table_name, 'add column', self._category_column,
+                                     'varchar(128)']))
             conn.commit()
+            category_index = None
+        else:
+            category_index = column_names.index(self._category_column)
+        key_index = column_names.index(self._primary_key_column)
+        description_index = self._component_description(column_names)
+
+        # group the primary keys of the entries by their category
+        keys_per_category = {}
+        cursor.execute(' '.join(['select * from', self._table_name]))
+        rows = cursor.fetchmany(self._batch_size)
+        while len(rows) > 0:
+            for row in rows:
+                category = self.get_category(row[description_index])
+                # skip entries which already have their category
+                if category is None or (category_index is not None and row[category_index] == category):
+                    continue
+                keys_per_category.setdefault(category, []).append(row[key_index])
+            rows = cursor.fetchmany(self._batch_size)
+
+        # update the database with one statement per category and batch of keys, committed at once
+        for category, keys in keys_per_category.items():
+            for start in range(0, len(keys), self._batch_size):
+                batch = keys[start:start + self._batch_size]
+                cursor.execute('UPDATE ' + self._table_name + ' SET ' + self._category_column + ' = ? WHERE '
+                               + self._primary_key_column + ' IN (' + ', '.join('?' for _ in batch) + ')',
+                               [category] + batch)
+        conn.commit()
 
         cursor.close()
         conn.close()
 
+    def derive_category(self, row, column_names=None):
+        return self.get_category(row[self._component_description(column_names)])
+
+    def _component_description(self, column_names):
+        """
+        :param column_names: the names of the columns of the entries, None if they are unknown
+        :return: the index of the component description in the entries
+        :raises ValueError: if the column names don't contain the component description
+        """
+        if column_names is None:
+            return self._component_description_index
+        if column_names is not self._indexed_column_names:
+            if self._component_description_column not in column_names:
+                raise ValueError('The column ' + self._component_description_column + ' for the categories is missing')
+            self._component_description_position = list(column_names).index(self._component_description_column)
+            self._indexed_column_names = column_names
+        return self._component_description_position
+
     def get_category(self, compdesc):
         """
         Returns the actual category after some categories from the nhtsa dataset were merged.
@@ -80,78 +174,17 @@ class NHTSADatabaseCategoryCreation(CategoryCreator):
         :return: str
         """
         if isinstance(compdesc, str):
-            a = compdesc.split(":")
-            category = a[0]
-
-            if category == 'CHILD SEAT':
-                category = 'SEATS'
-            elif category == 'SEAT BELTS':
-                category = 'SEATS'
-
-            elif category == 'FUEL/PROPULSION SYSTEM':
-                category = 'PROPULSION SYSTEM'
-            elif category == 'HYBRID PROPULSION SYSTEM':
-                category = 'PROPULSION SYSTEM'
-            elif category == 'FUEL SYSTEM, GASOLINE':
-                category = 'PROPULSION SYSTEM'
-            elif category == 'FI':
-                category = 'PROPULSION SYSTEM'
-            elif category == 'FUEL SYSTEM, DIESEL':
-                category = 'PROPULSION SYSTEM'
-            elif category == 'FUEL SYSTEM, OTHER':
-                category = 'PROPULSION SYSTEM'
-
-            elif category == 'OTHER':
-                category = 'UNKNOWN OR OTHER'
-            elif category == '':
-                category = 'UNKNOWN OR OTHER'
-
-            elif category == 'SERVICE BRAKES, HYDRAULIC':
-                category = 'BRAKES'
-            elif category == 'SERVICE BRAKES, ELECTRIC':
-                category = 'BRAKES'
-            elif category == 'SERVICE BRAKES, AIR':
-                category = 'BRAKES'
-            elif category == 'PARKING BRAKE':
-                category = 'BRAKES'
-            elif category == 'SERVICE BRAKES':
-                category = 'BRAKES'
-
-            elif category == 'EQUIPMENT ADAPTIVE':
-                category = 'EQUIPMENT'
-
-            elif category == 'ENGINE':
-                category = 'ENGINE AND ENGINE COOLING'
-
-            elif category == 'WHEELS':
-                category = 'TIRES'
-
-            elif category == 'AIR BAG':
-                category = 'AIR BAGS'
-
-            elif category == 'TRAILER HITCHES':
-                category = 'TRAILER HARDWARE'
-
-            elif category == 'BACK OVER PREVENTION':
-                category = 'ELECTRICAL SYSTEM'
-            elif category == 'FORWARD COLLISION AVOIDANCE':
-                category = 'ELECTRICAL SYSTEM'
-            elif category == 'TRACTION CONTROL SYSTEM':
-                category = 'ELECTRICAL SYSTEM'
-            elif category == 'LANE DEPARTURE':
-                category = 'ELECTRICAL SYSTEM'
-
-            elif category == 'EXTERIOR LIGHTING':
-                category = 'LIGHTING'
-            elif category == 'INTERIOR LIGHTING':
-                category = 'LIGHTING'
-
-            elif category == 'LATCHES/LOCKS/LINKAGES':
-                category = 'STRUCTURE'
-
-            elif category == 'VISIBILITY/WIPER':
-                category = 'VISIBILITY'
-
-            return category
+            category = compdesc.split(":")[0]
+            return self._merged_categories.get(category, category)
 
         return 'UNKNOWN OR OTHER'
+
+    def _connect(self):
+        """:return: a new connection to the database"""
+        # imported here like in the database readers, so the module can be used without an installed ODBC driver
+        import pyodbc
+
+        # http://stackoverflow.com/questions/1047580/ms-access-library-for-python
+        odbc_conn_str = 'DRIVER={Microsoft Access Driver (*.mdb, *.accdb)};DBQ=%s;UID=%s;PWD=%s' % \
+                        (self._path, self._username, self._password)
+        return pyodbc.connect(odbc_conn_str)
@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 import numpy
 import os
+import scipy.sparse
 
 """
 Marco Link
@@ -28,7 +29,7 @@ class VisualizationBase(metaclass=ABCMeta):
         """
         Creates and saves the visualization.
         :param clusterer: the clusterer which results should be visualized
-        :param term_document_matrix: the term document matrix which was used by the clusterer
+        :param term_document_matrix: the term document matrix or the reduced matrix which was used by the clusterer
         """
         pass
 
@@ -45,16 +46,16 @@ class ClusterPlot(VisualizationBase):
         plt.close('all')
         try:
             # does automatic analysis for pca work
-            matrix_minimizer = PCA(n_components='mle', svd_solver='full').fit(term_document_matrix.todense())
+            matrix_minimizer = PCA(n_components='mle', svd_solver='full').fit(_dense(term_document_matrix))
         except:
             try:
                 # does pca in general work
-                matrix_minimizer = PCA(n_components=2).fit(term_document_matrix.todense())
+                matrix_minimizer = PCA(n_components=2).fit(_dense(term_document_matrix))
             except:
                 # use lsa if pca does not work because of a too big term document matrix
                 matrix_minimizer = TruncatedSVD(n_components=2, n_iter=10, random_state=42).fit(term_document_matrix)
 
-        data_2d = matrix_minimizer.transform(term_document_matrix.todense())
+        data_2d = matrix_minimizer.transform(_dense(term_document_matrix))
         # 2nd Plot showing the actual clusters formed
         colors = cm.spectral(clusterer.labels_.astype(float) / clusterer.n_clusters)
         plt.scatter(data_2d[:, 0], data_2d[:, 1], marker='.', s=30, lw=0, alpha=0.7,
@@ -138,3 +139,13 @@ class SilhouettePlot(VisualizationBase):
 
         plt.savefig(self._path, bbox_inches='tight')
         plt.close()
+
+
+def _dense(matrix):
+    """
+    :param matrix: a sparse or dense matrix
+    :return: the matrix as dense numpy array
+    """
+    if scipy.sparse.issparse(matrix):
+        return matrix.toarray()
+    return numpy.asarray(matrix)
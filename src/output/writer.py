@@ -1,7 +1,9 @@
 from abc import ABCMeta, abstractmethod
 import csv
 import os
-from scipy.spatial.distance import euclidean
+
+import numpy
+from sklearn.utils.extmath import row_norms
 
 """
 Marco Link
@@ -17,13 +19,16 @@ class WriterBase(metaclass=ABCMeta):
         self._path = path
 
     @abstractmethod
-    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None):
+    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None, cluster_term_weights=None):
         """
         Writes the specific clustering information.
         :param vectorizer: the vectorizer
-        :param term_document_matrix: the term documet matrix created from the vectorizer
+        :param term_document_matrix: the term documet matrix created from the vectorizer or the reduced matrix which
+                                     was clustered
         :param clusterer: the clusterer which result should be saved.
-        :param complete_dataset: the complete dataset
+        :param complete_dataset: the complete dataset, a numpy array or a row store
+        :param cluster_term_weights: the weights of the terms for every cluster if the clusterer didn't cluster the
+                                     term document matrix, the cluster centers are used if None
         """
         pass
 
@@ -39,42 +44,50 @@ class ClusterCSVWriter(WriterBase):
     # should the distance be written with a comma
     _float_with_comma = False
 
-    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None):
+    # the amount of documents whose distances to the cluster centers are computed at once
+    _distance_chunk_size = 10000
+
+    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None, cluster_term_weights=None):
 
-        order_centroids = clusterer.cluster_centers_.argsort()[:, ::-1]
+        cluster_centers = clusterer.cluster_centers_
+        if cluster_term_weights is None:
+            cluster_term_weights = cluster_centers
+        order_centroids = cluster_term_weights.argsort()[:, ::-1]
         cluster_centroids_terms = []
 
-        terms = vectorizer.get_feature_names()
+        terms = _feature_names(vectorizer)
 
         # take the features from cluster centers in the order of their weighting. Minimum weight 0.08
         for k in range(clusterer.n_clusters):
             centroid_terms = []
-            cluster_centroid = clusterer.cluster_centers_[k].reshape(1, term_document_matrix.shape[1])
             for ind in order_centroids[k, :30]:
-                if cluster_centroid[0, ind] >= 0.1:
+                if cluster_term_weights[k, ind] >= 0.1:
                     centroid_terms.append(terms[ind])
             cluster_centroids_terms.append(centroid_terms)
 
+        # compute the distances from the cluster centers
+        # http://stackoverflow.com/questions/29036561/how-to-get-meaningful-results-of-kmeans-in-scikit-learn
+        distances = _distances_to_centers(term_document_matrix, cluster_centers, clusterer.labels_,
+                                          self._distance_chunk_size)
+
         # write the clustering results
         # https://docs.python.org/3/library/csv.html
         with open(os.path.join(self._path, 'Cluster.csv'), 'w', newline='', encoding='utf-8') as clustersCsv:
             # reader = csv.reader(clustersCsv, delimitter='\t')
             writer = csv.writer(clustersCsv, delimiter='\t')
 
-            i = 0
-            for entry in term_document_matrix:
-                cluster_center = clusterer.labels_[i]
-                cluster_centroid = clusterer.cluster_centers_[cluster_center].reshape(1, term_document_matrix.shape[1])
-
+            # the complete dataset is iterated instead of indexed, so a row store can fetch its entries in batches
+            for cluster_center, distance, complete_entry in zip(clusterer.labels_, distances, complete_dataset):
                 main_term = terms[order_centroids[cluster_center, 0]]
 
-                # compute the distance from the cluster center
-                # http://stackoverflow.com/questions/29036561/how-to-get-meaningful-results-of-kmeans-in-scikit-learn
-                distance = euclidean(entry.todense(), clusterer.cluster_centers_[cluster_center])
-                row = complete_dataset[i].tolist()
+                if hasattr(complete_entry, 'tolist'):
+                    row = complete_entry.tolist()
+                else:
+                    row = list(complete_entry)
                 row.append(str(cluster_center))
                 distance = "{0:.3f}".format(distance)
-                cluster_main_term_weight = '%0.3f' % cluster_centroid[0, order_centroids[cluster_center, :1]]
+                main_term_weight = cluster_term_weights[cluster_center, order_centroids[cluster_center, 0]]
+                cluster_main_term_weight = '%0.3f' % main_term_weight
                 if self._float_with_comma:
                     distance = distance.replace('.', ',')
                     cluster_main_term_weight = cluster_main_term_weight.replace('.', ',')
@@ -84,8 +97,6 @@ class ClusterCSVWriter(WriterBase):
                 row.append(', '.join(cluster_centroids_terms[cluster_center]))
                 writer.writerow(row)
 
-                i += 1
-
 
 class ClusterInformationWriter(WriterBase):
     """
@@ -94,7 +105,7 @@ class ClusterInformationWriter(WriterBase):
     features and the amount of documents within the cluster.
     """
 
-    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None):
+    def save(self, vectorizer, term_document_matrix, clusterer, complete_dataset=None, cluster_term_weights=None):
 
         # get amount of documents per cluster
         amount = {}
@@ -113,7 +124,7 @@ class ClusterInformationWriter(WriterBase):
         f.write('\n')
 
         f.write('FEATURES:\n')
-        for feature in vectorizer.get_feature_names():
+        for feature in _feature_names(vectorizer):
             f.write(feature)
             f.write(', ')
         f.write('\n')
@@ -123,16 +134,50 @@ class ClusterInformationWriter(WriterBase):
         f.write('\n')
         f.write('\n\n')
 
-        order_centroids = clusterer.cluster_centers_.argsort()[:, ::-1]
-        terms = vectorizer.get_feature_names()
+        if cluster_term_weights is None:
+            cluster_term_weights = clusterer.cluster_centers_
+        order_centroids = cluster_term_weights.argsort()[:, ::-1]
+        terms = _feature_names(vectorizer)
 
         for k in range(clusterer.n_clusters):
-            cluster_centroid = clusterer.cluster_centers_[k].reshape(1, term_document_matrix.shape[1])
             if k in amount:
                 f.write("Cluster %d" % k + " " + str(amount[k]) + " :")
             for ind in order_centroids[k, :30]:
                 f.write(' %s' % terms[ind])
-                f.write(' %0.3f,' % cluster_centroid[0, ind])
+                f.write(' %0.3f,' % cluster_term_weights[k, ind])
             f.write('\n')
 
         f.close()
+
+
+def _feature_names(vectorizer):
+    """
+    :param vectorizer: the fitted vectorizer
+    :return: the names of the features, newer versions of scikit-learn only have get_feature_names_out
+    """
+    if hasattr(vectorizer, 'get_feature_names_out'):
+        return vectorizer.get_feature_names_out()
+    return vectorizer.get_feature_names()
+
+
+def _distances_to_centers(term_document_matrix, cluster_centers, labels, chunk_size):
+    """
+    Computes the euclidean distances of the documents to the centers of their clusters with
+    ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, in the dtype of the term document matrix.
+    :param term_document_matrix: the term document matrix
+    :param cluster_centers: the cluster centers
+    :param labels: the cluster of every document
+    :param chunk_size: the amount of documents whose products with all cluster centers are computed at once
+    :return: numpy array with the distances
+    """
+    squared_center_norms = row_norms(cluster_centers, squared=True)
+    distances = numpy.empty(term_document_matrix.shape[0], dtype=cluster_centers.dtype)
+    for start in range(0, term_document_matrix.shape[0], chunk_size):
+        chunk = term_document_matrix[start:start + chunk_size]
+        chunk_labels = labels[start:start + chunk_size]
+        products = numpy.asarray(chunk @ cluster_centers.T)
+        squared_distances = row_norms(chunk, squared=True) - 2 * products[numpy.arange(chunk.shape[0]), chunk_labels] \
+            + squared_center_norms[chunk_labels]
+        # rounding errors can make the squared distance of a document at its center slightly negative
+        distances[start:start + chunk_size] = numpy.sqrt(numpy.maximum(squared_distances, 0))
+    return distances
@@ -1,2 +1,2 @@
 __all__ = ['preprocess', 'preprocessing_pipeline', 'preprocessing_with_textacy', 'regex_substitution',
-           'remove_stopwords', 'spelling_correction', 'tokenizer', 'synonyms', 'stemmer']
\ No newline at end of file
+           'remove_stopwords', 'spelling_correction', 'tokenizer', 'synonyms', 'stemmer', 'vocabulary', 'cache']
\ No newline at end of file
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import pickle
+
+"""
+Marco Link
+"""
+
+class PreprocessingCache:
+    """
+    On-disk cache for preprocessed documents.
+    An entry is addressed by the fingerprint of the input documents and the fingerprints of the preprocessing steps
+    which were applied to them, so the output of a pipeline can be reused by every pipeline which starts with the same
+    steps. If the cache exceeds its size limit, the least recently used entries are removed.
+    """
+
+    _suffix = '.pickle'
+
+    def __init__(self, path, size_limit=1024):
+        """
+        :param path: the folder of the cache, created if it doesn't exist
+        :param size_limit: the maximum size of the cache in megabytes, default 1024
+        """
+        self._path = path
+        self._size_limit = size_limit * 1024 * 1024
+        os.makedirs(path, exist_ok=True)
+
+    @staticmethod
+    def prefix_keys(documents_fingerprint, step_fingerprints):
+        """
+        :param documents_fingerprint: the fingerprint of the input documents
+        :param step_fingerprints: the fingerprints of the preprocessing steps in the order of execution
+        :return: list with the keys of the outputs after every prefix of the steps, the first key is the one of the
+                 input documents without any step
+        """
+        keys = [documents_fingerprint]
+        for step_fingerprint in step_fingerprints:
+            keys.append(hashlib.sha256((keys[-1] + step_fingerprint).encode('ascii')).hexdigest())
+        return keys
+
+    def load(self, key):
+        """
+        :param key: the key of the entry
+        :return: the cached documents or None if the key isn't cached
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                documents = pickle.load(entry_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # the modification time is the time of the last use for the eviction
+        os.utime(entry_path)
+        return documents
+
+    def save(self, key, documents):
+        """
+        Saves the documents and removes the least recently used entries if the size limit is exceeded.
+        :param key: the key of the entry
+        :param documents: the preprocessed documents
+        """
+        entry_path = self._entry_path(key)
+        temporary_path = entry_path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary_path, 'wb') as entry_file:
+            pickle.dump(documents, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        # the entry appears completely or not at all for other processes
+        os.replace(temporary_path, entry_path)
+        self._evict()
+
+    def _entry_path(self, key):
+        """
+        :param key: the key of the entry
+        :return: the path of the entry file
+        """
+        return os.path.join(self._path, key + self._suffix)
+
+    def _evict(self):
+        """Removes the least recently used entries until the cache doesn't exceed its size limit."""
+        entries = []
+        size = 0
+        for file_name in os.listdir(self._path):
+            if not file_name.endswith(self._suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self._path, file_name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file_name))
+            size += stat.st_size
+
+        entries.sort()
+        for _, entry_size, file_name in entries:
+            if size <= self._size_limit:
+                break
+            try:
+                os.remove(os.path.join(self._path, file_name))
+            except OSError:
+                continue
+            size -= entry_size
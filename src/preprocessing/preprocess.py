@@ -2,6 +2,8 @@ import abc
 from abc import ABCMeta
 import numpy
 
+from .token_corpus import TokenCorpus
+
 """
 Marco Link
 """
@@ -17,21 +19,35 @@ class PreprocessBase(metaclass=ABCMeta):
         :param documents: the documents to transform, a document can be a string or a collection of tokens
         :return: the transformed documents
         """
+        if isinstance(documents, TokenCorpus):
+            return TokenCorpus.from_documents(self.transform_tokens(tokens) for tokens in documents)
 
         new_documents = []
         for document in documents:
-            # transform string, if the document is a string
-            if isinstance(document, str):
-                transformed_text = self.transform_string(document)
-                new_documents.append(transformed_text)
-
-            # or transform tokens, if the document contains of a list with tokens
-            else:
-                transformed_tokens = self.transform_tokens(document)
-                new_documents.append(transformed_tokens)
+            new_documents.append(self.transform_document(document))
 
+        if len(new_documents) > 0 and not isinstance(new_documents[0], str):
+            # token lists of different lengths can not be converted into a two dimensional array
+            transformed_documents = numpy.empty(len(new_documents), dtype=object)
+            for i, tokens in enumerate(new_documents):
+                transformed_documents[i] = tokens
+            return transformed_documents
         return numpy.array(new_documents)
 
+    def transform_document(self, document):
+        """
+        Transforms a single document.
+        :param document: the document to transform, a string or a collection of tokens
+        :return: the transformed document
+        """
+        # transform string, if the document is a string
+        if isinstance(document, str):
+            return self.transform_string(document)
+
+        # or transform tokens, if the document contains of a list with tokens
+        else:
+            return self.transform_tokens(document)
+
     @abc.abstractmethod
     def transform_string(self, text):
         """
@@ -51,7 +67,44 @@ class PreprocessBase(metaclass=ABCMeta):
         ...
 
 
-class ToLowercase(PreprocessBase):
+class TokenPreprocessBase(PreprocessBase):
+    """
+    Base class for token-local preprocessing steps.
+    The result for a token depends only on the token itself, so every distinct token has to be transformed only once.
+    """
+
+    def transform(self, documents):
+        # the tokens of a token corpus are transformed once per entry of its vocabulary
+        if isinstance(documents, TokenCorpus):
+            return documents.map_tokens(self.transform_token)
+        return super().transform(documents)
+
+    @abc.abstractmethod
+    def transform_token(self, token):
+        """
+        Transforms a single token.
+        :param token: the token to transform
+        :return: the transformed token or None if the token should be removed
+        """
+        ...
+
+
+class RegexPreprocessBase(PreprocessBase):
+    """
+    Base class for preprocessing steps which substitute regular expressions.
+    The patterns of consecutive steps can be searched with one pass, which skips the texts none of them matches.
+    """
+
+    @abc.abstractmethod
+    def regex_rules(self):
+        """
+        :return: list of tuples with the compiled pattern and the replacement string in the order of application, or
+                 None if the step can not be expressed with substitution rules
+        """
+        ...
+
+
+class ToLowercase(TokenPreprocessBase):
     """
     Preprocess class to transform a string or tokens to lowercase.
     """
@@ -70,3 +123,6 @@ class ToLowercase(PreprocessBase):
         :return: a list with the transformed tokens.
         """
         return [token.lower() for token in tokens]
+
+    def transform_token(self, token):
+        return token.lower()
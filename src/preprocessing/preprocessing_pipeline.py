@@ -1,20 +1,61 @@
-from .preprocess import PreprocessBase
+from contextlib import contextmanager
+from itertools import accumulate, chain
+from multiprocessing import Pool
+import numpy
+
+from fingerprint import fingerprint, fingerprint_documents
+from .preprocess import PreprocessBase, RegexPreprocessBase, TokenPreprocessBase
+from .regex_substitution import FusedRegexSubstitution
+from .token_corpus import TokenCorpus
+from .vocabulary import VocabularyPreprocessing
 
 """
 Marco Link
 """
 
 class PreprocessingPipeline:
-    """Pipeline for preprocessing tasks."""
+    """
+    Pipeline for preprocessing tasks.
+    By default every preprocessing step transforms all documents before the next step starts. In the fused mode every
+    document passes all preprocessing steps before the next document is transformed, so only the documents of the
+    input and of the output are held in memory.
+    With the vocabulary execution consecutive token-local preprocessing steps are executed once per distinct token.
+    With the regex fusion consecutive regex based preprocessing steps search their expressions with one pass and skip
+    the texts which none of them matches.
+    With a cache the output of the longest already preprocessed prefix of the steps is reused, the output after every
+    executed step is saved, so pipelines which only share their first steps reuse the output of them.
+    With the token corpus tokenized documents are kept as TokenCorpus with integer encoded tokens.
+    """
 
-    def __init__(self, preprocessing_steps=None, has_tokenizer=False):
+    def __init__(self, preprocessing_steps=None, has_tokenizer=False, n_jobs=1, chunk_size=1000, fused=False,
+                 vocabulary_execution=False, fuse_regex=False, cache=None, token_corpus=False):
         """
         Initializes the pipeline with the given preprocessing steps.
         :param preprocessing_steps: the preprocessing steps to add
         :param has_tokenizer: whether the preprocessing_steps contain a tokenizer.
+        :param n_jobs: the amount of processes transforming the documents, default 1
+        :param chunk_size: the amount of documents sent to a process at once, default 1000
+        :param fused: whether every document passes all preprocessing steps at once, default False
+        :param vocabulary_execution: whether token-local steps are executed once per distinct token, default False
+        :param fuse_regex: whether consecutive regex based steps search their expressions with one pass, default False
+        :param cache: the PreprocessingCache for the preprocessed documents, default None
+        :param token_corpus: whether tokenized documents are kept as TokenCorpus, default False
         """
         self._preprocessing_steps = []
         self._has_tokenizer = has_tokenizer
+        self._n_jobs = n_jobs
+        self._chunk_size = chunk_size
+        self._fused = fused
+        self._vocabulary_execution = vocabulary_execution
+        self._fuse_regex = fuse_regex
+        self._cache = cache
+        self._token_corpus = token_corpus
+        # the steps which are actually executed and the amount of preprocessing steps executed after every one of them
+        # by the index of the first step, created on the first transformation
+        self._execution_steps = {}
+        self._step_fingerprints = None
+        # the pool of the worker processes while they are kept running
+        self._pool = None
         if preprocessing_steps is not None:
             if isinstance(preprocessing_steps, PreprocessBase):
                 self._preprocessing_steps.append(preprocessing_steps)
@@ -30,10 +71,124 @@ class PreprocessingPipeline:
         :return: the preprocessed documents
         """
         if len(self._preprocessing_steps) > 0:
-            transformed_documents = documents
-            for preprocessing_step in self._preprocessing_steps:
-                transformed_documents = preprocessing_step.transform(transformed_documents)
-            return transformed_documents
+            if self._cache is None:
+                return self._transform_from(0, documents)
+            return self._transform_cached(documents)
+
+    def _transform_cached(self, documents):
+        """
+        Transforms the documents, starting with the cached output of the longest prefix of the preprocessing steps.
+        The executed steps transform the documents one after another and the output after every one of them is saved
+        in the cache.
+        :param documents: the documents to preprocess
+        :return: the preprocessed documents
+        """
+        if self._step_fingerprints is None:
+            self._step_fingerprints = [fingerprint(preprocessing_step)
+                                       for preprocessing_step in self._preprocessing_steps]
+        # the token corpus changes the type of the output, so runs with different settings never share an entry
+        input_key = fingerprint('preprocessing input', fingerprint_documents(documents), self._fuse_regex,
+                                self._token_corpus)
+        keys = self._cache.prefix_keys(input_key, self._step_fingerprints)
+
+        start = 0
+        for prefix_length in range(len(self._preprocessing_steps), 0, -1):
+            cached_documents = self._cache.load(keys[prefix_length])
+            if cached_documents is not None:
+                if prefix_length == len(self._preprocessing_steps):
+                    return cached_documents
+                documents = cached_documents
+                start = prefix_length
+                break
+
+        execution_steps, step_ends = self._get_execution_steps(start)
+        for index, step_end in enumerate(step_ends):
+            documents = self._transform_with(start, slice(index, index + 1), documents)
+            self._cache.save(keys[step_end], documents)
+        return documents
+
+    def _transform_from(self, start, documents):
+        """
+        Transforms the documents with the preprocessing steps beginning at the given index.
+        :param start: the index of the first preprocessing step
+        :param documents: the documents to preprocess
+        :return: the preprocessed documents
+        """
+        return self._transform_with(start, slice(None), documents)
+
+    def _transform_with(self, start, step_slice, documents):
+        """
+        Transforms the documents with some of the executed steps.
+        :param start: the index of the first preprocessing step of the executed steps
+        :param step_slice: the slice of the executed steps which transform the documents
+        :param documents: the documents to preprocess
+        :return: the preprocessed documents
+        """
+        if self._n_jobs > 1 and len(documents) > self._chunk_size:
+            return self._transform_parallel(start, step_slice, documents)
+        execution_steps = self._get_execution_steps(start)[0][step_slice]
+        if self._fused:
+            return _collect(_transform_fused(execution_steps, documents), self._token_corpus)
+        return _transform_steps(execution_steps, documents, self._token_corpus)
+
+    def _get_execution_steps(self, start=0):
+        """
+        Creates the executed steps once, so the vocabularies of the token-local steps are kept between the
+        transformations.
+        :param start: the index of the first preprocessing step, default 0
+        :return: the preprocessing steps, consecutive regex based and token-local steps grouped if enabled, and the
+                 amount of preprocessing steps which are executed after every one of them
+        """
+        if start not in self._execution_steps:
+            execution_steps = self._preprocessing_steps[start:]
+            sizes = [1] * len(execution_steps)
+            if self._fuse_regex:
+                execution_steps, sizes = _group_regex_steps(execution_steps, sizes)
+            if self._vocabulary_execution:
+                execution_steps, sizes = _group_token_steps(execution_steps, sizes)
+            step_ends = [start + step_end for step_end in accumulate(sizes)]
+            self._execution_steps[start] = (execution_steps, step_ends)
+        return self._execution_steps[start]
+
+    @contextmanager
+    def worker_processes(self):
+        """
+        Keeps the worker processes of the parallel execution running for all transformations inside of the with
+        statement, for example for all chunks of the input, so the preprocessing steps are sent to every process only
+        once. Without it every transformation starts its own worker processes.
+        :return: context manager, which starts the worker processes if the documents are transformed in parallel
+        """
+        if self._n_jobs <= 1 or self._pool is not None:
+            yield
+            return
+        with Pool(self._n_jobs, initializer=_initialize_worker, initargs=(self,)) as pool:
+            self._pool = pool
+            try:
+                yield
+            finally:
+                self._pool = None
+
+    def _transform_parallel(self, start, step_slice, documents):
+        """
+        Transforms the documents in chunks with the worker processes. Every chunk passes the executed steps in one
+        process, the pipeline is sent to every process only once when it is started.
+        :param start: the index of the first preprocessing step of the executed steps
+        :param step_slice: the slice of the executed steps which transform the documents
+        :param documents: the documents to preprocess
+        :return: the preprocessed documents in the order of the given documents
+        """
+        tasks = ((start, step_slice, documents[chunk_start:chunk_start + self._chunk_size])
+                 for chunk_start in range(0, len(documents), self._chunk_size))
+        with self.worker_processes():
+            # imap returns the transformed chunks in the original order
+            transformed_chunks = list(self._pool.imap(_transform_chunk, tasks))
+
+        if len(transformed_chunks) > 0 and all(isinstance(chunk, TokenCorpus) for chunk in transformed_chunks):
+            return TokenCorpus.concatenate(transformed_chunks)
+        transformed_documents = []
+        for transformed_chunk in transformed_chunks:
+            transformed_documents.extend(transformed_chunk)
+        return _object_array(transformed_documents)
 
     def add_preprocessig_step(self, preprocessing_step):
         """
@@ -42,6 +197,19 @@ class PreprocessingPipeline:
         """
         if isinstance(preprocessing_step, PreprocessBase):
             self._preprocessing_steps.append(preprocessing_step)
+            self._execution_steps = {}
+            self._step_fingerprints = None
+
+    def __getstate__(self):
+        # the worker processes get the pipeline without the pool
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        return state
+
+    def __setstate__(self, state):
+        # pipelines pickled before the pool was kept have no pool
+        state.setdefault('_pool', None)
+        self.__dict__.update(state)
 
     def is_empty(self):
         """:return: True if the pipeline contains no prerprocessing steps, else False"""
@@ -53,3 +221,161 @@ class PreprocessingPipeline:
     def has_tokenizer(self):
         """:return: True if a tokenizer was added to the pipeline, else False"""
         return self._has_tokenizer
+
+
+def _object_array(documents):
+    """
+    :param documents: list with documents
+    :return: one dimensional numpy array with the documents
+    """
+    # documents can be lists of tokens with different lengths, so the array is filled element wise
+    array = numpy.empty(len(documents), dtype=object)
+    for i, document in enumerate(documents):
+        array[i] = document
+    return array
+
+
+def _collect(documents, token_corpus):
+    """
+    :param documents: iterable of documents
+    :param token_corpus: whether tokenized documents are collected into a TokenCorpus
+    :return: the documents as TokenCorpus or as one dimensional numpy array
+    """
+    documents = iter(documents)
+    first_document = next(documents, None)
+    if first_document is None:
+        return _object_array([])
+    documents = chain([first_document], documents)
+    if token_corpus and not isinstance(first_document, str):
+        return TokenCorpus.from_documents(documents)
+    return _object_array(list(documents))
+
+
+def _to_token_corpus(documents):
+    """
+    :param documents: the documents
+    :return: the documents as TokenCorpus if they are tokenized, else the unchanged documents
+    """
+    if isinstance(documents, TokenCorpus) or len(documents) == 0 or isinstance(documents[0], str):
+        return documents
+    return TokenCorpus.from_documents(documents)
+
+
+def _group_regex_steps(preprocessing_steps, sizes):
+    """
+    :param preprocessing_steps: the preprocessing steps
+    :param sizes: the amount of configured preprocessing steps which every preprocessing step executes
+    :return: the preprocessing steps, consecutive regex based steps replaced with one fused regex step, and their sizes
+    """
+    grouped_steps = []
+    grouped_sizes = []
+    regex_rules = []
+    regex_size = 0
+    for preprocessing_step, size in zip(preprocessing_steps, sizes):
+        rules = preprocessing_step.regex_rules() if isinstance(preprocessing_step, RegexPreprocessBase) else None
+        if rules is not None:
+            regex_rules.extend(rules)
+            regex_size += size
+            continue
+        if regex_size > 0:
+            grouped_steps.append(FusedRegexSubstitution(regex_rules))
+            grouped_sizes.append(regex_size)
+            regex_rules = []
+            regex_size = 0
+        grouped_steps.append(preprocessing_step)
+        grouped_sizes.append(size)
+    if regex_size > 0:
+        grouped_steps.append(FusedRegexSubstitution(regex_rules))
+        grouped_sizes.append(regex_size)
+    return grouped_steps, grouped_sizes
+
+
+def _group_token_steps(preprocessing_steps, sizes):
+    """
+    :param preprocessing_steps: the preprocessing steps
+    :param sizes: the amount of configured preprocessing steps which every preprocessing step executes
+    :return: the preprocessing steps, consecutive token-local steps replaced with one vocabulary step, and their sizes
+    """
+    grouped_steps = []
+    grouped_sizes = []
+    token_steps = []
+    token_size = 0
+    for preprocessing_step, size in zip(preprocessing_steps, sizes):
+        if isinstance(preprocessing_step, TokenPreprocessBase):
+            token_steps.append(preprocessing_step)
+            token_size += size
+            continue
+        if len(token_steps) > 0:
+            grouped_steps.append(VocabularyPreprocessing(token_steps))
+            grouped_sizes.append(token_size)
+            token_steps = []
+            token_size = 0
+        grouped_steps.append(preprocessing_step)
+        grouped_sizes.append(size)
+    if len(token_steps) > 0:
+        grouped_steps.append(VocabularyPreprocessing(token_steps))
+        grouped_sizes.append(token_size)
+    return grouped_steps, grouped_sizes
+
+
+def _transform_fused(preprocessing_steps, documents):
+    """
+    Transforms one document after another with all preprocessing steps, no intermediate results are collected.
+    :param preprocessing_steps: the preprocessing steps
+    :param documents: iterable of the documents to preprocess
+    :return: generator over the preprocessed documents
+    """
+    for document in documents:
+        for preprocessing_step in preprocessing_steps:
+            document = preprocessing_step.transform_document(document)
+        yield document
+
+
+def _transform_steps(preprocessing_steps, documents, token_corpus=False):
+    """
+    Transforms documents with one preprocessing step after another.
+    :param preprocessing_steps: the preprocessing steps
+    :param documents: the documents to preprocess
+    :param token_corpus: whether tokenized documents are converted into a TokenCorpus, default False
+    :return: the preprocessed documents
+    """
+    transformed_documents = documents
+    for preprocessing_step in preprocessing_steps:
+        transformed_documents = preprocessing_step.transform(transformed_documents)
+        if token_corpus:
+            transformed_documents = _to_token_corpus(transformed_documents)
+    return transformed_documents
+
+
+# the preprocessing pipeline of a worker process, its executed steps are created once per worker process
+_worker_pipeline = None
+
+
+def _initialize_worker(pipeline):
+    """
+    Receives the preprocessing pipeline once when a worker process is started.
+    :param pipeline: the preprocessing pipeline
+    """
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+
+def _transform_chunk(task):
+    """
+    Transforms a chunk of documents in a worker process.
+    :param task: tuple with the index of the first preprocessing step of the executed steps, the slice of the executed
+                 steps which transform the documents and the documents to preprocess
+    :return: list with the preprocessed documents or a TokenCorpus with them
+    """
+    start, step_slice, documents = task
+    execution_steps = _worker_pipeline._get_execution_steps(start)[0][step_slice]
+    token_corpus = _worker_pipeline._token_corpus
+    if _worker_pipeline._fused:
+        transformed_documents = _transform_fused(execution_steps, documents)
+        if token_corpus:
+            return _collect(transformed_documents, True)
+        return list(transformed_documents)
+    transformed_documents = _transform_steps(execution_steps, documents, token_corpus)
+    if isinstance(transformed_documents, TokenCorpus):
+        return transformed_documents
+    return list(transformed_documents)
@@ -5,9 +5,9 @@ https://github.com/chartbeat-labs/textacy
 For fruther informations to the preprocessing methods see:
 https://github.com/chartbeat-labs/textacy/blob/master/textacy/preprocess.py
 """
-from textacy import preprocess
+from textacy import constants, preprocess
 
-from .preprocess import PreprocessBase
+from .preprocess import PreprocessBase, RegexPreprocessBase, TokenPreprocessBase
 
 
 class UnpackContractions(PreprocessBase):
@@ -28,7 +28,7 @@ class NormalizeWhitespace(PreprocessBase):
         return [preprocess.normalize_whitespace(token) for token in tokens]
 
 
-class ReplaceUrls(PreprocessBase):
+class ReplaceUrls(RegexPreprocessBase):
     """Replaces urls with the specified _substitution"""
     def __init__(self, replace_with=''):
         """:param replace_with: the _substitution"""
@@ -40,8 +40,12 @@ class ReplaceUrls(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.replace_urls(token, replace_with=self._replace_with) for token in tokens]
 
+    def regex_rules(self):
+        # textacy replaces the short urls first
+        return [(constants.SHORT_URL_REGEX, self._replace_with), (constants.URL_REGEX, self._replace_with)]
 
-class ReplaceEMails(PreprocessBase):
+
+class ReplaceEMails(RegexPreprocessBase):
     """Replaces email adresses with the specified _substitution"""
     def __init__(self, replace_with=''):
         """:param replace_with: the _substitution"""
@@ -53,8 +57,11 @@ class ReplaceEMails(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.replace_emails(token, replace_with=self._replace_with) for token in tokens]
 
+    def regex_rules(self):
+        return [(constants.EMAIL_REGEX, self._replace_with)]
+
 
-class ReplacePhoneNumbers(PreprocessBase):
+class ReplacePhoneNumbers(RegexPreprocessBase):
     """Replaces phone numbers with the specified _substitution"""
     def __init__(self, replace_with=''):
         """:param replace_with: the _substitution"""
@@ -66,8 +73,11 @@ class ReplacePhoneNumbers(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.replace_phone_numbers(token, replace_with=self._replace_with) for token in tokens]
 
+    def regex_rules(self):
+        return [(constants.PHONE_REGEX, self._replace_with)]
 
-class ReplaceNumbers(PreprocessBase):
+
+class ReplaceNumbers(RegexPreprocessBase):
     """Replaces numbers with the specified _substitution"""
     def __init__(self, replace_with=''):
         """:param replace_with: the _substitution"""
@@ -79,8 +89,11 @@ class ReplaceNumbers(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.replace_numbers(token, replace_with=self._replace_with) for token in tokens]
 
+    def regex_rules(self):
+        return [(constants.NUMBERS_REGEX, self._replace_with)]
+
 
-class RemovePunct(PreprocessBase):
+class RemovePunct(TokenPreprocessBase):
     """Replaces the punctuation symbols with empty strings."""
     def transform_string(self, text):
         return preprocess.remove_punct(text)
@@ -93,8 +106,14 @@ class RemovePunct(PreprocessBase):
                 transformed_tokens.append(token)
         return transformed_tokens
 
+    def transform_token(self, token):
+        token = preprocess.remove_punct(token)
+        if token != '':
+            return token
+        return None
 
-class ReplaceCurrencySymbols(PreprocessBase):
+
+class ReplaceCurrencySymbols(RegexPreprocessBase):
     """Replaces currency symbols with the specified _substitution"""
     def __init__(self, replace_with=None):
         """:param replace_with: the _substitution"""
@@ -106,8 +125,14 @@ class ReplaceCurrencySymbols(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.replace_currency_symbols(token, replace_with=self._replace_with) for token in tokens]
 
+    def regex_rules(self):
+        # without a substitution textacy replaces every symbol with its currency code instead of using a regex
+        if self._replace_with is None:
+            return None
+        return [(constants.CURRENCY_REGEX, self._replace_with)]
+
 
-class RemoveAccents(PreprocessBase):
+class RemoveAccents(TokenPreprocessBase):
     def __init__(self, method='unicode'):
         self._method = method
 
@@ -117,6 +142,9 @@ class RemoveAccents(PreprocessBase):
     def transform_tokens(self, tokens):
         return [preprocess.remove_accents(token, self._method) for token in tokens]
 
+    def transform_token(self, token):
+        return preprocess.remove_accents(token, self._method)
+
 
 class FixBadUnicode(PreprocessBase):
     def __init__(self, normalization='NFC'):
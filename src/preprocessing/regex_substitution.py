@@ -1,11 +1,12 @@
-from .preprocess import PreprocessBase
 import re
 
+from .preprocess import PreprocessBase, RegexPreprocessBase
+
 """
 Marco Link
 """
 
-class RegexSubstitution(PreprocessBase):
+class RegexSubstitution(RegexPreprocessBase):
     """Class for finding regular expressions and replace it with a specific _substitution"""
 
     def __init__(self, regex, substitution):
@@ -13,12 +14,100 @@ class RegexSubstitution(PreprocessBase):
         :param regex: the regular expression to search for
         :param substitution: the replacing string
         """
-        self._regex = regex
+        # https://docs.python.org/3/library/re.html
+        self._regex = re.compile(regex)
         self._substitution = substitution
 
     def transform_string(self, text):
-        # https://docs.python.org/3/library/re.html
-        return re.sub(self._regex, self._substitution, text)
+        return self._regex.sub(self._substitution, text)
+
+    def transform_tokens(self, tokens):
+        return [self._regex.sub(self._substitution, token) for token in tokens]
+
+    def regex_rules(self):
+        return [(self._regex, self._substitution)]
+
+
+class FusedRegexSubstitution(PreprocessBase):
+    """
+    Applies the substitution rules of consecutive regex based preprocessing steps with the same result as one rule
+    after another.
+    The patterns of consecutive rules are combined into one alternation, which is searched once in a text. If none of
+    the patterns matches, no rule changes the text and it is returned after this one pass, else the rules are applied
+    one after another. Replacing the matches of all rules with the alternation itself would change the result of rules
+    which interact, for example if a rule matches the replacement of a previous rule. Patterns which can not be part of
+    an alternation, for example because of backreferences, are applied with a pass of their own.
+    """
+
+    # the flags which can be scoped to a single alternative with (?flags:...)
+    _scoped_flags = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+
+    def __init__(self, rules):
+        """:param rules: list of tuples with the compiled pattern and the replacement string in order of application"""
+        # tuples with the combined pattern, None if the rules are always applied, and the rules
+        self._passes = []
+        fusable_rules = []
+        for pattern, replacement in rules:
+            if self._is_fusable(pattern):
+                fusable_rules.append((pattern, replacement))
+                continue
+            self._add_fused_pass(fusable_rules)
+            fusable_rules = []
+            self._passes.append((None, [(pattern, replacement)]))
+        self._add_fused_pass(fusable_rules)
+
+    def transform_string(self, text):
+        for combined_pattern, rules in self._passes:
+            if combined_pattern is not None and combined_pattern.search(text) is None:
+                continue
+            for pattern, replacement in rules:
+                text = pattern.sub(replacement, text)
+        return text
 
     def transform_tokens(self, tokens):
-        return [re.sub(self._regex, self._substitution, token) for token in tokens]
\ No newline at end of file
+        return [self.transform_string(token) for token in tokens]
+
+    def _add_fused_pass(self, rules):
+        """
+        Combines the patterns of the rules into one alternation and adds it with the rules to the passes.
+        :param rules: list of tuples with the compiled pattern and the replacement string
+        """
+        if len(rules) == 0:
+            return
+        if len(rules) == 1:
+            self._passes.append((None, rules))
+            return
+
+        try:
+            combined_pattern = re.compile('|'.join('(?:' + self._scoped_pattern(pattern) + ')'
+                                                   for pattern, replacement in rules))
+        except re.error:
+            combined_pattern = None
+        self._passes.append((combined_pattern, rules))
+
+    def _is_fusable(self, pattern):
+        """
+        :param pattern: the compiled pattern of a rule
+        :return: True if the pattern can be part of an alternation without changing its meaning
+        """
+        if not isinstance(pattern.pattern, str):
+            return False
+        remaining_flags = pattern.flags & ~re.UNICODE
+        for flag in self._scoped_flags:
+            remaining_flags &= ~flag
+        if remaining_flags != 0:
+            return False
+        # backreferences, conditional groups and global inline flags depend on the position in the pattern
+        if re.search(r'\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)', pattern.pattern):
+            return False
+        return True
+
+    def _scoped_pattern(self, pattern):
+        """
+        :param pattern: the compiled pattern
+        :return: the pattern string with its flags scoped to it
+        """
+        flags = ''.join(letter for flag, letter in self._scoped_flags.items() if pattern.flags & flag)
+        if flags == '':
+            return pattern.pattern
+        return '(?' + flags + ':' + pattern.pattern + ')'
@@ -1,16 +1,16 @@
-from .preprocess import PreprocessBase
+from .preprocess import TokenPreprocessBase
 from nltk.corpus import stopwords
 
 """
 Marco Link
 """
 
-class CustomStopwords(PreprocessBase):
+class CustomStopwords(TokenPreprocessBase):
     """Class for removing stopwords"""
 
     def __init__(self, path_to_stop_list):
         """:param path_to_stop_list: the path to an existing text file which contains stopwords"""
-        self._stop_list = stopwords.words(path_to_stop_list)
+        self._stop_list = frozenset(stopwords.words(path_to_stop_list))
 
     def transform_string(self, text):
         word_list = text.split()
@@ -27,9 +27,14 @@ class CustomStopwords(PreprocessBase):
                 new_token_list.append(token)
         return new_token_list
 
+    def transform_token(self, token):
+        if token.lower() in self._stop_list:
+            return None
+        return token
+
 
 class EnglishStopwords(CustomStopwords):
     """Class for removing english stopwords."""
 
     def __init__(self):
-        self._stop_list = stopwords.words('english')
+        self._stop_list = frozenset(stopwords.words('english'))
@@ -1,5 +1,7 @@
-from textblob import TextBlob
-from .preprocess import PreprocessBase
+from functools import lru_cache
+import os
+
+from .preprocess import PreprocessBase, TokenPreprocessBase
 
 """
 Marco Link
@@ -10,9 +12,198 @@ class CorrectEnglishSpelling(PreprocessBase):
     Class for applying english spelling correction with TextBlob
     https://textblob.readthedocs.io/en/dev/
     """
+
+    def __init__(self):
+        # imported here, TextBlob is only needed for this preprocessing step
+        from textblob import TextBlob
+        self._text_blob = TextBlob
+
     # very slow for many documents!
     def transform_string(self, text):
-        return TextBlob(text).correct()
+        return self._text_blob(text).correct()
+
+    def transform_tokens(self, tokens):
+        return [self._text_blob(token).correct() for token in tokens]
+
+
+class SymSpellCorrection(TokenPreprocessBase):
+    """
+    Class for spelling correction with the symmetric delete algorithm.
+    For every word of the frequency dictionary all deletes up to the maximum edit distance are precomputed, so the
+    candidates for a token are found with the deletes of the token instead of generating all possible edits.
+    A token is replaced with the dictionary word with the smallest edit distance, for equal distances with the most
+    frequent one. Tokens which are in the dictionary, contain other characters than letters or have no candidate stay
+    unchanged. The corrections are cached, so every distinct token is looked up only once.
+    https://github.com/wolfgarbe/SymSpell
+    """
+
+    def __init__(self, path, max_edit_distance=2, prefix_length=7, cache_size=65536, encoding='utf-8'):
+        """
+        :param path: the path to the frequency dictionary, every line contains a word and its count separated by a
+                     whitespace
+        :param max_edit_distance: the maximum edit distance between a token and its correction, default 2
+        :param prefix_length: the length of the word prefixes the deletes are computed for, default 7
+        :param cache_size: the amount of corrections which are cached, default 65536
+        :param encoding: the encoding of the frequency dictionary, default 'utf-8'
+        """
+        self._path = path
+        self._max_edit_distance = max_edit_distance
+        self._prefix_length = prefix_length
+        self._cache_size = cache_size
+        self._word_counts = {}
+        self._deletes = {}
+        self._max_word_length = 0
+
+        with open(path, encoding=encoding) as dictionary_file:
+            for line in dictionary_file:
+                entry = line.split()
+                if len(entry) < 2:
+                    continue
+                try:
+                    count = int(entry[1])
+                except ValueError:
+                    continue
+                self._add_word(entry[0], count)
+
+        self._correct = lru_cache(maxsize=self._cache_size)(self._lookup)
+
+    def __getstate__(self):
+        # the cache can't be pickled, it is created again in every process
+        state = self.__dict__.copy()
+        del state['_correct']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._correct = lru_cache(maxsize=self._cache_size)(self._lookup)
+
+    def fingerprint_state(self):
+        # the index is derived from the frequency dictionary
+        stat = os.stat(self._path)
+        return self._path, stat.st_size, stat.st_mtime_ns, self._max_edit_distance, self._prefix_length
+
+    def transform_string(self, text):
+        return " ".join(self.transform_tokens(text.split()))
 
     def transform_tokens(self, tokens):
-        return [TextBlob(token).correct() for token in tokens]
+        return [self._correct(token) for token in tokens]
+
+    def transform_token(self, token):
+        return self._correct(token)
+
+    def _add_word(self, word, count):
+        """
+        Adds a word of the frequency dictionary and the deletes of its prefix to the index.
+        :param word: the word
+        :param count: the frequency of the word
+        """
+        if word in self._word_counts:
+            self._word_counts[word] += count
+            return
+        self._word_counts[word] = count
+        self._max_word_length = max(self._max_word_length, len(word))
+        for delete in self._prefix_deletes(word):
+            self._deletes.setdefault(delete, []).append(word)
+
+    def _prefix_deletes(self, word):
+        """
+        :param word: the word
+        :return: set with the prefix of the word and all strings with up to max_edit_distance characters deleted from it
+        """
+        prefix = word[:self._prefix_length]
+        deletes = {prefix}
+        current_deletes = [prefix]
+        for _ in range(self._max_edit_distance):
+            next_deletes = []
+            for current in current_deletes:
+                for i in range(len(current)):
+                    delete = current[:i] + current[i + 1:]
+                    if delete not in deletes:
+                        deletes.add(delete)
+                        next_deletes.append(delete)
+            current_deletes = next_deletes
+        return deletes
+
+    def _lookup(self, token):
+        """
+        :param token: the token to correct
+        :return: the corrected token
+        """
+        if token in self._word_counts or not token.isalpha() or \
+                len(token) - self._max_word_length > self._max_edit_distance:
+            return token
+
+        best_word = None
+        best_distance = self._max_edit_distance + 1
+        best_count = 0
+        checked_words = set()
+        prefix = token[:self._prefix_length]
+        # the deletes of the token prefix are generated level by level, a delete with more deleted characters than the
+        # best distance found so far can't lead to a closer word
+        current_deletes = [prefix]
+        checked_deletes = {prefix}
+        for level in range(self._max_edit_distance + 1):
+            if level > best_distance:
+                break
+            next_deletes = []
+            for delete in current_deletes:
+                for word in self._deletes.get(delete, ()):
+                    if word in checked_words:
+                        continue
+                    checked_words.add(word)
+                    if abs(len(word) - len(token)) > best_distance:
+                        continue
+                    distance = _edit_distance(token, word, best_distance)
+                    count = self._word_counts[word]
+                    if distance < best_distance or (distance == best_distance and count > best_count):
+                        best_word = word
+                        best_distance = distance
+                        best_count = count
+                for i in range(len(delete)):
+                    next_delete = delete[:i] + delete[i + 1:]
+                    if next_delete not in checked_deletes:
+                        checked_deletes.add(next_delete)
+                        next_deletes.append(next_delete)
+            current_deletes = next_deletes
+
+        if best_word is None:
+            return token
+        return best_word
+
+
+def _edit_distance(source, target, max_distance):
+    """
+    Computes the optimal string alignment distance, a Damerau-Levenshtein distance where no substring is edited twice.
+    :param source: the first string
+    :param target: the second string
+    :param max_distance: distances above it aren't needed exactly
+    :return: the distance or max_distance + 1 if the distance is greater than max_distance
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+    # a common prefix and suffix don't change the distance
+    start = 0
+    while start < len(source) and start < len(target) and source[start] == target[start]:
+        start += 1
+    end = 0
+    while end < len(source) - start and end < len(target) - start and source[-1 - end] == target[-1 - end]:
+        end += 1
+    source = source[start:len(source) - end]
+    target = target[start:len(target) - end]
+    if len(source) == 0 or len(target) == 0:
+        return min(max(len(source), len(target)), max_distance + 1)
+
+    previous_previous_row = None
+    previous_row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        row = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]:
+                row[j] = min(row[j], previous_previous_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+        previous_previous_row = previous_row
+        previous_row = row
+    return min(previous_row[-1], max_distance + 1)
@@ -1,12 +1,12 @@
 from nltk import stem
 
-from preprocessing.preprocess import PreprocessBase
+from preprocessing.preprocess import TokenPreprocessBase
 
 """
 Marco Link
 """
 
-class PorterStemmer(PreprocessBase):
+class PorterStemmer(TokenPreprocessBase):
     """Class for applying the Porter stemmer."""
     def __init__(self):
         self._stemmer = stem.PorterStemmer()
@@ -17,7 +17,10 @@ class PorterStemmer(PreprocessBase):
     def transform_tokens(self, tokens):
         return [self._stemmer.stem(token) for token in tokens]
 
-class GermanStemmer(PreprocessBase):
+    def transform_token(self, token):
+        return self._stemmer.stem(token)
+
+class GermanStemmer(TokenPreprocessBase):
     """Class for applying the german stemmer from nltk."""
     def __init__(self):
         self._stemmer = stem.snowball.GermanStemmer()
@@ -27,3 +30,6 @@ class GermanStemmer(PreprocessBase):
 
     def transform_tokens(self, tokens):
         return [self._stemmer.stem(token) for token in tokens]
+
+    def transform_token(self, token):
+        return self._stemmer.stem(token)
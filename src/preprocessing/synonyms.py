@@ -1,12 +1,13 @@
 import csv
+import heapq
 
-from preprocessing.preprocess import PreprocessBase
+from preprocessing.preprocess import PreprocessBase, TokenPreprocessBase
 
 """
 Marco Link
 """
 
-class SimpleSynonyms(PreprocessBase):
+class SimpleSynonyms(TokenPreprocessBase):
     """
     Class for replacing words with its specified synonyms.
     The synonyms has to be defined in a file.
@@ -44,6 +45,9 @@ class SimpleSynonyms(PreprocessBase):
                 new_tokens.append(token)
         return new_tokens
 
+    def transform_token(self, token):
+        return self._synonyms.get(token, token)
+
 
 class ContextSynonyms(PreprocessBase):
     """
@@ -72,7 +76,8 @@ class ContextSynonyms(PreprocessBase):
 
     def transform_tokens(self, tokens):
         new_tokens = tokens
-        indizes_to_remove = []
+        # a set, the membership of every index is checked for every token
+        indizes_to_remove = set()
 
         found_before = False
         found_after = False
@@ -96,7 +101,7 @@ class ContextSynonyms(PreprocessBase):
                                     found_before = True
                                     # for descendants context synonyms this word shouldn't be used and has to be
                                     # removed at the end
-                                    indizes_to_remove.append(index_words_before)
+                                    indizes_to_remove.add(index_words_before)
                                     break
                             index_words_before -= 1
                     else:
@@ -109,7 +114,7 @@ class ContextSynonyms(PreprocessBase):
                                     found_before = True
                                     # for descendants context synonyms this word shouldn't be used and has to be
                                     # removed at the end
-                                    indizes_to_remove.append(index - self._before + index_words_before)
+                                    indizes_to_remove.add(index - self._before + index_words_before)
                                     break
                             index_words_before -= 1
 
@@ -125,7 +130,7 @@ class ContextSynonyms(PreprocessBase):
                                             found_after = True
                                             # for descendants context synonyms this word shouldn't be used and has
                                             # to be removed at the end
-                                            indizes_to_remove.append(index + 1 + index_words_after)
+                                            indizes_to_remove.add(index + 1 + index_words_after)
                                             break
                                     index_words_after += 1
                         else:
@@ -138,7 +143,7 @@ class ContextSynonyms(PreprocessBase):
                                         found_after = True
                                         # for descendants context synonyms this word shouldn't be used and has to be
                                         # removed at the end
-                                        indizes_to_remove.append(index + 1 + index_words_after)
+                                        indizes_to_remove.add(index + 1 + index_words_after)
                                         break
                                 index_words_after += 1
 
@@ -148,3 +153,71 @@ class ContextSynonyms(PreprocessBase):
 
         # return new tokens list, but without the found context words
         return [new_tokens[i] for i in range(len(new_tokens)) if i not in indizes_to_remove]
+
+
+class ContextSynonymsEngine(PreprocessBase):
+    """
+    Class for applying many context synonym rules with the same result as one ContextSynonyms step per rule in the
+    given order.
+    A ContextSynonyms step only changes a document which contains one of its main words, so the rules are indexed by
+    their main words and only the rules whose main words occur in a document are applied to it. A substitution can be a
+    main word of a later rule, so the later rules of the substitution are applied as well.
+    """
+
+    def __init__(self, rules):
+        """
+        :param rules: list of tuples with the main words, the context words, how far before and how far after the main
+                      words should be searched and the substitution
+        """
+        self._steps = []
+        # the tokens which the substitution of a rule can introduce, as one token and split if the documents are strings
+        self._substitution_words = []
+        # whether the substitution of a rule is split into multiple tokens, if the documents are strings
+        self._splits_substitution = []
+        self._rule_indexes_by_word = {}
+        for rule_index, (main_words, context_words, before, after, substitution) in enumerate(rules):
+            self._steps.append(ContextSynonyms(main_words, context_words, before, after, substitution))
+            if isinstance(substitution, str):
+                self._substitution_words.append(set(substitution.split()) | {substitution})
+                self._splits_substitution.append(len(substitution.split()) > 1)
+            else:
+                self._substitution_words.append(set())
+                self._splits_substitution.append(False)
+            for main_word in main_words:
+                self._rule_indexes_by_word.setdefault(main_word, []).append(rule_index)
+
+    def transform_string(self, text: str):
+        return " ".join(self._transform(text.split(), True))
+
+    def transform_tokens(self, tokens):
+        # ContextSynonyms changes the given tokens
+        return self._transform(list(tokens), False)
+
+    def _transform(self, tokens, split_substitutions):
+        """
+        Applies the rules whose main words occur in the tokens in their order.
+        :param tokens: the tokens of the document, they are changed
+        :param split_substitutions: whether substitutions are split into tokens like in ContextSynonyms.transform_string
+        :return: the transformed tokens
+        """
+        queued_rules = set()
+        for token in set(tokens):
+            queued_rules.update(self._rule_indexes_by_word.get(token, ()))
+        if len(queued_rules) == 0:
+            return tokens
+        # every rule is applied at most once in the order of the rules
+        pending_rules = list(queued_rules)
+        heapq.heapify(pending_rules)
+
+        while len(pending_rules) > 0:
+            rule_index = heapq.heappop(pending_rules)
+            tokens = self._steps[rule_index].transform_tokens(tokens)
+            if split_substitutions and self._splits_substitution[rule_index]:
+                tokens = " ".join(tokens).split()
+            # the substitution can be a main word of a later rule
+            for word in self._substitution_words[rule_index]:
+                for later_rule_index in self._rule_indexes_by_word.get(word, ()):
+                    if later_rule_index > rule_index and later_rule_index not in queued_rules:
+                        queued_rules.add(later_rule_index)
+                        heapq.heappush(pending_rules, later_rule_index)
+        return tokens
@@ -0,0 +1,119 @@
+from array import array
+
+import numpy
+
+"""
+Marco Link
+"""
+
+class TokenCorpus:
+    """
+    Compact representation of tokenized documents.
+    Every distinct token is stored once in the vocabulary, the documents are stored as one int32 array with the ids of
+    their tokens. The tokens of the document i are data[offsets[i]:offsets[i + 1]].
+    Indexing and iterating return the documents as lists of tokens, so a token corpus can be used like a collection
+    of tokenized documents.
+    """
+
+    def __init__(self, vocabulary, data, offsets):
+        """
+        :param vocabulary: list with the tokens, the index of a token is its id
+        :param data: numpy int32 array with the token ids of all documents one after another
+        :param offsets: numpy int64 array with the start of every document in data and the length of data at the end
+        """
+        self.vocabulary = vocabulary
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_documents(cls, documents):
+        """
+        :param documents: iterable of documents as collections of tokens
+        :return: the token corpus of the documents
+        """
+        token_ids = {}
+        data = array('i')
+        offsets = array('q', [0])
+        for document in documents:
+            for token in document:
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = len(token_ids)
+                    token_ids[token] = token_id
+                data.append(token_id)
+            offsets.append(len(data))
+        return cls(list(token_ids), numpy.frombuffer(data, dtype=numpy.int32),
+                   numpy.frombuffer(offsets, dtype=numpy.int64))
+
+    @classmethod
+    def concatenate(cls, corpora):
+        """
+        :param corpora: list of token corpora
+        :return: one token corpus with the documents of all corpora in the given order
+        """
+        token_ids = {}
+        data = []
+        offsets = [numpy.zeros(1, dtype=numpy.int64)]
+        length = 0
+        for corpus in corpora:
+            new_ids = numpy.array([token_ids.setdefault(token, len(token_ids)) for token in corpus.vocabulary],
+                                  dtype=numpy.int32)
+            data.append(new_ids[corpus.data])
+            offsets.append(corpus.offsets[1:] - corpus.offsets[0] + length)
+            length += len(corpus.data)
+        if len(data) == 0:
+            return cls([], numpy.zeros(0, dtype=numpy.int32), offsets[0])
+        return cls(list(token_ids), numpy.concatenate(data), numpy.concatenate(offsets))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        :param index: the index of a document or a slice
+        :return: the document as list of tokens or a token corpus with the sliced documents
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return TokenCorpus.from_documents(self[i] for i in range(start, stop, step))
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop + 1]
+            return TokenCorpus(self.vocabulary, self.data[offsets[0]:offsets[-1]], offsets - offsets[0])
+        if index < 0:
+            index += len(self)
+        vocabulary = self.vocabulary
+        return [vocabulary[token_id] for token_id in self.data[self.offsets[index]:self.offsets[index + 1]].tolist()]
+
+    def __iter__(self):
+        """:return: generator over the documents as lists of tokens"""
+        vocabulary = self.vocabulary
+        data = self.data.tolist()
+        offsets = self.offsets.tolist()
+        for i in range(len(offsets) - 1):
+            yield [vocabulary[token_id] for token_id in data[offsets[i]:offsets[i + 1]]]
+
+    def map_tokens(self, function):
+        """
+        Transforms every token of the vocabulary once and rewrites the documents with the transformed tokens.
+        :param function: function which transforms a token, returns None if the token should be removed
+        :return: the token corpus with the transformed tokens
+        """
+        token_ids = {}
+        new_ids = numpy.empty(len(self.vocabulary), dtype=numpy.int32)
+        for old_id, token in enumerate(self.vocabulary):
+            new_token = function(token)
+            if new_token is None:
+                new_ids[old_id] = -1
+            else:
+                new_ids[old_id] = token_ids.setdefault(new_token, len(token_ids))
+
+        data = new_ids[self.data]
+        offsets = self.offsets
+        if len(data) > 0 and data.min() < 0:
+            kept = data >= 0
+            # the new offset of a document is the amount of kept tokens before it
+            kept_before = numpy.concatenate(([0], numpy.cumsum(kept)))
+            offsets = kept_before[offsets - offsets[0]]
+            data = data[kept]
+        return TokenCorpus(list(token_ids), data, offsets)
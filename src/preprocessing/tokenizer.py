@@ -14,6 +14,10 @@ class Whitespace_Tokenizer(PreprocessBase):
     def __init__(self):
         self._tokenizer = WhitespaceTokenizer()
 
+    def __reduce__(self):
+        # the tokenizer of NLTK is created again when unpickled, so saved pipelines don't depend on its internals
+        return self.__class__, ()
+
     def transform_string(self, text):
         return self._tokenizer.tokenize(text)
 
@@ -31,6 +35,10 @@ class PennTreebankWordTokenizer(PreprocessBase):
     def __init__(self):
         self._tokenizer = TreebankWordTokenizer()
 
+    def __reduce__(self):
+        # the tokenizer of NLTK is created again when unpickled, so saved pipelines don't depend on its internals
+        return self.__class__, ()
+
     def transform_string(self, text):
         return self._tokenizer.tokenize(text)
 
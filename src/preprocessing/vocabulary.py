@@ -0,0 +1,71 @@
+from .preprocess import PreprocessBase
+from .token_corpus import TokenCorpus
+
+"""
+Marco Link
+"""
+
+class VocabularyPreprocessing(PreprocessBase):
+    """
+    Executes consecutive token-local preprocessing steps once per distinct token.
+    Every distinct token is transformed with all steps when it occurs for the first time, the result is kept in the
+    vocabulary and the documents are rewritten with lookups in the vocabulary. Strings are transformed step by step,
+    because the string transformations of the steps are not necessarily token-local.
+    """
+
+    def __init__(self, token_steps):
+        """:param token_steps: list with the token-local preprocessing steps in the order of execution"""
+        self._token_steps = token_steps
+        # maps every distinct token to its transformed token, None if the token is removed
+        self._vocabulary = {}
+
+    def transform(self, documents):
+        if isinstance(documents, TokenCorpus):
+            return documents.map_tokens(self._lookup)
+        if len(documents) > 0 and isinstance(documents[0], str):
+            transformed_documents = documents
+            for token_step in self._token_steps:
+                transformed_documents = token_step.transform(transformed_documents)
+            return transformed_documents
+        return super().transform(documents)
+
+    def transform_string(self, text):
+        for token_step in self._token_steps:
+            text = token_step.transform_string(text)
+        return text
+
+    def transform_tokens(self, tokens):
+        vocabulary = self._vocabulary
+        new_tokens = []
+        for token in tokens:
+            if token in vocabulary:
+                transformed_token = vocabulary[token]
+            else:
+                transformed_token = self._transform_token(token)
+                vocabulary[token] = transformed_token
+            if transformed_token is not None:
+                new_tokens.append(transformed_token)
+        return new_tokens
+
+    def _lookup(self, token):
+        """
+        :param token: the token
+        :return: the transformed token from the vocabulary, transformed and added to it if it is unknown
+        """
+        if token in self._vocabulary:
+            return self._vocabulary[token]
+        transformed_token = self._transform_token(token)
+        self._vocabulary[token] = transformed_token
+        return transformed_token
+
+    def _transform_token(self, token):
+        """
+        Transforms a token with all token-local preprocessing steps.
+        :param token: the token to transform
+        :return: the transformed token or None if one of the steps removed the token
+        """
+        for token_step in self._token_steps:
+            token = token_step.transform_token(token)
+            if token is None:
+                break
+        return token
@@ -0,0 +1,90 @@
+import numpy
+import scipy.sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+"""
+Marco Link
+"""
+
+class Reduction(TransformerMixin, BaseEstimator):
+    """
+    Reduces the dimensions of the term document matrix before clustering and normalizes the reduced document vectors.
+    The reduced matrix has the dtype of the term document matrix.
+    """
+
+    def __init__(self, reducer, normalize=True):
+        """
+        :param reducer: the transformer which reduces the dimensions, e.g. TruncatedSVD for LSA
+        :param normalize: whether the reduced document vectors are normalized to unit length
+        """
+        self.reducer = reducer
+        self.normalize = normalize
+
+    def fit_transform(self, term_document_matrix, y=None):
+        """
+        :param term_document_matrix: the term document matrix
+        :param y: ignored
+        :return: the reduced matrix
+        """
+        return self._normalize(self.reducer.fit_transform(term_document_matrix), term_document_matrix.dtype)
+
+    def fit(self, term_document_matrix, y=None):
+        self.fit_transform(term_document_matrix)
+        return self
+
+    def transform(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix
+        :return: the reduced matrix
+        """
+        return self._normalize(self.reducer.transform(term_document_matrix), term_document_matrix.dtype)
+
+    def _normalize(self, reduced_matrix, dtype):
+        """
+        :param reduced_matrix: the reduced matrix
+        :param dtype: the dtype of the term document matrix
+        :return: the normalized reduced matrix in the given dtype
+        """
+        reduced_matrix = reduced_matrix.astype(dtype, copy=False)
+        if self.normalize:
+            reduced_matrix = normalize(reduced_matrix, copy=False)
+        return reduced_matrix
+
+
+class ColumnHashing(TransformerMixin, BaseEstimator):
+    """
+    Reduces the dimensions of a term document matrix by adding up its columns in n_components buckets, like feature
+    hashing. The bucket and the sign of a column are derived from the murmurhash of its index, the signs keep the
+    inner products of the documents unbiased.
+    """
+
+    def __init__(self, n_components=100):
+        """:param n_components: the amount of columns of the reduced matrix"""
+        self.n_components = n_components
+
+    def fit_transform(self, term_document_matrix, y=None):
+        """
+        :param term_document_matrix: the term document matrix
+        :param y: ignored
+        :return: the sparse reduced matrix
+        """
+        self.n_features_in_ = term_document_matrix.shape[1]
+        return self.transform(term_document_matrix)
+
+    def fit(self, term_document_matrix, y=None):
+        self.n_features_in_ = term_document_matrix.shape[1]
+        return self
+
+    def transform(self, term_document_matrix):
+        """
+        :param term_document_matrix: the term document matrix with the columns of the fitted matrix
+        :return: the sparse reduced matrix
+        """
+        hashes = murmurhash3_32(numpy.arange(self.n_features_in_, dtype=numpy.int32), seed=0).astype(numpy.int64)
+        buckets = numpy.abs(hashes) % self.n_components
+        signs = numpy.where(hashes >= 0, 1, -1).astype(term_document_matrix.dtype)
+        projection = scipy.sparse.csr_matrix((signs, buckets, numpy.arange(self.n_features_in_ + 1)),
+                                             shape=(self.n_features_in_, self.n_components))
+        return scipy.sparse.csr_matrix(term_document_matrix @ projection)
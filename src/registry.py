@@ -0,0 +1,114 @@
+import importlib
+
+"""
+Marco Link
+"""
+
+class Registry:
+    """
+    Maps the names used in the config files to classes, which are given as 'module:ClassName'.
+    A module is imported when one of its classes is used for the first time, so config files which don't use heavy
+    dependencies like textacy, NLTK or matplotlib don't import them.
+    """
+
+    def __init__(self, entries):
+        """:param entries: dictionary with the names and the classes as 'module:ClassName'"""
+        self._entries = dict(entries)
+        self._classes = {}
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def get(self, name):
+        """
+        :param name: the name of the class in the config file
+        :return: the class, the module is imported if it isn't yet
+        """
+        if name not in self._classes:
+            if name not in self._entries:
+                raise KeyError('Unknown entry: ' + str(name))
+            module_name, class_name = self._entries[name].split(':')
+            self._classes[name] = getattr(importlib.import_module(module_name), class_name)
+        return self._classes[name]
+
+    def create(self, name, *args, **kwargs):
+        """
+        :param name: the name of the class in the config file
+        :param args: the arguments for the initialization
+        :param kwargs: the keyword arguments for the initialization
+        :return: a new object of the class
+        """
+        return self.get(name)(*args, **kwargs)
+
+
+# the preprocessing steps by their keys or values in the [PREPROCESSING] section
+PREPROCESSING_STEPS = Registry({
+    'PTBTokenizer': 'preprocessing.tokenizer:PennTreebankWordTokenizer',
+    'WhitespaceTokenizer': 'preprocessing.tokenizer:Whitespace_Tokenizer',
+    'lowercase': 'preprocessing.preprocess:ToLowercase',
+    'remove_punctuation': 'preprocessing.preprocessing_with_textacy:RemovePunct',
+    'unpack_contractions': 'preprocessing.preprocessing_with_textacy:UnpackContractions',
+    'normalize_whitespace': 'preprocessing.preprocessing_with_textacy:NormalizeWhitespace',
+    'remove_urls': 'preprocessing.preprocessing_with_textacy:ReplaceUrls',
+    'remove_emails': 'preprocessing.preprocessing_with_textacy:ReplaceEMails',
+    'remove_phone_numbers': 'preprocessing.preprocessing_with_textacy:ReplacePhoneNumbers',
+    'remove_numbers': 'preprocessing.preprocessing_with_textacy:ReplaceNumbers',
+    'remove_currency_symbols': 'preprocessing.preprocessing_with_textacy:ReplaceCurrencySymbols',
+    'remove_accents': 'preprocessing.preprocessing_with_textacy:RemoveAccents',
+    'fix_bad_unicode': 'preprocessing.preprocessing_with_textacy:FixBadUnicode',
+    'correct_english_spelling_errors': 'preprocessing.spelling_correction:CorrectEnglishSpelling',
+    'spelling_dictionary': 'preprocessing.spelling_correction:SymSpellCorrection',
+    'PorterStemmer': 'preprocessing.stemmer:PorterStemmer',
+    'GermanStemmer': 'preprocessing.stemmer:GermanStemmer',
+    'remove_english_stopwords': 'preprocessing.remove_stopwords:EnglishStopwords',
+    'CUSTOMSTOPWORDS': 'preprocessing.remove_stopwords:CustomStopwords',
+    'SYNONYMS': 'preprocessing.synonyms:SimpleSynonyms',
+    'COLLOCATIONS': 'preprocessing.tokenizer:MultiWordTokenizer',
+    'CONTEXT-SYNONYMS': 'preprocessing.synonyms:ContextSynonymsEngine',
+    'REGEX-SUBSTITUTIONS': 'preprocessing.regex_substitution:RegexSubstitution',
+})
+
+# the readers by the input_type in the [INPUT] section
+READERS = Registry({
+    'CSV': 'input.reader:CSVReader',
+    'MSACCESS': 'input.database_reader:MSAccessDatabaseReader',
+    'SQLITE': 'input.database_reader:SQLiteDatabaseReader',
+    'PARQUET': 'input.columnar_reader:ColumnarReader',
+    'FEATHER': 'input.columnar_reader:ColumnarReader',
+})
+
+# the category creators by the create_categories value in the [[CATEGORY]] section
+CATEGORY_CREATORS = Registry({
+    'NHTSA': 'output.category_creation:NHTSADatabaseCategoryCreation',
+})
+
+# the writers and the visualizers by their keys in the [OUTPUT] section
+WRITERS = Registry({
+    'csv': 'output.writer:ClusterCSVWriter',
+    'information': 'output.writer:ClusterInformationWriter',
+})
+
+VISUALIZERS = Registry({
+    'save_plot': 'output.visualization:ClusterPlot',
+    'save_silhouette_score_plot': 'output.visualization:SilhouettePlot',
+})
+
+# the vectorizers, the reducers and the clusterers by their values in the [VECTORIZING], [REDUCTION] and [CLUSTERING]
+# sections
+VECTORIZERS = Registry({
+    'CountVectorizer': 'vectorizing.vectorizer:TokenCorpusCountVectorizer',
+    'TF-IDF': 'vectorizing.vectorizer:TokenCorpusTfidfVectorizer',
+    'Hashing': 'vectorizing.vectorizer:StreamingHashingVectorizer',
+})
+
+REDUCERS = Registry({
+    'lsa': 'sklearn.decomposition:TruncatedSVD',
+    'random_projection': 'sklearn.random_projection:SparseRandomProjection',
+    'hashing': 'reduction.reducer:ColumnHashing',
+})
+
+CLUSTERERS = Registry({
+    'kmeans': 'sklearn.cluster:KMeans',
+    'minibatch_kmeans': 'clustering.minibatch_kmeans:StreamingMiniBatchKMeans',
+    'spherical_kmeans': 'clustering.spherical_kmeans:SphericalKMeans',
+})
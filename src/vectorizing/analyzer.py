@@ -0,0 +1,13 @@
+"""
+Marco Link
+"""
+
+def split_tabs(document):
+    """
+    Analyzer for documents whose tokens are joined with the tab character.
+    A module level function instead of a lambda, so the vectorizers can be pickled.
+    https://github.com/scikit-learn/scikit-learn/issues/5482
+    :param document: the document with the joined tokens
+    :return: list with the tokens
+    """
+    return document.split('\t')
@@ -0,0 +1,310 @@
+from array import array
+from multiprocessing import Pool
+
+import numpy
+import scipy.sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+from preprocessing.token_corpus import TokenCorpus
+
+"""
+Marco Link
+"""
+
+class TokenCorpusVectorizerMixin:
+    """
+    Mixin for the vectorizers of scikit-learn which creates the term document matrix directly from a TokenCorpus.
+    The tokens of a token corpus are used as features as they are, the analyzer isn't applied to them. Other documents
+    are vectorized like before, with n_jobs > 1 their tokens are counted in shards by multiple processes.
+    """
+
+    # the amount of processes which count the tokens of documents which aren't a token corpus
+    n_jobs = 1
+
+    def _count_vocab(self, raw_documents, fixed_vocab):
+        if not isinstance(raw_documents, TokenCorpus):
+            if self.n_jobs > 1 and len(raw_documents) > 1:
+                return self._count_vocab_parallel(raw_documents, fixed_vocab)
+            return super()._count_vocab(raw_documents, fixed_vocab)
+
+        corpus = raw_documents
+        if fixed_vocab:
+            vocabulary = self.vocabulary_
+            feature_ids = numpy.array([vocabulary.get(token, -1) for token in corpus.vocabulary], dtype=numpy.int64)
+        else:
+            # only the tokens which occur in the documents become features
+            occurring = numpy.bincount(corpus.data, minlength=len(corpus.vocabulary)) > 0
+            feature_ids = numpy.full(len(corpus.vocabulary), -1, dtype=numpy.int64)
+            feature_ids[occurring] = numpy.arange(numpy.count_nonzero(occurring))
+            vocabulary = {token: int(feature_ids[token_id]) for token_id, token in enumerate(corpus.vocabulary)
+                          if occurring[token_id]}
+            if not vocabulary:
+                raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        j_indices = feature_ids[corpus.data]
+        indptr = corpus.offsets
+        if fixed_vocab:
+            # tokens which aren't in the vocabulary are ignored
+            known = j_indices >= 0
+            known_before = numpy.concatenate(([0], numpy.cumsum(known)))
+            indptr = known_before[indptr - indptr[0]]
+            j_indices = j_indices[known]
+        else:
+            indptr = indptr - indptr[0]
+
+        indices_dtype = numpy.int32 if len(j_indices) <= numpy.iinfo(numpy.int32).max else numpy.int64
+        values = numpy.ones(len(j_indices), dtype=self.dtype)
+        term_document_matrix = scipy.sparse.csr_matrix(
+            (values, j_indices.astype(indices_dtype), indptr.astype(indices_dtype)),
+            shape=(len(corpus), len(vocabulary)))
+        # repeated tokens of a document are summed up, which also sorts the indices
+        term_document_matrix.sum_duplicates()
+        return vocabulary, term_document_matrix
+
+    def _count_vocab_parallel(self, raw_documents, fixed_vocab):
+        """
+        Counts the tokens of shards of the documents in multiple processes and merges the counts.
+        The features get their ids in the order of their first occurrence like in the single process counting of
+        scikit-learn, min_df, max_df and max_features are applied afterwards by fit_transform.
+        :param raw_documents: the documents
+        :param fixed_vocab: whether the vocabulary of the vectorizer is used
+        :return: the vocabulary and the term document matrix with the counts
+        """
+        shard_size = -(-len(raw_documents) // (self.n_jobs * 4))
+        shards = (raw_documents[start:start + shard_size] for start in range(0, len(raw_documents), shard_size))
+        vocabulary = self.vocabulary_ if fixed_vocab else {}
+        j_indices = []
+        values = []
+        indptr = [numpy.zeros(1, dtype=numpy.int64)]
+        length = 0
+        # the vectorizer is passed to every process once
+        with Pool(self.n_jobs, initializer=_initialize_worker, initargs=(self,)) as pool:
+            # imap returns the counts of the shards in the original order
+            for shard_features, shard_j_indices, shard_values, shard_indptr in pool.imap(
+                    _count_shard, ((shard, fixed_vocab) for shard in shards)):
+                if not fixed_vocab:
+                    feature_ids = numpy.array([vocabulary.setdefault(feature, len(vocabulary))
+                                               for feature in shard_features], dtype=numpy.int64)
+                    shard_j_indices = feature_ids[shard_j_indices]
+                j_indices.append(shard_j_indices)
+                values.append(shard_values)
+                indptr.append(shard_indptr[1:] + length)
+                length += len(shard_j_indices)
+        if not fixed_vocab and not vocabulary:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        indices_dtype = numpy.int32 if length <= numpy.iinfo(numpy.int32).max else numpy.int64
+        term_document_matrix = scipy.sparse.csr_matrix(
+            (numpy.concatenate(values).astype(self.dtype), numpy.concatenate(j_indices).astype(indices_dtype),
+             numpy.concatenate(indptr).astype(indices_dtype)),
+            shape=(len(raw_documents), len(vocabulary)))
+        term_document_matrix.sort_indices()
+        return vocabulary, term_document_matrix
+
+
+class TokenCorpusCountVectorizer(TokenCorpusVectorizerMixin, CountVectorizer):
+    """CountVectorizer which creates the term document matrix directly from a TokenCorpus."""
+    pass
+
+
+class TokenCorpusTfidfVectorizer(TokenCorpusVectorizerMixin, TfidfVectorizer):
+    """TfidfVectorizer which creates the term document matrix directly from a TokenCorpus."""
+    pass
+
+
+class StreamingHashingVectorizer(TransformerMixin, BaseEstimator):
+    """
+    Vectorizer which maps the tokens with a hash function to a fixed amount of features, like the HashingVectorizer of
+    scikit-learn. There is no vocabulary, so the documents can be vectorized chunk by chunk and only the term document
+    matrix of the complete documents is kept in memory.
+    The document frequencies are counted while the chunks are vectorized, the optional idf weighting and the
+    normalization are applied to the stacked term document matrix afterwards.
+    For every feature the first token which was mapped to it is kept as feature name.
+    """
+
+    def __init__(self, n_features=2 ** 18, chunk_size=10000, binary=False, use_idf=False, smooth_idf=True,
+                 sublinear_tf=False, norm='l2', analyzer='word', lowercase=False, dtype=numpy.float64):
+        """
+        :param n_features: the amount of features
+        :param chunk_size: the amount of documents which are vectorized at once by fit_transform and transform
+        :param binary: whether all non zero counts are set to 1
+        :param use_idf: whether the features are weighted with the inverse document frequency
+        :param smooth_idf: whether one is added to the document frequencies like one document contained every token
+        :param sublinear_tf: whether the counts are replaced by 1 + log(count)
+        :param norm: the norm of the document vectors, 'l1', 'l2' or None
+        :param analyzer: 'word' or a function which splits a document into tokens, not used for token corpora
+        :param lowercase: whether the documents are lowercased by the 'word' analyzer
+        :param dtype: the type of the values of the term document matrix
+        """
+        self.n_features = n_features
+        self.chunk_size = chunk_size
+        self.binary = binary
+        self.use_idf = use_idf
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.analyzer = analyzer
+        self.lowercase = lowercase
+        self.dtype = dtype
+
+    def fit_transform(self, raw_documents, y=None):
+        """
+        :param raw_documents: the documents, strings or a TokenCorpus
+        :param y: ignored
+        :return: the term document matrix
+        """
+        return self.fit_transform_chunks(self._chunks(raw_documents))
+
+    def fit(self, raw_documents, y=None):
+        self.fit_transform(raw_documents)
+        return self
+
+    def fit_transform_chunks(self, chunks):
+        """
+        Vectorizes the documents chunk by chunk, e.g. while they are preprocessed.
+        :param chunks: iterable of document chunks, every chunk contains strings or is a TokenCorpus
+        :return: the term document matrix of the documents of all chunks
+        """
+        self.feature_names_ = {}
+        self.document_frequency_ = numpy.zeros(self.n_features, dtype=numpy.int64)
+        self.n_documents_ = 0
+        term_document_matrices = []
+        for chunk in chunks:
+            term_document_matrix = self._count(chunk, self.feature_names_)
+            # every feature occurs once per document after summing up the duplicates
+            self.document_frequency_ += numpy.bincount(term_document_matrix.indices, minlength=self.n_features)
+            self.n_documents_ += term_document_matrix.shape[0]
+            term_document_matrices.append(term_document_matrix)
+
+        if self.use_idf:
+            document_frequency = self.document_frequency_ + int(self.smooth_idf)
+            n_documents = self.n_documents_ + int(self.smooth_idf)
+            # features which don't occur in any document get the weight of a feature occurring once
+            self.idf_ = (numpy.log(n_documents / numpy.maximum(document_frequency, 1)) + 1).astype(self.dtype)
+        return self._weight(self._stack(term_document_matrices))
+
+    def transform(self, raw_documents):
+        """
+        :param raw_documents: the documents, strings or a TokenCorpus
+        :return: the term document matrix weighted with the inverse document frequencies of the fitted documents
+        """
+        return self._weight(self._stack([self._count(chunk) for chunk in self._chunks(raw_documents)]))
+
+    def get_feature_names(self):
+        """:return: list with the first token mapped to every feature, the index for unused features"""
+        feature_names = self.feature_names_
+        return [feature_names.get(feature, str(feature)) for feature in range(self.n_features)]
+
+    def _chunks(self, raw_documents):
+        """
+        :param raw_documents: the documents, strings or a TokenCorpus
+        :return: generator over the chunks of the documents
+        """
+        for start in range(0, len(raw_documents), self.chunk_size):
+            yield raw_documents[start:start + self.chunk_size]
+
+    def _count(self, documents, feature_names=None):
+        """
+        Counts the hashed tokens of documents. The hash function is applied once per distinct token of the chunk.
+        :param documents: the documents, strings or a TokenCorpus
+        :param feature_names: dictionary to which the first token of every feature is added, None if not needed
+        :return: the term document matrix with the counts
+        """
+        if not isinstance(documents, TokenCorpus):
+            analyzer = self.analyzer
+            if not callable(analyzer):
+                analyzer = CountVectorizer(analyzer=analyzer, lowercase=self.lowercase).build_analyzer()
+            documents = TokenCorpus.from_documents(analyzer(document) for document in documents)
+
+        # a slice of a token corpus shares the vocabulary of the whole corpus, so only the ids of the chunk are hashed
+        token_ids, positions = numpy.unique(documents.data, return_inverse=True)
+        vocabulary = documents.vocabulary
+        features = numpy.empty(len(token_ids), dtype=numpy.int32)
+        for index, token_id in enumerate(token_ids.tolist()):
+            token = vocabulary[token_id]
+            # the same mapping as the HashingVectorizer of scikit-learn without alternating signs
+            feature = abs(murmurhash3_32(token, seed=0)) % self.n_features
+            features[index] = feature
+            if feature_names is not None and feature not in feature_names:
+                feature_names[feature] = token
+
+        offsets = documents.offsets
+        term_document_matrix = scipy.sparse.csr_matrix(
+            (numpy.ones(len(documents.data), dtype=self.dtype), features[positions.ravel()], offsets - offsets[0]),
+            shape=(len(documents), self.n_features))
+        term_document_matrix.sum_duplicates()
+        if self.binary:
+            term_document_matrix.data[:] = 1
+        return term_document_matrix
+
+    def _stack(self, term_document_matrices):
+        """
+        :param term_document_matrices: list with the term document matrices of the chunks
+        :return: one term document matrix with the rows of all matrices
+        """
+        if len(term_document_matrices) == 0:
+            return scipy.sparse.csr_matrix((0, self.n_features), dtype=self.dtype)
+        return scipy.sparse.vstack(term_document_matrices, format='csr')
+
+    def _weight(self, term_document_matrix):
+        """
+        Applies the sublinear term frequencies, the idf weights and the normalization in place.
+        :param term_document_matrix: the term document matrix with the counts
+        :return: the weighted term document matrix
+        """
+        if self.sublinear_tf:
+            numpy.log(term_document_matrix.data, out=term_document_matrix.data)
+            term_document_matrix.data += 1
+        if self.use_idf:
+            term_document_matrix.data *= self.idf_[term_document_matrix.indices]
+        if self.norm is not None:
+            term_document_matrix = normalize(term_document_matrix, norm=self.norm, copy=False)
+        return term_document_matrix
+
+
+# the vectorizer of a worker process
+_worker_vectorizer = None
+
+
+def _initialize_worker(vectorizer):
+    """
+    Receives the vectorizer once when a worker process is started.
+    :param vectorizer: the vectorizer
+    """
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+
+def _count_shard(task):
+    """
+    Counts the features of a shard of documents in a worker process like the single process counting of scikit-learn.
+    :param task: tuple with the documents and whether the vocabulary of the vectorizer is used
+    :return: tuple with the features of the shard in the order of their ids, which is empty if the vocabulary of the
+             vectorizer is used, and the column indices, values and index pointer of the term document matrix
+    """
+    documents, fixed_vocab = task
+    analyze = _worker_vectorizer.build_analyzer()
+    vocabulary = _worker_vectorizer.vocabulary_ if fixed_vocab else {}
+    j_indices = array('q')
+    values = array('q')
+    indptr = array('q', [0])
+    for document in documents:
+        feature_counter = {}
+        for feature in analyze(document):
+            if fixed_vocab:
+                feature_id = vocabulary.get(feature)
+                if feature_id is None:
+                    # features which aren't in the vocabulary are ignored
+                    continue
+            else:
+                feature_id = vocabulary.setdefault(feature, len(vocabulary))
+            feature_counter[feature_id] = feature_counter.get(feature_id, 0) + 1
+        j_indices.extend(feature_counter.keys())
+        values.extend(feature_counter.values())
+        indptr.append(len(j_indices))
+    features = [] if fixed_vocab else list(vocabulary)
+    return features, numpy.frombuffer(j_indices, dtype=numpy.int64), numpy.frombuffer(values, dtype=numpy.int64), \
+        numpy.frombuffer(indptr, dtype=numpy.int64)